@@ -0,0 +1,295 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Count, Sum
+from frappe.utils import add_days, cint, cstr, flt, getdate, now, nowdate
+from frappe.utils.background_jobs import enqueue
+
+from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
+	get_accounting_dimensions,
+)
+
+
+class AccountBalanceRollup(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		company: DF.Link | None
+		cost_center: DF.Link | None
+		credit: DF.Currency
+		credit_in_account_currency: DF.Currency
+		debit: DF.Currency
+		debit_in_account_currency: DF.Currency
+		finance_book: DF.Link | None
+		fiscal_year: DF.Link | None
+		gl_entry_count: DF.Int
+		is_opening: DF.Literal["No", "Yes"]
+		is_period_closing_voucher_entry: DF.Check
+		posting_date: DF.Date | None
+		project: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+ROLLUP_KEY_FIELDS = (
+	"company",
+	"posting_date",
+	"fiscal_year",
+	"account",
+	"account_currency",
+	"cost_center",
+	"project",
+	"finance_book",
+	"is_opening",
+)
+
+ROLLUP_AMOUNT_FIELDS = (
+	"debit",
+	"credit",
+	"debit_in_account_currency",
+	"credit_in_account_currency",
+)
+
+
+def on_doctype_update():
+	frappe.db.add_index("Account Balance Rollup", ["company", "account", "posting_date"])
+
+
+def get_account_balance_rollup_upto(for_posting=False):
+	"""
+	Date till which daily balances are rolled up, exclusive. Balances before it can be
+	read from Account Balance Rollup, GL Entries on and after it have to be read directly.
+
+	Postings read the date `for_posting` with a shared lock, held till they commit, which
+	`rollup_account_balances` waits for before it moves the date.
+	"""
+	if not cint(frappe.db.get_single_value("Accounts Settings", "enable_account_balance_rollup")):
+		return None
+
+	if for_posting:
+		upto = lock_account_balance_rollup_upto(shared=True)
+	else:
+		upto = frappe.db.get_single_value("Accounts Settings", "account_balance_rollup_upto")
+
+	return getdate(upto) if upto else None
+
+
+def lock_account_balance_rollup_upto(shared=False):
+	"""Read the rollup date with a shared or an exclusive lock on it"""
+	if shared:
+		lock = "for share" if frappe.db.db_type == "postgres" else "lock in share mode"
+	else:
+		lock = "for update"
+
+	upto = frappe.db.sql(
+		f"""select value from `tabSingles`
+		where doctype = 'Accounts Settings' and field = 'account_balance_rollup_upto' {lock}"""
+	)
+	return upto[0][0] if upto else None
+
+
+def get_rollup_key_fields():
+	return [*ROLLUP_KEY_FIELDS, *get_accounting_dimensions()]
+
+
+def get_rollup_key(entry, key_fields):
+	return tuple(
+		getdate(entry.get(field)) if field == "posting_date" else (entry.get(field) or None)
+		for field in key_fields
+	)
+
+
+def get_rollup_name(key):
+	return hashlib.sha256(cstr(key).encode()).hexdigest()
+
+
+def update_account_balance_rollup(gl_entries, cancel=False):
+	"""
+	Apply GL Entries posted before the rollup date to the daily balances.
+
+	Later entries are left to `rollup_account_balances` and read from GL Entry till then.
+	"""
+	if not gl_entries:
+		return
+
+	rollup_upto = get_account_balance_rollup_upto(for_posting=True)
+	if not rollup_upto:
+		return
+
+	key_fields = get_rollup_key_fields()
+	sign = -1 if cancel else 1
+
+	balances = {}
+	for entry in gl_entries:
+		if getdate(entry.get("posting_date")) >= rollup_upto:
+			continue
+
+		# cancelled entries and their reversals are not a part of any balance
+		if not cancel and cint(entry.get("is_cancelled")):
+			continue
+
+		key = (*get_rollup_key(entry, key_fields), entry.get("voucher_type") == "Period Closing Voucher")
+		balance = balances.setdefault(key, frappe._dict({field: 0.0 for field in ROLLUP_AMOUNT_FIELDS}))
+		for field in ROLLUP_AMOUNT_FIELDS:
+			balance[field] += sign * flt(entry.get(field))
+
+		balance.gl_entry_count = balance.get("gl_entry_count", 0) + sign
+
+	for key, balance in balances.items():
+		add_to_rollup(key, balance, key_fields)
+
+
+def add_to_rollup(key, balance, key_fields):
+	name = get_rollup_name(key)
+	if frappe.db.exists("Account Balance Rollup", name) or not insert_rollup(name, key, balance, key_fields):
+		rollup = frappe.qb.DocType("Account Balance Rollup")
+		query = frappe.qb.update(rollup).set(
+			rollup.gl_entry_count, rollup.gl_entry_count + balance.gl_entry_count
+		)
+		for field in ROLLUP_AMOUNT_FIELDS:
+			query = query.set(rollup[field], rollup[field] + balance[field])
+
+		query.where(rollup.name == name).run()
+
+
+def insert_rollup(name, key, balance, key_fields):
+	"""Returns False if the row was inserted concurrently, in which case it has to be updated"""
+	doc = frappe.get_doc(
+		{
+			"doctype": "Account Balance Rollup",
+			"name": name,
+			**dict(zip(key_fields, key[:-1], strict=True)),
+			"is_period_closing_voucher_entry": cint(key[-1]),
+			**balance,
+		}
+	)
+
+	frappe.db.savepoint("account_balance_rollup")
+	try:
+		doc.db_insert()
+	except frappe.DuplicateEntryError:
+		frappe.db.rollback(save_point="account_balance_rollup")
+		return False
+
+	return True
+
+
+def rollup_account_balances():
+	"""Roll up GL Entries of the days which have passed since the last run"""
+	if not cint(frappe.db.get_single_value("Accounts Settings", "enable_account_balance_rollup")):
+		return
+
+	# A posting which read the old date leaves its entries to be read from GL Entry, so they
+	# have to be in the read below. Once the exclusive lock is granted all such postings are
+	# committed, and a transaction started after the commit here sees them.
+	if not frappe.in_test:
+		frappe.db.commit()  # nosemgrep
+
+	rollup_upto = lock_account_balance_rollup_upto()
+	rollup_upto = getdate(rollup_upto) if rollup_upto else None
+	today = getdate(nowdate())
+	if rollup_upto and rollup_upto >= today:
+		return
+
+	insert_rollup_for_period(rollup_upto, today)
+	frappe.db.set_single_value("Accounts Settings", "account_balance_rollup_upto", today)
+
+
+def insert_rollup_for_period(from_date, to_date):
+	"""Aggregate GL Entries posted on or after `from_date` and before `to_date` into daily balances"""
+	key_fields = get_rollup_key_fields()
+	gle = frappe.qb.DocType("GL Entry")
+	is_pcv_entry = Case().when(gle.voucher_type == "Period Closing Voucher", 1).else_(0)
+
+	query = (
+		frappe.qb.from_(gle)
+		.select(
+			*[gle[field] for field in key_fields],
+			is_pcv_entry.as_("is_period_closing_voucher_entry"),
+			*[Sum(gle[field]).as_(field) for field in ROLLUP_AMOUNT_FIELDS],
+			Count("*").as_("gl_entry_count"),
+		)
+		.where((gle.is_cancelled == 0) & (gle.posting_date < to_date))
+		.groupby(*[gle[field] for field in key_fields], is_pcv_entry)
+	)
+
+	if from_date:
+		query = query.where(gle.posting_date >= from_date)
+
+	# empty and unset values are grouped separately by the database but share a key
+	balances = {}
+	for row in query.run(as_dict=True):
+		key = (*get_rollup_key(row, key_fields), bool(cint(row.is_period_closing_voucher_entry)))
+		balance = balances.setdefault(key, [0.0] * len(ROLLUP_AMOUNT_FIELDS) + [0])
+		for idx, field in enumerate(ROLLUP_AMOUNT_FIELDS):
+			balance[idx] += flt(row[field])
+
+		balance[-1] += cint(row.gl_entry_count)
+
+	timestamp = now()
+	fields = ["name", "creation", "modified", "owner", "modified_by", *key_fields]
+	fields += ["is_period_closing_voucher_entry", *ROLLUP_AMOUNT_FIELDS, "gl_entry_count"]
+
+	values = [
+		(
+			get_rollup_name(key),
+			timestamp,
+			timestamp,
+			frappe.session.user,
+			frappe.session.user,
+			*key[:-1],
+			cint(key[-1]),
+			*balance,
+		)
+		for key, balance in balances.items()
+	]
+
+	frappe.db.bulk_insert("Account Balance Rollup", fields, values, chunk_size=1000)
+
+
+def rebuild_account_balance_rollup():
+	"""Drop all daily balances and roll up the GL from the beginning"""
+	# clearing the date waits for postings which still apply their entries to the balances
+	frappe.db.set_single_value("Accounts Settings", "account_balance_rollup_upto", None)
+	frappe.db.delete("Account Balance Rollup")
+	rollup_account_balances()
+
+
+def enqueue_rebuild_account_balance_rollup():
+	enqueue(
+		rebuild_account_balance_rollup,
+		queue="long",
+		timeout=7200,
+		job_id="rebuild_account_balance_rollup",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		now=frappe.in_test,
+	)
+
+
+def get_rollup_date_ranges(from_date, to_date, rollup_upto):
+	"""
+	Split the period into the part which can be read from the rollup and the part
+	which has to be read from GL Entry. Either part is None if it is empty.
+	"""
+	if not rollup_upto or (from_date and getdate(from_date) >= rollup_upto):
+		return None, (from_date, to_date)
+
+	last_rolled_up_date = add_days(rollup_upto, -1)
+	if getdate(to_date) <= last_rolled_up_date:
+		return (from_date, to_date), None
+
+	return (from_date, last_rolled_up_date), (rollup_upto, to_date)
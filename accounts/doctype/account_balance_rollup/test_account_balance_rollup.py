@@ -0,0 +1,76 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.query_builder.functions import Sum
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, flt, getdate, nowdate
+
+from nexa.accounts.doctype.account_balance_rollup import account_balance_rollup
+from nexa.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from nexa.accounts.utils import get_balance_on
+
+
+class TestAccountBalanceRollup(IntegrationTestCase):
+	def get_gl_balance(self, account, date):
+		gle = frappe.qb.DocType("GL Entry")
+		balance = (
+			frappe.qb.from_(gle)
+			.select(Sum(gle.debit) - Sum(gle.credit))
+			.where((gle.account == account) & (gle.posting_date <= date) & (gle.is_cancelled == 0))
+			.run()
+		)
+		return flt(balance[0][0])
+
+	def get_rolled_up_balance(self, account):
+		rollup = frappe.qb.DocType("Account Balance Rollup")
+		balance = (
+			frappe.qb.from_(rollup)
+			.select(Sum(rollup.debit) - Sum(rollup.credit))
+			.where(rollup.account == account)
+			.run()
+		)
+		return flt(balance[0][0])
+
+	@IntegrationTestCase.change_settings("Accounts Settings", {"enable_account_balance_rollup": 1})
+	def test_backdated_entries_update_rollup(self):
+		account = "_Test Bank - _TC"
+		self.assertEqual(
+			getdate(frappe.db.get_single_value("Accounts Settings", "account_balance_rollup_upto")),
+			getdate(nowdate()),
+		)
+
+		rolled_up_balance = self.get_rolled_up_balance(account)
+		jv = make_journal_entry(
+			account, "_Test Cash - _TC", 100, posting_date=add_days(nowdate(), -3), submit=True
+		)
+		self.assertEqual(self.get_rolled_up_balance(account), rolled_up_balance + 100)
+
+		make_journal_entry(account, "_Test Cash - _TC", 50, posting_date=nowdate(), submit=True)
+		self.assertEqual(self.get_rolled_up_balance(account), rolled_up_balance + 100)
+
+		for date in (add_days(nowdate(), -4), add_days(nowdate(), -3), nowdate()):
+			self.assertEqual(get_balance_on(account, date), self.get_gl_balance(account, date))
+
+		jv.cancel()
+		self.assertEqual(self.get_rolled_up_balance(account), rolled_up_balance)
+		self.assertEqual(get_balance_on(account, nowdate()), self.get_gl_balance(account, nowdate()))
+
+	@IntegrationTestCase.change_settings("Accounts Settings", {"enable_account_balance_rollup": 1})
+	def test_postings_lock_rollup_date(self):
+		# the rollup job waits on postings which read the old date before it moves the date
+		with patch.object(
+			account_balance_rollup,
+			"lock_account_balance_rollup_upto",
+			wraps=account_balance_rollup.lock_account_balance_rollup_upto,
+		) as lock_account_balance_rollup_upto:
+			make_journal_entry(
+				"_Test Bank - _TC", "_Test Cash - _TC", 100, posting_date=add_days(nowdate(), -3), submit=True
+			)
+			lock_account_balance_rollup_upto.assert_called_with(shared=True)
+
+			lock_account_balance_rollup_upto.reset_mock()
+			account_balance_rollup.rollup_account_balances()
+			lock_account_balance_rollup_upto.assert_called_once_with()
@@ -4,7 +4,9 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import cint, cstr, flt
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Sum
+from frappe.utils import add_days, cint, cstr, flt
 
 from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
@@ -118,39 +120,142 @@ def generate_key(entry, accounting_dimensions):
 
 def get_previous_closing_entries(company, closing_date, accounting_dimensions):
 	entries = []
+	last_period_closing_voucher = get_last_period_closing_voucher(company, closing_date)
+
+	if last_period_closing_voucher:
+		entries = get_closing_entries_query(last_period_closing_voucher.name, accounting_dimensions).run(
+			as_dict=1
+		)
+
+	return entries
+
+
+def get_last_period_closing_voucher(company, date):
 	last_period_closing_voucher = frappe.db.get_all(
 		"Period Closing Voucher",
-		filters={"docstatus": 1, "company": company, "period_end_date": ("<", closing_date)},
-		fields=["name"],
+		filters={"docstatus": 1, "company": company, "period_end_date": ("<", date)},
+		fields=["name", "period_end_date"],
 		order_by="period_end_date desc",
 		limit=1,
 	)
 
-	if last_period_closing_voucher:
-		account_closing_balance = frappe.qb.DocType("Account Closing Balance")
-		query = frappe.qb.from_(account_closing_balance).select(
-			account_closing_balance.company,
-			account_closing_balance.account,
-			account_closing_balance.account_currency,
-			account_closing_balance.debit,
-			account_closing_balance.credit,
-			account_closing_balance.debit_in_account_currency,
-			account_closing_balance.credit_in_account_currency,
-			account_closing_balance.cost_center,
-			account_closing_balance.project,
-			account_closing_balance.finance_book,
-			account_closing_balance.is_period_closing_voucher_entry,
-		)
+	return last_period_closing_voucher[0] if last_period_closing_voucher else None
+
+
+def get_closing_entries_query(period_closing_voucher, accounting_dimensions):
+	account_closing_balance = frappe.qb.DocType("Account Closing Balance")
+	query = frappe.qb.from_(account_closing_balance).select(
+		account_closing_balance.company,
+		account_closing_balance.account,
+		account_closing_balance.account_currency,
+		account_closing_balance.debit,
+		account_closing_balance.credit,
+		account_closing_balance.debit_in_account_currency,
+		account_closing_balance.credit_in_account_currency,
+		account_closing_balance.cost_center,
+		account_closing_balance.project,
+		account_closing_balance.finance_book,
+		account_closing_balance.is_period_closing_voucher_entry,
+	)
+
+	for dimension in accounting_dimensions:
+		query = query.select(account_closing_balance[dimension])
+
+	return query.where(account_closing_balance.period_closing_voucher == period_closing_voucher)
+
+
+def get_closing_balance_anchor(company, date):
+	"""
+	Returns the Period Closing Voucher ending nearest before `date` whose Account Closing
+	Balances can be used as the opening on `date`, unless they are to be ignored.
+	"""
+	if cint(frappe.get_single_value("Accounts Settings", "ignore_account_closing_balance")):
+		return None
+
+	return get_last_period_closing_voucher(company, date)
+
 
-		for dimension in accounting_dimensions:
-			query = query.select(account_closing_balance[dimension])
+def get_opening_balances(
+	company, date, accounting_dimensions=None, finance_books=None, dimension_filters=None
+):
+	"""
+	Returns the balances of the accounts of `company` before `date`, one row per account,
+	account currency, cost center, project, finance book, accounting dimensions and
+	whether they are Period Closing Voucher entries.
 
-		query = query.where(
-			account_closing_balance.period_closing_voucher == last_period_closing_voucher[0].name
+	The balances are read from the Account Closing Balance of the nearest Period Closing
+	Voucher, adding only the GL Entries posted after it.
+
+	:param finance_books: Finance Books to include apart from entries without one, all if not set
+	:param dimension_filters: Values to include per field, like `{"cost_center": [...]}`
+	"""
+	if accounting_dimensions is None:
+		accounting_dimensions = get_accounting_dimensions()
+
+	entries = []
+	anchor = get_closing_balance_anchor(company, date)
+	if anchor:
+		acb = frappe.qb.DocType("Account Closing Balance")
+		query = get_closing_entries_query(anchor.name, accounting_dimensions)
+		entries += apply_opening_balance_filters(acb, query, finance_books, dimension_filters).run(as_dict=1)
+
+	entries += get_gl_balances(
+		company,
+		add_days(anchor.period_end_date, 1) if anchor else None,
+		date,
+		accounting_dimensions,
+		finance_books,
+		dimension_filters,
+	)
+
+	return [
+		frappe._dict({**balance.pop("dimensions"), **balance})
+		for balance in aggregate_with_last_account_closing_balance(entries, accounting_dimensions).values()
+	]
+
+
+def get_gl_balances(company, from_date, to_date, accounting_dimensions, finance_books, dimension_filters):
+	"""Balances of GL Entries posted on or after `from_date` and before `to_date`"""
+	gle = frappe.qb.DocType("GL Entry")
+	is_pcv_entry = Case().when(gle.voucher_type == "Period Closing Voucher", 1).else_(0)
+	group_by_fields = [
+		gle.account,
+		gle.account_currency,
+		gle.cost_center,
+		gle.project,
+		gle.finance_book,
+		*[gle[dimension] for dimension in accounting_dimensions],
+	]
+
+	query = (
+		frappe.qb.from_(gle)
+		.select(
+			gle.company,
+			*group_by_fields,
+			is_pcv_entry.as_("is_period_closing_voucher_entry"),
+			Sum(gle.debit).as_("debit"),
+			Sum(gle.credit).as_("credit"),
+			Sum(gle.debit_in_account_currency).as_("debit_in_account_currency"),
+			Sum(gle.credit_in_account_currency).as_("credit_in_account_currency"),
 		)
-		entries = query.run(as_dict=1)
+		.where((gle.company == company) & (gle.is_cancelled == 0) & (gle.posting_date < to_date))
+		.groupby(gle.company, *group_by_fields, is_pcv_entry)
+	)
 
-	return entries
+	if from_date:
+		query = query.where(gle.posting_date >= from_date)
+
+	return apply_opening_balance_filters(gle, query, finance_books, dimension_filters).run(as_dict=1)
+
+
+def apply_opening_balance_filters(table, query, finance_books, dimension_filters):
+	if finance_books is not None:
+		query = query.where(table.finance_book.isin(["", *finance_books]) | table.finance_book.isnull())
+
+	for fieldname, values in (dimension_filters or {}).items():
+		query = query.where(table[fieldname].isin(values))
+
+	return query
 
 
 def set_amount_in_reporting_currency(cle, company, closing_date):
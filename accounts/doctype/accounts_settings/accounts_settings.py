@@ -10,6 +10,12 @@ from frappe.custom.doctype.property_setter.property_setter import make_property_
 from frappe.model.document import Document
 from frappe.utils import cint
 
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	enqueue_rebuild_account_balance_rollup,
+)
+from nexa.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	enqueue_rebuild_voucher_outstanding,
+)
 from nexa.accounts.utils import sync_auto_reconcile_config
 from nexa.stock.utils import check_pending_reposting
 
@@ -24,6 +30,7 @@ class AccountsSettings(Document):
 		from frappe.types import DF
 
 		acc_frozen_upto: DF.Date | None
+		account_balance_rollup_upto: DF.Date | None
 		add_taxes_from_item_tax_template: DF.Check
 		add_taxes_from_taxes_and_charges_template: DF.Check
 		allow_multi_currency_invoices_against_single_party_account: DF.Check
@@ -44,6 +51,7 @@ class AccountsSettings(Document):
 		credit_controller: DF.Link | None
 		delete_linked_ledger_entries: DF.Check
 		determine_address_tax_category_from: DF.Literal["Billing Address", "Shipping Address"]
+		enable_account_balance_rollup: DF.Check
 		enable_common_party_accounting: DF.Check
 		enable_fuzzy_matching: DF.Check
 		enable_immutable_ledger: DF.Check
@@ -56,6 +64,7 @@ class AccountsSettings(Document):
 		ignore_is_opening_check_for_reporting: DF.Check
 		maintain_same_internal_transaction_rate: DF.Check
 		maintain_same_rate_action: DF.Literal["Stop", "Warn"]
+		maintain_voucher_outstanding: DF.Check
 		make_payment_via_journal_entry: DF.Check
 		merge_similar_account_heads: DF.Check
 		over_billing_allowance: DF.Currency
@@ -75,6 +84,7 @@ class AccountsSettings(Document):
 		unlink_advance_payment_on_cancelation_of_order: DF.Check
 		unlink_payment_on_cancellation_of_invoice: DF.Check
 		use_legacy_budget_controller: DF.Check
+		voucher_outstanding_built_on: DF.Datetime | None
 	# end: auto-generated types
 
 	def validate(self):
@@ -107,6 +117,21 @@ class AccountsSettings(Document):
 
 		self.validate_and_sync_auto_reconcile_config()
 
+		if self.has_value_changed("enable_account_balance_rollup"):
+			# balances are rolled up again from the beginning once enabled
+			self.account_balance_rollup_upto = None
+
+		if self.has_value_changed("maintain_voucher_outstanding"):
+			# outstanding amounts can't be trusted till they are built again
+			self.voucher_outstanding_built_on = None
+
+	def on_update(self):
+		if self.has_value_changed("enable_account_balance_rollup") and self.enable_account_balance_rollup:
+			enqueue_rebuild_account_balance_rollup()
+
+		if self.has_value_changed("maintain_voucher_outstanding") and self.maintain_voucher_outstanding:
+			enqueue_rebuild_voucher_outstanding()
+
 	def validate_stale_days(self):
 		if not self.allow_stale and cint(self.stale_days) <= 0:
 			frappe.msgprint(
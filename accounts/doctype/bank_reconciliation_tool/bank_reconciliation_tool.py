@@ -21,6 +21,10 @@ from nexa.accounts.report.bank_reconciliation_statement.bank_reconciliation_stat
 from nexa.accounts.utils import get_account_currency, get_balance_on
 from nexa.setup.utils import get_exchange_rate
 
+DEFAULT_MATCHING_QUERIES = (
+	"nexa.accounts.doctype.bank_reconciliation_tool.bank_reconciliation_tool.get_matching_queries"
+)
+
 
 class BankReconciliationTool(Document):
 	# begin: auto-generated types
@@ -405,11 +409,12 @@ def start_auto_reconcile(
 ):
 	frappe.flags.auto_reconcile_vouchers = True
 
-	reconciled, partially_reconciled = set(), set()
-	for transaction in bank_transactions:
-		linked_payments = get_linked_payments(
-			transaction.name,
-			["payment_entry", "journal_entry"],
+	# vouchers matching any of the transactions are fetched at once,
+	# unless other apps add their own matching queries
+	candidates = None
+	if frappe.get_hooks("get_matching_queries") == [DEFAULT_MATCHING_QUERIES]:
+		candidates = get_auto_reconcile_candidates(
+			bank_transactions,
 			from_date,
 			to_date,
 			filter_by_reference_date,
@@ -417,6 +422,21 @@ def start_auto_reconcile(
 			to_reference_date,
 		)
 
+	reconciled, partially_reconciled = set(), set()
+	for transaction in bank_transactions:
+		if candidates is not None:
+			linked_payments = get_linked_payments_from_candidates(transaction, candidates)
+		else:
+			linked_payments = get_linked_payments(
+				transaction.name,
+				["payment_entry", "journal_entry"],
+				from_date,
+				to_date,
+				filter_by_reference_date,
+				from_reference_date,
+				to_reference_date,
+			)
+
 		if not linked_payments:
 			continue
 
@@ -445,6 +465,175 @@ def start_auto_reconcile(
 	frappe.flags.auto_reconcile_vouchers = False
 
 
+def get_auto_reconcile_candidates(
+	bank_transactions, from_date, to_date, filter_by_reference_date, from_reference_date, to_reference_date
+):
+	"""
+	Payment and Journal Entries having the reference number of any of the `bank_transactions`,
+	keyed by bank GL account, whether they are deposits and reference number
+	"""
+	gl_accounts = dict(
+		frappe.get_all(
+			"Bank Account",
+			filters={"name": ("in", list({d.bank_account for d in bank_transactions}))},
+			fields=["name", "account"],
+			as_list=1,
+		)
+	)
+
+	reference_numbers = {}
+	for transaction in bank_transactions:
+		transaction.gl_account = gl_accounts.get(transaction.bank_account)
+		if transaction.reference_number is not None:
+			key = (transaction.gl_account, transaction.deposit > 0.0)
+			reference_numbers.setdefault(key, set()).add(transaction.reference_number)
+
+	candidates = {}
+	for (gl_account, is_deposit), references in reference_numbers.items():
+		for reference_batch in create_batch(list(references), 1000):
+			vouchers = get_pe_candidates_query(
+				gl_account,
+				is_deposit,
+				reference_batch,
+				from_date,
+				to_date,
+				filter_by_reference_date,
+				from_reference_date,
+				to_reference_date,
+			).run(as_dict=True)
+			vouchers += get_je_candidates_query(
+				gl_account,
+				is_deposit,
+				reference_batch,
+				from_date,
+				to_date,
+				filter_by_reference_date,
+				from_reference_date,
+				to_reference_date,
+			).run(as_dict=True)
+
+			for voucher in vouchers:
+				candidates.setdefault((gl_account, is_deposit, voucher.reference_no), []).append(voucher)
+
+	return candidates
+
+
+def get_linked_payments_from_candidates(transaction, candidates):
+	"""Rank the candidates of the transaction the way `get_pe_matching_query` and `get_je_matching_query` do"""
+	vouchers = []
+	for candidate in candidates.get(
+		(transaction.gl_account, transaction.deposit > 0.0, transaction.reference_number), []
+	):
+		voucher = frappe._dict(candidate)
+		amount_rank = cint(flt(voucher.pop("amount")) == flt(transaction.unallocated_amount))
+		party_rank = cint(
+			voucher.doctype == "Payment Entry"
+			and bool(voucher.party)
+			and voucher.party_type == transaction.party_type
+			and voucher.party == transaction.party
+		)
+		voucher.rank = 1 + amount_rank + party_rank + 1
+		vouchers.append(voucher)
+
+	vouchers = sorted(vouchers, key=lambda x: x["rank"], reverse=True)
+
+	# vouchers allocated in full to the transactions reconciled before this one are cleared
+	return [d for d in subtract_allocations(transaction.gl_account, vouchers) if flt(d.paid_amount) > 0.0]
+
+
+def get_pe_candidates_query(
+	gl_account,
+	is_deposit,
+	reference_numbers,
+	from_date,
+	to_date,
+	filter_by_reference_date,
+	from_reference_date,
+	to_reference_date,
+):
+	to_from = "to" if is_deposit else "from"
+	payment_type = "Receive" if is_deposit else "Pay"
+	pe = frappe.qb.DocType("Payment Entry")
+
+	filter_by_date = pe.posting_date.between(from_date, to_date)
+	if cint(filter_by_reference_date):
+		filter_by_date = pe.reference_date.between(from_reference_date, to_reference_date)
+
+	return (
+		frappe.qb.from_(pe)
+		.select(
+			ConstantColumn("Payment Entry").as_("doctype"),
+			pe.name,
+			pe.base_paid_amount_after_tax.as_("paid_amount"),
+			pe.paid_amount.as_("amount"),
+			pe.reference_no,
+			pe.reference_date,
+			pe.party,
+			pe.party_type,
+			pe.posting_date,
+			getattr(pe, f"paid_{to_from}_account_currency").as_("currency"),
+		)
+		.where(pe.docstatus == 1)
+		.where(pe.payment_type.isin([payment_type, "Internal Transfer"]))
+		.where(pe.clearance_date.isnull())
+		.where(getattr(pe, f"paid_{to_from}") == gl_account)
+		.where(pe.paid_amount > 0.0)
+		.where(filter_by_date)
+		.where(pe.reference_no.isin(reference_numbers))
+		.orderby(pe.reference_date if cint(filter_by_reference_date) else pe.posting_date)
+	)
+
+
+def get_je_candidates_query(
+	gl_account,
+	is_deposit,
+	reference_numbers,
+	from_date,
+	to_date,
+	filter_by_reference_date,
+	from_reference_date,
+	to_reference_date,
+):
+	amount_field = "debit_in_account_currency" if is_deposit else "credit_in_account_currency"
+	je = frappe.qb.DocType("Journal Entry")
+	jea = frappe.qb.DocType("Journal Entry Account")
+
+	filter_by_date = je.posting_date.between(from_date, to_date)
+	if cint(filter_by_reference_date):
+		filter_by_date = je.cheque_date.between(from_reference_date, to_reference_date)
+
+	subquery = (
+		frappe.qb.from_(jea)
+		.join(je)
+		.on(jea.parent == je.name)
+		.select(
+			Sum(getattr(jea, amount_field)).as_("paid_amount"),
+			ConstantColumn("Journal Entry").as_("doctype"),
+			je.name,
+			je.cheque_no.as_("reference_no"),
+			je.cheque_date.as_("reference_date"),
+			je.pay_to_recd_from.as_("party"),
+			jea.party_type,
+			je.posting_date,
+			jea.account_currency.as_("currency"),
+		)
+		.where(je.docstatus == 1)
+		.where(je.voucher_type != "Opening Entry")
+		.where(je.clearance_date.isnull())
+		.where(jea.account == gl_account)
+		.where(filter_by_date)
+		.where(je.cheque_no.isin(reference_numbers))
+		.groupby(je.name)
+		.orderby(je.cheque_date if cint(filter_by_reference_date) else je.posting_date)
+	)
+
+	return (
+		frappe.qb.from_(subquery)
+		.select("*", subquery.paid_amount.as_("amount"))
+		.where(subquery.paid_amount > 0.0)
+	)
+
+
 def get_auto_reconcile_message(partially_reconciled, reconciled):
 	"""Returns alert message and indicator for auto reconciliation depending on result state."""
 	alert_message, indicator = "", "blue"
@@ -98,3 +98,54 @@ class TestBankReconciliationTool(AccountsTestMixin, IntegrationTestCase):
 		# assert API output post reconciliation
 		transactions = get_bank_transactions(self.bank_account, from_date, to_date)
 		self.assertEqual(len(transactions), 0)
+
+	def test_auto_reconcile_matches_each_transaction_by_reference(self):
+		from_date = add_days(today(), -1)
+		to_date = today()
+
+		payments = {}
+		for reference_no, amount in (("REF-1", 100), ("REF-2", 250)):
+			payment = create_payment_entry(
+				company=self.company,
+				posting_date=from_date,
+				payment_type="Receive",
+				party_type="Customer",
+				party=self.customer,
+				paid_from=self.debit_to,
+				paid_to=self.bank,
+				paid_amount=amount,
+			).save()
+			payment.reference_no = reference_no
+			payments[reference_no] = payment.save().submit()
+
+		bank_transactions = {}
+		for reference_no, amount in (("REF-2", 250), ("REF-1", 100), ("REF-3", 50)):
+			bank_transactions[reference_no] = (
+				frappe.get_doc(
+					{
+						"doctype": "Bank Transaction",
+						"date": to_date,
+						"deposit": amount,
+						"bank_account": self.bank_account,
+						"reference_number": reference_no,
+						"currency": "INR",
+					}
+				)
+				.save()
+				.submit()
+			)
+
+		auto_reconcile_vouchers(
+			bank_account=self.bank_account,
+			from_date=from_date,
+			to_date=to_date,
+			filter_by_reference_date=False,
+		)
+
+		for reference_no, payment in payments.items():
+			bank_transaction = bank_transactions[reference_no].reload()
+			self.assertEqual(bank_transaction.status, "Reconciled")
+			self.assertEqual(bank_transaction.payment_entries[0].payment_entry, payment.name)
+
+		transactions = get_bank_transactions(self.bank_account, from_date, to_date)
+		self.assertEqual([d.name for d in transactions], [bank_transactions["REF-3"].name])
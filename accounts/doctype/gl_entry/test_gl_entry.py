@@ -8,6 +8,8 @@ from frappe.tests import IntegrationTestCase
 
 from nexa.accounts.doctype.gl_entry.gl_entry import rename_gle_sle_docs
 from nexa.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from nexa.accounts.utils import LEDGER_BULK_INSERT_THRESHOLD
 
 
 class TestGLEntry(IntegrationTestCase):
@@ -140,3 +142,48 @@ class TestGLEntry(IntegrationTestCase):
 
 		jv.save().submit()
 		self.assertEqual(1, jv.docstatus)
+
+	@IntegrationTestCase.change_settings("Accounts Settings", {"merge_similar_account_heads": 0})
+	def test_large_gl_map_is_inserted_in_bulk(self):
+		si = create_sales_invoice(qty=1, rate=LEDGER_BULK_INSERT_THRESHOLD * 2)
+
+		jv = make_journal_entry("_Test Bank - _TC", "Debtors - _TC", 1, save=False)
+		jv.accounts = []
+		for _i in range(LEDGER_BULK_INSERT_THRESHOLD):
+			jv.append(
+				"accounts",
+				{"account": "_Test Bank - _TC", "debit_in_account_currency": 1, "exchange_rate": 1},
+			)
+			jv.append(
+				"accounts",
+				{
+					"account": "Debtors - _TC",
+					"party_type": "Customer",
+					"party": si.customer,
+					"credit_in_account_currency": 1,
+					"exchange_rate": 1,
+					"reference_type": "Sales Invoice",
+					"reference_name": si.name,
+				},
+			)
+		jv.submit()
+
+		gl_entries = frappe.get_all(
+			"GL Entry",
+			filters={"voucher_type": "Journal Entry", "voucher_no": jv.name, "is_cancelled": 0},
+			fields=["name", "fiscal_year", "docstatus", "debit", "credit"],
+		)
+		self.assertEqual(len(gl_entries), LEDGER_BULK_INSERT_THRESHOLD * 2)
+		self.assertEqual(len({d.name for d in gl_entries}), len(gl_entries))
+		self.assertTrue(all(d.docstatus == 1 and d.fiscal_year for d in gl_entries))
+		self.assertEqual(sum(d.debit for d in gl_entries), sum(d.credit for d in gl_entries))
+
+		ple_count = frappe.db.count("Payment Ledger Entry", {"voucher_no": jv.name, "delinked": 0})
+		self.assertEqual(ple_count, LEDGER_BULK_INSERT_THRESHOLD)
+
+		si.reload()
+		self.assertEqual(si.outstanding_amount, LEDGER_BULK_INSERT_THRESHOLD)
+
+		jv.cancel()
+		si.reload()
+		self.assertEqual(si.outstanding_amount, LEDGER_BULK_INSERT_THRESHOLD * 2)
@@ -2340,6 +2340,29 @@ class TestPaymentReconciliation(IntegrationTestCase):
 
 		frappe.db.set_value("Company", self.company, default_settings)
 
+	def test_two_payments_against_one_invoice(self):
+		si = self.create_sales_invoice(qty=1, rate=100)
+		pe1 = self.create_payment_entry(amount=40).save().submit()
+		pe2 = self.create_payment_entry(amount=60).save().submit()
+
+		pr = self.create_payment_reconciliation()
+		pr.get_unreconciled_entries()
+		invoices = [x.as_dict() for x in pr.invoices]
+		payments = [x.as_dict() for x in pr.payments]
+		pr.allocate_entries(frappe._dict({"invoices": invoices, "payments": payments}))
+		pr.reconcile()
+
+		si.reload()
+		self.assertEqual(si.outstanding_amount, 0)
+
+		# the payment reconciled last sees the outstanding left by the other one and settles it
+		outstanding = []
+		for pe in (pe1, pe2):
+			pe.reload()
+			self.assertEqual(len(pe.references), 1)
+			outstanding.append(pe.references[0].outstanding_amount)
+		self.assertIn(0, outstanding)
+
 
 def make_customer(customer_name, currency=None):
 	if not frappe.db.exists("Customer", customer_name):
@@ -3,7 +3,7 @@
 import unittest
 
 import frappe
-from frappe.tests import IntegrationTestCase
+from frappe.tests import IntegrationTestCase, change_settings
 from frappe.utils import today
 
 from nexa.accounts.doctype.finance_book.test_finance_book import create_finance_book
@@ -323,6 +323,53 @@ class TestPeriodClosingVoucher(IntegrationTestCase):
 		repost_doc.posting_date = today()
 		repost_doc.save()
 
+	def test_opening_balances_from_account_closing_balance(self):
+		from nexa.accounts.doctype.account_closing_balance.account_closing_balance import (
+			get_opening_balances,
+		)
+
+		frappe.db.sql("delete from `tabGL Entry` where company='Test PCV Company'")
+		frappe.db.sql("delete from `tabPeriod Closing Voucher` where company='Test PCV Company'")
+
+		company = create_company()
+		cost_center = create_cost_center("Test Cost Center 1")
+
+		for posting_date, amount in (("2021-03-15", 400), ("2022-01-10", 100)):
+			jv = make_journal_entry(
+				posting_date=posting_date,
+				amount=amount,
+				account1="Cash - TPC",
+				account2="Sales - TPC",
+				cost_center=cost_center,
+				company=company,
+				save=False,
+			)
+			jv.company = company
+			jv.save()
+			jv.submit()
+
+		pcv = self.make_period_closing_voucher(posting_date="2021-03-31")
+
+		def get_balances():
+			balances = {}
+			for balance in get_opening_balances(company, "2022-02-01"):
+				key = (balance.account, balance.is_period_closing_voucher_entry)
+				balances[key] = balances.get(key, 0.0) + balance.debit - balance.credit
+
+			return balances
+
+		# closing balance till the end of the closed year and GL Entries after it
+		expected_balances = {
+			("Cash - TPC", 0): 500.0,
+			("Sales - TPC", 0): -500.0,
+			("Sales - TPC", 1): 400.0,
+			(pcv.closing_account_head, 1): -400.0,
+		}
+		self.assertEqual(get_balances(), expected_balances)
+
+		with change_settings("Accounts Settings", {"ignore_account_closing_balance": 1}):
+			self.assertEqual(get_balances(), expected_balances)
+
 	def make_period_closing_voucher(self, posting_date, submit=True):
 		surplus_account = create_account()
 		cost_center = create_cost_center("Test Cost Center 1")
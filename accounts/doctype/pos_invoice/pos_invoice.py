@@ -954,6 +954,104 @@ def get_pos_reserved_qty_from_table(child_table, item_code, warehouse):
 	return flt(reserved_qty[0].stock_qty) if reserved_qty else 0
 
 
+def get_stock_availability_by_item(item_codes, warehouse):
+	"""
+	`get_stock_availability` of many items at once.
+
+	Returns:
+	  dict: (available qty, is stock item) by item code.
+	"""
+	items = frappe.get_all("Item", filters={"name": ("in", item_codes)}, fields=["name", "is_stock_item"])
+	stock_items = [d.name for d in items if d.is_stock_item]
+	non_stock_items = [d.name for d in items if not d.is_stock_item]
+
+	bundles = {}
+	if non_stock_items:
+		for row in frappe.get_all(
+			"Product Bundle Item",
+			filters={"parenttype": "Product Bundle", "parent": ("in", non_stock_items)},
+			fields=["parent", "item_code", "qty"],
+			order_by="idx",
+		):
+			bundles.setdefault(row.parent, []).append(row)
+
+		if bundles:
+			enabled_bundles = frappe.get_all(
+				"Product Bundle", filters={"name": ("in", list(bundles)), "disabled": 0}, pluck="name"
+			)
+			bundles = {bundle: bundles[bundle] for bundle in enabled_bundles}
+
+	components = {row.item_code for rows in bundles.values() for row in rows}
+	stock_components = set(
+		frappe.get_all("Item", filters={"name": ("in", list(components)), "is_stock_item": 1}, pluck="name")
+		if components
+		else []
+	)
+
+	bin_qty = get_bin_qty_by_item([*stock_items, *components], warehouse)
+	reserved_qty = get_pos_reserved_qty_by_item([*stock_items, *bundles], warehouse)
+
+	availability = {item_code: (0, False) for item_code in non_stock_items}
+	for item_code in stock_items:
+		availability[item_code] = (bin_qty.get(item_code, 0) - reserved_qty.get(item_code, 0), True)
+
+	for bundle, rows in bundles.items():
+		bundle_bin_qty = 1000000
+		for row in rows:
+			max_available_bundles = bin_qty.get(row.item_code, 0) / row.qty
+			if bundle_bin_qty > max_available_bundles and row.item_code in stock_components:
+				bundle_bin_qty = max_available_bundles
+
+		availability[bundle] = (bundle_bin_qty - reserved_qty.get(bundle, 0), True)
+
+	return availability
+
+
+def get_bin_qty_by_item(item_codes, warehouse):
+	if not item_codes:
+		return {}
+
+	return {
+		row.item_code: row.actual_qty or 0
+		for row in frappe.get_all(
+			"Bin",
+			filters={"item_code": ("in", item_codes), "warehouse": warehouse},
+			fields=["item_code", "actual_qty"],
+		)
+	}
+
+
+def get_pos_reserved_qty_by_item(item_codes, warehouse):
+	"""`get_pos_reserved_qty` of many items at once, by item code"""
+	reserved_qty = {}
+	if not item_codes:
+		return reserved_qty
+
+	p_inv = frappe.qb.DocType("POS Invoice")
+	for child_table in ("POS Invoice Item", "Packed Item"):
+		p_item = frappe.qb.DocType(child_table)
+		qty_column = "qty" if child_table == "Packed Item" else "stock_qty"
+
+		rows = (
+			frappe.qb.from_(p_inv)
+			.from_(p_item)
+			.select(p_item.item_code, Sum(p_item[qty_column]).as_("stock_qty"))
+			.where(
+				(p_inv.name == p_item.parent)
+				& (IfNull(p_inv.consolidated_invoice, "") == "")
+				& (p_item.docstatus == 1)
+				& (p_item.item_code.isin(item_codes))
+				& (p_item.warehouse == warehouse)
+			)
+			.groupby(p_item.item_code)
+		).run(as_dict=True)
+
+		for row in rows:
+			reserved_qty[row.item_code] = reserved_qty.get(row.item_code, 0) + flt(row.stock_qty)
+
+	return reserved_qty
+
+
 @frappe.whitelist()
 def make_sales_return(source_name, target_doc=None):
 	from nexa.controllers.sales_and_purchase_return import make_return_doc
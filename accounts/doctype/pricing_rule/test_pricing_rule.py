@@ -1521,6 +1521,35 @@ class TestPricingRule(IntegrationTestCase):
 		debit_note.delete()
 		pi.cancel()
 
+	def test_pricing_rule_index_follows_rule_changes(self):
+		from nexa.accounts.doctype.pricing_rule.utils import _get_pricing_rules, get_pricing_rule_index
+
+		args = frappe._dict(
+			{
+				"item_code": "_Test Item",
+				"company": "_Test Company",
+				"customer": "_Test Customer",
+				"transaction_type": "selling",
+				"doctype": "Sales Order",
+				"price_list": "_Test Price List",
+			}
+		)
+
+		def get_matching_rules():
+			index = get_pricing_rule_index(args.company)
+			return [d.name for d in _get_pricing_rules("Item Code", args, index)]
+
+		high_priority_rule = make_pricing_rule(selling=1, priority=2, title="_Test Pricing Rule 2")
+		low_priority_rule = make_pricing_rule(selling=1, priority=1, title="_Test Pricing Rule 1")
+		self.assertEqual(get_matching_rules(), [high_priority_rule.name, low_priority_rule.name])
+
+		high_priority_rule.disable = 1
+		high_priority_rule.save()
+		self.assertEqual(get_matching_rules(), [low_priority_rule.name])
+
+		low_priority_rule.db_set("customer", "_Test Customer 1")
+		self.assertEqual(get_matching_rules(), [])
+
 
 EXTRA_TEST_RECORD_DEPENDENCIES = ["UTM Campaign"]
 
@@ -10,6 +10,7 @@ import math
 
 import frappe
 from frappe import _, bold
+from frappe.query_builder.functions import Count, IfNull, Max
 from frappe.utils import cint, flt, fmt_money, get_link_to_form, getdate, today
 
 from nexa.setup.doctype.item_group.item_group import get_child_item_groups
@@ -23,16 +24,32 @@ class MultiplePricingRuleConflict(frappe.ValidationError):
 
 apply_on_table = {"Item Code": "items", "Item Group": "item_groups", "Brand": "brands"}
 
+# unused indexes are dropped after a day, the key changes whenever a Pricing Rule does
+PRICING_RULE_INDEX_EXPIRY = 86400
+
+SELLING_DOCTYPES = (
+	"Quotation",
+	"Quotation Item",
+	"Sales Order",
+	"Sales Order Item",
+	"Delivery Note",
+	"Delivery Note Item",
+	"Sales Invoice",
+	"Sales Invoice Item",
+	"POS Invoice",
+	"POS Invoice Item",
+)
+
 
 def get_pricing_rules(args, doc=None):
 	pricing_rules = []
-	values = {}
 
 	if not frappe.db.count("Pricing Rule", cache=True):
 		return
 
+	index = get_pricing_rule_index(args.get("company"))
 	for apply_on in ["Item Code", "Item Group", "Brand"]:
-		pricing_rules.extend(_get_pricing_rules(apply_on, args, values))
+		pricing_rules.extend(_get_pricing_rules(apply_on, args, index))
 		if pricing_rules and pricing_rules[0].has_priority:
 			continue
 
@@ -99,78 +116,155 @@ def filter_pricing_rule_based_on_condition(pricing_rules, doc=None):
 	return filtered_pricing_rules
 
 
-def _get_pricing_rules(apply_on, args, values):
+def get_pricing_rule_index(company=None):
+	"""
+	Enabled Pricing Rules of the company, and those without one, along with the item codes,
+	item groups and brands they apply on. The index is cached till a Pricing Rule changes.
+	"""
+	pricing_rule = frappe.qb.DocType("Pricing Rule")
+	count, last_modified = (
+		frappe.qb.from_(pricing_rule).select(Count("*"), Max(pricing_rule.modified)).run()[0]
+	)
+
+	key = f"pricing_rule_index::{company or ''}::{count}::{last_modified}"
+	index = frappe.cache.get_value(key)
+	if index is None:
+		index = build_pricing_rule_index(company)
+		frappe.cache.set_value(key, index, expires_in_sec=PRICING_RULE_INDEX_EXPIRY)
+
+	return index
+
+
+def build_pricing_rule_index(company=None):
+	pricing_rule = frappe.qb.DocType("Pricing Rule")
+	company_condition = IfNull(pricing_rule.company, "").isin([company or "", ""])
+
+	rules = (
+		frappe.qb.from_(pricing_rule)
+		.select("*")
+		.where((pricing_rule.disable == 0) & company_condition)
+		.run(as_dict=True)
+	)
+
+	index = frappe._dict(rules={d.name: d for d in rules})
+	for apply_on in ["Item Code", "Item Group", "Brand"]:
+		apply_on_field = frappe.scrub(apply_on)
+		child_doc = frappe.qb.DocType(f"Pricing Rule {apply_on}")
+
+		children = (
+			frappe.qb.from_(child_doc)
+			.inner_join(pricing_rule)
+			.on(child_doc.parent == pricing_rule.name)
+			.select(child_doc.name, child_doc.parent, child_doc[apply_on_field], child_doc.uom)
+			.where((child_doc.parenttype == "Pricing Rule") & (pricing_rule.disable == 0) & company_condition)
+			.run(as_dict=True)
+		)
+
+		# rows by the value they apply on, and by the Pricing Rule they belong to
+		index[apply_on_field] = frappe._dict(by_value={}, by_rule={})
+		for row in children:
+			index[apply_on_field].by_value.setdefault(row[apply_on_field] or "", []).append(row)
+			index[apply_on_field].by_rule.setdefault(row.parent, []).append(row)
+
+		# rules applied on other items through `apply_rule_on_other`, by the value they apply on
+		index[apply_on_field].by_other_value = {}
+		for rule in rules:
+			if rule.apply_rule_on_other is not None and rule.get(f"other_{apply_on_field}"):
+				index[apply_on_field].by_other_value.setdefault(
+					rule.get(f"other_{apply_on_field}"), []
+				).append(rule.name)
+
+	return index
+
+
+def _get_pricing_rules(apply_on, args, index):
 	apply_on_field = frappe.scrub(apply_on)
 
 	if not args.get(apply_on_field):
 		return []
 
-	child_doc = f"`tabPricing Rule {apply_on}`"
+	rows = index[apply_on_field]
+	values = [args.get(apply_on_field)]
+	variant_of = None
 
-	conditions = item_variant_condition = item_conditions = ""
-	values[apply_on_field] = args.get(apply_on_field)
-	if apply_on_field in ["item_code", "brand"]:
-		item_conditions = f"{child_doc}.{apply_on_field}= %({apply_on_field})s"
-
-		if apply_on_field == "item_code":
-			if args.get("uom", None):
-				item_conditions += (
-					" and ({child_doc}.uom={item_uom} or IFNULL({child_doc}.uom, '')='')".format(
-						child_doc=child_doc, item_uom=frappe.db.escape(args.get("uom"))
-					)
-				)
-			if "variant_of" not in args:
-				args.variant_of = frappe.get_cached_value("Item", args.item_code, "variant_of")
+	if apply_on_field == "item_code":
+		if "variant_of" not in args:
+			args.variant_of = frappe.get_cached_value("Item", args.item_code, "variant_of")
 
-			if args.variant_of:
-				item_variant_condition = f" or {child_doc}.item_code=%(variant_of)s "
-				values["variant_of"] = args.variant_of
+		variant_of = args.variant_of
 	elif apply_on_field == "item_group":
-		item_conditions = _get_tree_conditions(args, "Item Group", child_doc, False)
-		if args.get("uom", None):
-			item_conditions += " and ({child_doc}.uom={item_uom} or IFNULL({child_doc}.uom, '')='')".format(
-				child_doc=child_doc, item_uom=frappe.db.escape(args.get("uom"))
-			)
+		values = _get_parent_groups(args, "Item Group")
 
-	conditions += get_other_conditions(conditions, values, args)
-	warehouse_conditions = _get_tree_conditions(args, "Warehouse", "`tabPricing Rule`")
-	if warehouse_conditions:
-		warehouse_conditions = f" and {warehouse_conditions}"
+	candidates = [row for value in values for row in rows.by_value.get(value, [])]
+	if variant_of:
+		candidates += rows.by_value.get(variant_of, [])
+
+	rules_on_other = set(rows.by_other_value.get(args.get(apply_on_field), []))
+	for name in rules_on_other:
+		candidates += rows.by_rule.get(name, [])
 
 	if not args.price_list:
 		args.price_list = None
 
-	conditions += " and ifnull(`tabPricing Rule`.for_price_list, '') in (%(price_list)s, '')"
-	values["price_list"] = args.get("price_list")
-
-	pricing_rules = (
-		frappe.db.sql(
-			"""select `tabPricing Rule`.*,
-			{child_doc}.{apply_on_field}, {child_doc}.uom
-		from `tabPricing Rule`, {child_doc}
-		where ({item_conditions} or (`tabPricing Rule`.apply_rule_on_other is not null
-			and `tabPricing Rule`.{apply_on_other_field}=%({apply_on_field})s) {item_variant_condition})
-			and {child_doc}.parent = `tabPricing Rule`.name
-			and `tabPricing Rule`.disable = 0 and
-			`tabPricing Rule`.{transaction_type} = 1 {warehouse_cond} {conditions}
-		order by `tabPricing Rule`.priority desc,
-			`tabPricing Rule`.name desc""".format(
-				child_doc=child_doc,
-				apply_on_field=apply_on_field,
-				item_conditions=item_conditions,
-				item_variant_condition=item_variant_condition,
-				transaction_type=args.transaction_type,
-				warehouse_cond=warehouse_conditions,
-				apply_on_other_field=f"other_{apply_on_field}",
-				conditions=conditions,
-			),
-			values,
-			as_dict=1,
+	pricing_rules = []
+	matched_rows = set()
+	for row in candidates:
+		if row.name in matched_rows:
+			continue
+
+		matched_rows.add(row.name)
+		item_matches = (row[apply_on_field] or "") in values and (
+			apply_on_field == "brand" or not args.get("uom") or (row.uom or "") in (args.get("uom"), "")
 		)
-		or []
-	)
 
-	return pricing_rules
+		if not (
+			item_matches
+			or row.parent in rules_on_other
+			or (variant_of and apply_on_field == "item_code" and row.item_code == variant_of)
+		):
+			continue
+
+		rule = index.rules[row.parent]
+		if not is_pricing_rule_applicable(rule, args):
+			continue
+
+		pricing_rules.append(frappe._dict(rule, **{apply_on_field: row[apply_on_field], "uom": row.uom}))
+
+	return sorted(pricing_rules, key=lambda d: (d.priority or "", d.name), reverse=True)
+
+
+def is_pricing_rule_applicable(rule, args):
+	"""Whether the rule applies to the transaction, evaluated like `get_other_conditions`"""
+	if not cint(rule.get(args.transaction_type)):
+		return False
+
+	if args.get("doctype") in SELLING_DOCTYPES:
+		if not cint(rule.selling):
+			return False
+	elif not cint(rule.buying):
+		return False
+
+	for field in ["company", "customer", "supplier", "campaign", "sales_partner"]:
+		if (rule.get(field) or "") not in (args.get(field) or "", ""):
+			return False
+
+	for parenttype in ["Customer Group", "Territory", "Supplier Group", "Warehouse"]:
+		field = frappe.scrub(parenttype)
+		if not rule.get(field):
+			continue
+
+		if not args.get(field) or rule.get(field) not in _get_parent_groups(args, parenttype):
+			return False
+
+	if args.get("transaction_date"):
+		transaction_date = getdate(args.get("transaction_date"))
+		if rule.valid_from and getdate(rule.valid_from) > transaction_date:
+			return False
+
+		if rule.valid_upto and getdate(rule.valid_upto) < transaction_date:
+			return False
+
+	return (rule.for_price_list or "") in (args.get("price_list") or "", "")
 
 
 def apply_multiple_pricing_rules(pricing_rules):
@@ -191,29 +285,7 @@ def _get_tree_conditions(args, parenttype, table, allow_blank=True):
 		if key in frappe.flags.tree_conditions:
 			return frappe.flags.tree_conditions[key]
 
-		try:
-			lft, rgt = frappe.db.get_value(parenttype, args.get(field), ["lft", "rgt"])
-		except TypeError:
-			frappe.throw(_("Invalid {0}").format(args.get(field)))
-
-		parent_groups = frappe.db.sql_list(
-			"""select name from `tab{}`
-			where lft<={} and rgt>={}""".format(parenttype, "%s", "%s"),
-			(lft, rgt),
-		)
-
-		if parenttype in ["Customer Group", "Item Group", "Territory"]:
-			parent_field = f"parent_{frappe.scrub(parenttype)}"
-			root_name = frappe.db.get_list(
-				parenttype,
-				{"is_group": 1, parent_field: ("is", "not set")},
-				"name",
-				as_list=1,
-				ignore_permissions=True,
-			)
-
-			if root_name and root_name[0][0]:
-				parent_groups.append(root_name[0][0])
+		parent_groups = list(_get_parent_groups(args, parenttype))
 
 		if parent_groups:
 			if allow_blank:
@@ -230,6 +302,44 @@ def _get_tree_conditions(args, parenttype, table, allow_blank=True):
 	return condition
 
 
+def _get_parent_groups(args, parenttype):
+	"""The node set in `args` with its ancestors, and the root of the tree for group trees"""
+	field = frappe.scrub(parenttype)
+	if not frappe.flags.tree_parent_groups:
+		frappe.flags.tree_parent_groups = {}
+
+	key = (parenttype, args.get(field))
+	if key in frappe.flags.tree_parent_groups:
+		return frappe.flags.tree_parent_groups[key]
+
+	try:
+		lft, rgt = frappe.db.get_value(parenttype, args.get(field), ["lft", "rgt"])
+	except TypeError:
+		frappe.throw(_("Invalid {0}").format(args.get(field)))
+
+	parent_groups = frappe.db.sql_list(
+		"""select name from `tab{}`
+		where lft<={} and rgt>={}""".format(parenttype, "%s", "%s"),
+		(lft, rgt),
+	)
+
+	if parenttype in ["Customer Group", "Item Group", "Territory"]:
+		parent_field = f"parent_{frappe.scrub(parenttype)}"
+		root_name = frappe.db.get_list(
+			parenttype,
+			{"is_group": 1, parent_field: ("is", "not set")},
+			"name",
+			as_list=1,
+			ignore_permissions=True,
+		)
+
+		if root_name and root_name[0][0]:
+			parent_groups.append(root_name[0][0])
+
+	frappe.flags.tree_parent_groups[key] = tuple(parent_groups)
+	return frappe.flags.tree_parent_groups[key]
+
+
 def get_other_conditions(conditions, values, args):
 	for field in ["company", "customer", "supplier", "campaign", "sales_partner"]:
 		if args.get(field):
@@ -248,18 +358,7 @@ def get_other_conditions(conditions, values, args):
 			and ifnull(`tabPricing Rule`.valid_upto, '2500-12-31')"""
 		values["transaction_date"] = args.get("transaction_date")
 
-	if args.get("doctype") in [
-		"Quotation",
-		"Quotation Item",
-		"Sales Order",
-		"Sales Order Item",
-		"Delivery Note",
-		"Delivery Note Item",
-		"Sales Invoice",
-		"Sales Invoice Item",
-		"POS Invoice",
-		"POS Invoice Item",
-	]:
+	if args.get("doctype") in SELLING_DOCTYPES:
 		conditions += """ and ifnull(`tabPricing Rule`.selling, 0) = 1"""
 	else:
 		conditions += """ and ifnull(`tabPricing Rule`.buying, 0) = 1"""
@@ -9,6 +9,9 @@ from frappe.model.document import Document
 from frappe.utils import get_link_to_form
 from frappe.utils.scheduler import is_scheduler_inactive
 
+# Payments/Journals whose allocations are reconciled by a single background job
+RECONCILE_REFERENCES_PER_JOB = 100
+
 
 class ProcessPaymentReconciliation(Document):
 	# begin: auto-generated types
@@ -388,59 +391,79 @@ def fetch_and_allocate(doc: str) -> None:
 					)
 
 
+def get_reconcile_progress(log: str) -> tuple:
+	return frappe.get_all(
+		"Process Payment Reconciliation Log",
+		filters={"name": log},
+		fields=["reconciled_entries", "total_allocations"],
+		as_list=1,
+		limit=1,
+	)[0]
+
+
+def reconcile_allocations_of_reference(pr, log: str, allocations: list) -> None:
+	"""Reconcile the allocations of a single Payment/Journal and record them as reconciled in the log"""
+	pr.set("allocation", [])
+	for x in allocations:
+		pr.append("allocation", x)
+
+	# reconcile
+	pr.reconcile_allocations(skip_ref_details_update_for_pe=True)
+
+	# If Payment Entry, update details only for newly linked references
+	# This is for performance
+	if allocations[0].reference_type == "Payment Entry":
+		references = [(x.invoice_type, x.invoice_number) for x in allocations]
+		pe = frappe.get_doc(allocations[0].reference_type, allocations[0].reference_name)
+		pe.flags.ignore_validate_update_after_submit = True
+		pe.set_missing_ref_details(update_ref_details_only_for=references)
+		pe.save()
+
+	# Update reconciled flag
+	allocation_names = [x.name for x in allocations]
+	ppa = qb.DocType("Process Payment Reconciliation Log Allocations")
+	qb.update(ppa).set(ppa.reconciled, True).where(ppa.name.isin(allocation_names)).run()
+
+	# Update reconciled count
+	reconciled_count = frappe.db.count(
+		"Process Payment Reconciliation Log Allocations",
+		filters={"parent": log, "reconciled": True},
+	)
+	frappe.db.set_value("Process Payment Reconciliation Log", log, "reconciled_entries", reconciled_count)
+
+
 def reconcile(doc: None | str = None) -> None:
+	"""
+	Reconcile the allocations of up to `RECONCILE_REFERENCES_PER_JOB` Payments/Journals and
+	enqueue the next job. Progress is committed after every Payment/Journal, so a failure
+	only rolls back the one being reconciled.
+	"""
 	if doc:
 		log = frappe.db.get_value("Process Payment Reconciliation Log", filters={"process_pr": doc})
 		if log:
-			res = frappe.get_all(
-				"Process Payment Reconciliation Log",
-				filters={"name": log},
-				fields=["reconciled_entries", "total_allocations"],
-				as_list=1,
-				limit=1,
-			)
-
-			reconciled_entries, total_allocations = res[0]
+			reconciled_entries, total_allocations = get_reconcile_progress(log)
 			if reconciled_entries != total_allocations:
 				try:
-					# Fetch next allocation
-					allocations = get_next_allocation(log)
-
 					pr = get_pr_instance(doc)
 
-					# pass allocation to PR instance
-					for x in allocations:
-						pr.append("allocation", x)
-
-					# reconcile
-					pr.reconcile_allocations(skip_ref_details_update_for_pe=True)
-
-					# If Payment Entry, update details only for newly linked references
-					# This is for performance
-					if allocations[0].reference_type == "Payment Entry":
-						references = [(x.invoice_type, x.invoice_number) for x in allocations]
-						pe = frappe.get_doc(allocations[0].reference_type, allocations[0].reference_name)
-						pe.flags.ignore_validate_update_after_submit = True
-						pe.set_missing_ref_details(update_ref_details_only_for=references)
-						pe.save()
-
-					# Update reconciled flag
-					allocation_names = [x.name for x in allocations]
-					ppa = qb.DocType("Process Payment Reconciliation Log Allocations")
-					qb.update(ppa).set(ppa.reconciled, True).where(ppa.name.isin(allocation_names)).run()
-
-					# Update reconciled count
-					reconciled_count = frappe.db.count(
-						"Process Payment Reconciliation Log Allocations",
-						filters={"parent": log, "reconciled": True},
-					)
-					frappe.db.set_value(
-						"Process Payment Reconciliation Log", log, "reconciled_entries", reconciled_count
-					)
+					for _idx in range(RECONCILE_REFERENCES_PER_JOB):
+						# Fetch next allocation
+						allocations = get_next_allocation(log)
+						if not allocations:
+							break
+
+						reconcile_allocations_of_reference(pr, log, allocations)
+
+						if not frappe.in_test:
+							frappe.db.commit()  # nosemgrep
+
+						if frappe.db.get_value("Process Payment Reconciliation", doc, "status") == "Paused":
+							break
 
 				except Exception:
 					# Update the parent doc about the exception
 					frappe.db.rollback()
+					reconciled_entries, total_allocations = get_reconcile_progress(log)
 
 					traceback = frappe.get_traceback(with_context=True)
 					if traceback:
@@ -471,6 +494,7 @@ def reconcile(doc: None | str = None) -> None:
 							"Failed",
 						)
 				finally:
+					reconciled_entries, total_allocations = get_reconcile_progress(log)
 					if reconciled_entries == total_allocations:
 						frappe.db.set_value("Process Payment Reconciliation Log", log, "status", "Reconciled")
 						frappe.db.set_value("Process Payment Reconciliation Log", log, "reconciled", True)
@@ -1,9 +1,98 @@
 # Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests import IntegrationTestCase
+from frappe.utils import nowdate
+
+from nexa.accounts.doctype.payment_entry.test_payment_entry import create_payment_entry
+from nexa.accounts.doctype.payment_reconciliation.test_payment_reconciliation import make_customer
+from nexa.accounts.doctype.process_payment_reconciliation import process_payment_reconciliation
+from nexa.accounts.doctype.process_payment_reconciliation.process_payment_reconciliation import (
+	fetch_and_allocate,
+	get_reconciled_count,
+	reconcile,
+	reconcile_based_on_filters,
+)
+from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
 
 
 class TestProcessPaymentReconciliation(IntegrationTestCase):
-	pass
+	def setUp(self):
+		self.customer = make_customer("_Test Process PR Customer")
+
+	def create_sales_invoice(self, rate):
+		return create_sales_invoice(customer=self.customer, rate=rate)
+
+	def create_payment_entry(self, amount):
+		return create_payment_entry(
+			payment_type="Receive",
+			party_type="Customer",
+			party=self.customer,
+			paid_from="Debtors - _TC",
+			paid_to="_Test Bank - _TC",
+			paid_amount=amount,
+			save=True,
+			submit=True,
+		)
+
+	def create_process_payment_reconciliation(self):
+		ppr = frappe.get_doc(
+			{
+				"doctype": "Process Payment Reconciliation",
+				"company": "_Test Company",
+				"party_type": "Customer",
+				"party": self.customer,
+				"receivable_payable_account": "Debtors - _TC",
+				"default_advance_account": "Debtors - _TC",
+				"from_invoice_date": nowdate(),
+				"to_invoice_date": nowdate(),
+				"from_payment_date": nowdate(),
+				"to_payment_date": nowdate(),
+			}
+		).submit()
+
+		# background jobs are not run in tests, so each step is run here
+		reconcile_based_on_filters(ppr.name)
+		fetch_and_allocate(ppr.name)
+		return ppr
+
+	def get_status(self, ppr):
+		return frappe.db.get_value("Process Payment Reconciliation", ppr.name, "status")
+
+	def test_reconcile_resumes_after_partial_job(self):
+		invoices = [self.create_sales_invoice(rate=100) for _i in range(2)]
+		for _i in range(2):
+			self.create_payment_entry(amount=100)
+
+		ppr = self.create_process_payment_reconciliation()
+		self.assertEqual(get_reconciled_count(ppr.name), {"processed": 0, "total": 2})
+
+		with patch.object(process_payment_reconciliation, "RECONCILE_REFERENCES_PER_JOB", 1):
+			reconcile(ppr.name)
+			self.assertEqual(get_reconciled_count(ppr.name), {"processed": 1, "total": 2})
+			self.assertNotEqual(self.get_status(ppr), "Completed")
+
+			# the next job continues from the allocations not reconciled yet
+			reconcile(ppr.name)
+
+		self.assertEqual(get_reconciled_count(ppr.name), {"processed": 2, "total": 2})
+		self.assertEqual(self.get_status(ppr), "Completed")
+		for si in invoices:
+			self.assertEqual(frappe.db.get_value("Sales Invoice", si.name, "outstanding_amount"), 0)
+
+	def test_two_payments_against_one_invoice(self):
+		si = self.create_sales_invoice(rate=100)
+		self.create_payment_entry(amount=40)
+		self.create_payment_entry(amount=60)
+
+		ppr = self.create_process_payment_reconciliation()
+		self.assertEqual(get_reconciled_count(ppr.name), {"processed": 0, "total": 2})
+
+		reconcile(ppr.name)
+
+		self.assertEqual(get_reconciled_count(ppr.name), {"processed": 2, "total": 2})
+		self.assertEqual(self.get_status(ppr), "Completed")
+		self.assertEqual(frappe.db.get_value("Sales Invoice", si.name, "outstanding_amount"), 0)
@@ -0,0 +1,66 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from nexa.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from nexa.accounts.doctype.voucher_outstanding import voucher_outstanding
+from nexa.accounts.doctype.voucher_outstanding.voucher_outstanding import get_party_outstanding
+from nexa.accounts.utils import get_outstanding_invoices
+
+
+class TestVoucherOutstanding(IntegrationTestCase):
+	def get_outstanding(self, voucher_no):
+		return frappe.db.get_value("Voucher Outstanding", {"voucher_no": voucher_no}, "outstanding")
+
+	@IntegrationTestCase.change_settings("Accounts Settings", {"maintain_voucher_outstanding": 1})
+	def test_outstanding_follows_payments_and_cancellations(self):
+		self.assertTrue(frappe.db.get_single_value("Accounts Settings", "voucher_outstanding_built_on"))
+
+		si = create_sales_invoice(rate=100)
+		self.assertEqual(self.get_outstanding(si.name), 100)
+
+		pe = get_payment_entry("Sales Invoice", si.name, party_amount=40, bank_account="_Test Bank - _TC")
+		pe.reference_no = "1"
+		pe.reference_date = si.posting_date
+		pe.submit()
+		self.assertEqual(self.get_outstanding(si.name), 60)
+
+		invoices = get_outstanding_invoices("Customer", si.customer, [si.debit_to])
+		self.assertIn(si.name, [d.voucher_no for d in invoices])
+		self.assertEqual(
+			get_party_outstanding("Customer", si.customer, si.company),
+			frappe.db.sql(
+				"""select sum(debit) - sum(credit) from `tabGL Entry`
+				where party_type = 'Customer' and party = %s and company = %s and is_cancelled = 0""",
+				(si.customer, si.company),
+			)[0][0],
+		)
+
+		pe.cancel()
+		self.assertEqual(self.get_outstanding(si.name), 100)
+
+		si.reload()
+		si.cancel()
+		self.assertIsNone(self.get_outstanding(si.name))
+
+	@IntegrationTestCase.change_settings("Accounts Settings", {"maintain_voucher_outstanding": 1})
+	def test_rebuild_locks_out_refreshes(self):
+		# refreshes share the lock till they commit, the rebuild waits for them before reading the ledger
+		with patch.object(
+			voucher_outstanding,
+			"lock_voucher_outstanding",
+			wraps=voucher_outstanding.lock_voucher_outstanding,
+		) as lock_voucher_outstanding:
+			si = create_sales_invoice(rate=100)
+			lock_voucher_outstanding.assert_called_with(shared=True)
+
+			lock_voucher_outstanding.reset_mock()
+			voucher_outstanding.rebuild_voucher_outstanding()
+			lock_voucher_outstanding.assert_called_once_with()
+
+		self.assertEqual(self.get_outstanding(si.name), 100)
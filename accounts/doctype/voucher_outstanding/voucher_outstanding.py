@@ -0,0 +1,225 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Sum
+from frappe.utils import cint, cstr, now
+from frappe.utils.background_jobs import enqueue
+
+
+class VoucherOutstanding(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		account_type: DF.Literal["Receivable", "Payable"]
+		company: DF.Link | None
+		outstanding: DF.Currency
+		outstanding_in_account_currency: DF.Currency
+		party: DF.DynamicLink | None
+		party_type: DF.Link | None
+		voucher_no: DF.DynamicLink | None
+		voucher_type: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+VOUCHER_OUTSTANDING_KEY_FIELDS = (
+	"company",
+	"account",
+	"account_type",
+	"party_type",
+	"party",
+	"voucher_type",
+	"voucher_no",
+	"account_currency",
+)
+
+
+def on_doctype_update():
+	frappe.db.add_index("Voucher Outstanding", ["company", "party_type", "party"])
+	frappe.db.add_index("Voucher Outstanding", ["voucher_no", "voucher_type"])
+
+
+def is_voucher_outstanding_maintained():
+	return cint(frappe.db.get_single_value("Accounts Settings", "maintain_voucher_outstanding"))
+
+
+def is_voucher_outstanding_ready():
+	"""Outstanding amounts can be read from Voucher Outstanding only once it has been built"""
+	return bool(
+		is_voucher_outstanding_maintained()
+		and frappe.db.get_single_value("Accounts Settings", "voucher_outstanding_built_on")
+	)
+
+
+def lock_voucher_outstanding(shared=False):
+	"""
+	Read the maintain setting with a shared or an exclusive lock on it. Refreshes share the lock
+	till they commit, a rebuild takes it exclusively so that it neither runs along with them nor
+	reads the ledger before they are committed.
+	"""
+	if shared:
+		lock = "for share" if frappe.db.db_type == "postgres" else "lock in share mode"
+	else:
+		lock = "for update"
+
+	maintained = frappe.db.sql(
+		f"""select value from `tabSingles`
+		where doctype = 'Accounts Settings' and field = 'maintain_voucher_outstanding' {lock}"""
+	)
+	return cint(maintained[0][0]) if maintained else 0
+
+
+def refresh_voucher_outstanding(vouchers):
+	"""
+	Compute the outstanding of `vouchers`, a list of (voucher type, voucher no), from the
+	Payment Ledger again. Settled vouchers are removed.
+	"""
+	if not lock_voucher_outstanding(shared=True):
+		return
+
+	voucher_nos_by_type = {}
+	for voucher_type, voucher_no in vouchers:
+		if voucher_type and voucher_no:
+			voucher_nos_by_type.setdefault(voucher_type, set()).add(voucher_no)
+
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	for voucher_type, voucher_nos in voucher_nos_by_type.items():
+		frappe.db.delete(
+			"Voucher Outstanding", {"voucher_type": voucher_type, "voucher_no": ("in", list(voucher_nos))}
+		)
+		insert_voucher_outstanding(
+			(ple.against_voucher_type == voucher_type) & (ple.against_voucher_no.isin(list(voucher_nos)))
+		)
+
+
+def insert_voucher_outstanding(condition=None):
+	"""Aggregate Payment Ledger Entries, matching `condition` if set, into outstanding per voucher"""
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	group_by_fields = [
+		ple.company,
+		ple.account,
+		ple.account_type,
+		ple.party_type,
+		ple.party,
+		ple.against_voucher_type,
+		ple.against_voucher_no,
+		ple.account_currency,
+	]
+
+	query = (
+		frappe.qb.from_(ple)
+		.select(
+			*group_by_fields,
+			Sum(ple.amount).as_("outstanding"),
+			Sum(ple.amount_in_account_currency).as_("outstanding_in_account_currency"),
+		)
+		.where(ple.delinked == 0)
+		.groupby(*group_by_fields)
+		.having((Sum(ple.amount) != 0) | (Sum(ple.amount_in_account_currency) != 0))
+	)
+
+	if condition:
+		query = query.where(condition)
+
+	timestamp = now()
+	fields = ["name", "creation", "modified", "owner", "modified_by", *VOUCHER_OUTSTANDING_KEY_FIELDS]
+	fields += ["outstanding", "outstanding_in_account_currency"]
+
+	values = []
+	for row in query.run():
+		key = row[: len(VOUCHER_OUTSTANDING_KEY_FIELDS)]
+		name = hashlib.sha256(cstr(key).encode()).hexdigest()
+		values.append((name, timestamp, timestamp, frappe.session.user, frappe.session.user, *row))
+
+	frappe.db.bulk_insert("Voucher Outstanding", fields, values, chunk_size=1000)
+
+
+def rebuild_voucher_outstanding():
+	"""Drop all outstanding amounts and aggregate the whole Payment Ledger again"""
+	# the ledger is read in a transaction started after the lock is granted, so it includes
+	# the entries of refreshes committed while waiting for it
+	if not frappe.in_test:
+		frappe.db.commit()  # nosemgrep
+
+	if not lock_voucher_outstanding():
+		return
+
+	frappe.db.delete("Voucher Outstanding")
+	insert_voucher_outstanding()
+	frappe.db.set_single_value("Accounts Settings", "voucher_outstanding_built_on", now())
+
+
+def enqueue_rebuild_voucher_outstanding():
+	enqueue(
+		rebuild_voucher_outstanding,
+		queue="long",
+		timeout=7200,
+		job_id="rebuild_voucher_outstanding",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		now=frappe.in_test,
+	)
+
+
+def get_vouchers_with_outstanding_query(company=None):
+	"""Query selecting the numbers of the vouchers which are not settled yet"""
+	voucher_outstanding = frappe.qb.DocType("Voucher Outstanding")
+	query = frappe.qb.from_(voucher_outstanding).select(voucher_outstanding.voucher_no)
+
+	if company:
+		query = query.where(voucher_outstanding.company == company)
+
+	return query
+
+
+def get_outstanding_vouchers(party_type, party, accounts, account_type):
+	"""Vouchers of the party with a positive outstanding in account currency, i.e. unpaid invoices"""
+	filters = {
+		"party_type": party_type,
+		"party": party,
+		"account_type": account_type,
+		"outstanding_in_account_currency": (">", 0),
+	}
+	if accounts:
+		filters["account"] = ("in", accounts)
+
+	return frappe.get_all(
+		"Voucher Outstanding", filters=filters, fields=["voucher_type", "voucher_no"], distinct=True
+	)
+
+
+def get_party_outstanding(party_type, party, company):
+	"""Outstanding of the party in company currency, as the sum of debit less credit in the GL"""
+	voucher_outstanding = frappe.qb.DocType("Voucher Outstanding")
+	# Payment Ledger amounts of payable accounts are credit less debit
+	signed_outstanding = (
+		Case()
+		.when(voucher_outstanding.account_type == "Payable", -voucher_outstanding.outstanding)
+		.else_(voucher_outstanding.outstanding)
+	)
+
+	outstanding = (
+		frappe.qb.from_(voucher_outstanding)
+		.select(Sum(signed_outstanding))
+		.where(
+			(voucher_outstanding.company == company)
+			& (voucher_outstanding.party_type == party_type)
+			& (voucher_outstanding.party == party)
+		)
+		.run()
+	)
+
+	return outstanding[0][0] if outstanding else 0
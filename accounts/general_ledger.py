@@ -12,6 +12,9 @@ from frappe.utils.caching import request_cache
 from frappe.utils.dashboard import cache_source
 
 import nexa
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	update_account_balance_rollup,
+)
 from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
@@ -20,7 +23,17 @@ from nexa.accounts.doctype.accounting_dimension_filter.accounting_dimension_filt
 )
 from nexa.accounts.doctype.accounting_period.accounting_period import ClosedAccountingPeriod
 from nexa.accounts.doctype.budget.budget import validate_expense_against_budget
-from nexa.accounts.utils import create_payment_ledger_entry, is_immutable_ledger_enabled
+from nexa.accounts.doctype.gl_entry.gl_entry import (
+	update_outstanding_amt,
+	validate_balance_type,
+	validate_frozen_account,
+)
+from nexa.accounts.utils import (
+	LEDGER_BULK_INSERT_THRESHOLD,
+	create_payment_ledger_entry,
+	insert_ledger_entries_in_bulk,
+	is_immutable_ledger_enabled,
+)
 from nexa.controllers.budget_controller import BudgetValidation
 from nexa.exceptions import InvalidAccountDimensionError, MandatoryAccountDimensionError
 
@@ -181,60 +194,79 @@ def validate_accounting_period(gl_map):
 
 
 def process_gl_map(gl_map, merge_entries=True, precision=None, from_repost=False):
+	"""
+	Distribute entries as per cost center allocation, merge similar entries and toggle
+	negative amounts in a single pass over the GL map.
+	"""
 	if not gl_map:
 		return []
 
-	if gl_map[0].voucher_type != "Period Closing Voucher":
-		gl_map = distribute_gl_based_on_cost_center_allocation(gl_map, precision, from_repost)
+	if not precision:
+		precision = get_gl_precision(gl_map[0].company)
 
-	if merge_entries:
-		gl_map = merge_similar_entries(gl_map, precision)
+	allocate_cost_center = gl_map[0].voucher_type != "Period Closing Voucher"
+	if allocate_cost_center:
+		round_off_account = frappe.get_cached_value("Company", gl_map[0].company, "round_off_account")
 
-	gl_map = toggle_debit_credit_if_negative(gl_map)
+	merge_properties = get_merge_properties(get_accounting_dimensions()) if merge_entries else None
+	merged_gl_map, merged_entries = [], {}
 
-	return gl_map
+	for d in gl_map:
+		if allocate_cost_center:
+			entries = get_cost_center_allocated_entries(
+				d, gl_map[0], round_off_account, precision, from_repost
+			)
+		else:
+			entries = (d,)
 
+		for entry in entries:
+			if merge_entries:
+				merge_entry(entry, merged_gl_map, merged_entries, merge_properties)
+			else:
+				merged_gl_map.append(entry)
 
-def distribute_gl_based_on_cost_center_allocation(gl_map, precision=None, from_repost=False):
-	round_off_account, default_currency = frappe.get_cached_value(
-		"Company", gl_map[0].company, ["round_off_account", "default_currency"]
-	)
-	if not precision:
-		precision = get_field_precision(
-			frappe.get_meta("GL Entry").get_field("debit"),
-			currency=default_currency,
-		)
+	processed_gl_map = []
+	for entry in merged_gl_map:
+		if merge_entries and is_zero_value_entry(entry, precision):
+			continue
 
-	new_gl_map = []
-	for d in gl_map:
-		cost_center = d.get("cost_center")
+		toggle_debit_credit_of_entry(entry)
+		processed_gl_map.append(entry)
 
-		# Validate budget against main cost center
-		if not from_repost:
-			validate_expense_against_budget(
-				d, expense_amount=flt(d.debit, precision) - flt(d.credit, precision)
-			)
+	return processed_gl_map
 
-		cost_center_allocation = get_cost_center_allocation_data(
-			gl_map[0]["company"], gl_map[0]["posting_date"], cost_center
-		)
-		if not cost_center_allocation:
-			new_gl_map.append(d)
-			continue
 
-		if d.account == round_off_account:
-			d.cost_center = cost_center_allocation[0][0]
-			new_gl_map.append(d)
-			continue
+def get_gl_precision(company=None):
+	company_currency = nexa.get_company_currency(company or nexa.get_default_company())
+	return get_field_precision(frappe.get_meta("GL Entry").get_field("debit"), company_currency)
 
-		for sub_cost_center, percentage in cost_center_allocation:
-			gle = copy.deepcopy(d)
-			gle.cost_center = sub_cost_center
-			for field in ("debit", "credit", "debit_in_account_currency", "credit_in_account_currency"):
-				gle[field] = flt(flt(d.get(field)) * percentage / 100, precision)
-			new_gl_map.append(gle)
 
-	return new_gl_map
+def get_cost_center_allocated_entries(d, first_entry, round_off_account, precision, from_repost=False):
+	cost_center = d.get("cost_center")
+
+	# Validate budget against main cost center
+	if not from_repost:
+		validate_expense_against_budget(d, expense_amount=flt(d.debit, precision) - flt(d.credit, precision))
+
+	cost_center_allocation = get_cost_center_allocation_data(
+		first_entry["company"], first_entry["posting_date"], cost_center
+	)
+	if not cost_center_allocation:
+		return (d,)
+
+	if d.account == round_off_account:
+		d.cost_center = cost_center_allocation[0][0]
+		return (d,)
+
+	entries = []
+	for sub_cost_center, percentage in cost_center_allocation:
+		gle = copy.deepcopy(d)
+		gle.cost_center = sub_cost_center
+		for field in ("debit", "credit", "debit_in_account_currency", "credit_in_account_currency"):
+			gle[field] = flt(flt(d.get(field)) * percentage / 100, precision)
+		entries.append(gle)
+
+	return entries
 
 
 @request_cache
@@ -265,57 +297,55 @@ def get_cost_center_allocation_data(company, posting_date, cost_center):
 
 
 def merge_similar_entries(gl_map, precision=None):
-	merged_gl_map = []
-	accounting_dimensions = get_accounting_dimensions()
-	merge_properties = get_merge_properties(accounting_dimensions)
+	merged_gl_map, merged_entries = [], {}
+	merge_properties = get_merge_properties(get_accounting_dimensions())
 
 	for entry in gl_map:
-		if entry._skip_merge:
-			merged_gl_map.append(entry)
-			continue
-
-		entry.merge_key = get_merge_key(entry, merge_properties)
-		# if there is already an entry in this account then just add it
-		# to that entry
-		same_head = check_if_in_list(entry, merged_gl_map)
-		if same_head:
-			same_head.debit = flt(same_head.debit) + flt(entry.debit)
-			same_head.debit_in_account_currency = flt(same_head.debit_in_account_currency) + flt(
-				entry.debit_in_account_currency
-			)
-			same_head.debit_in_transaction_currency = flt(same_head.debit_in_transaction_currency) + flt(
-				entry.debit_in_transaction_currency
-			)
-			same_head.credit = flt(same_head.credit) + flt(entry.credit)
-			same_head.credit_in_account_currency = flt(same_head.credit_in_account_currency) + flt(
-				entry.credit_in_account_currency
-			)
-			same_head.credit_in_transaction_currency = flt(same_head.credit_in_transaction_currency) + flt(
-				entry.credit_in_transaction_currency
-			)
-		else:
-			merged_gl_map.append(entry)
-
-	company = gl_map[0].company if gl_map else nexa.get_default_company()
-	company_currency = nexa.get_company_currency(company)
+		merge_entry(entry, merged_gl_map, merged_entries, merge_properties)
 
 	if not precision:
-		precision = get_field_precision(frappe.get_meta("GL Entry").get_field("debit"), company_currency)
+		precision = get_gl_precision(gl_map[0].company if gl_map else None)
 
 	# filter zero debit and credit entries
-	merged_gl_map = filter(
-		lambda x: flt(x.debit, precision) != 0
-		or flt(x.credit, precision) != 0
-		or (
-			x.voucher_type == "Journal Entry"
-			and frappe.get_cached_value("Journal Entry", x.voucher_no, "voucher_type")
+	return [entry for entry in merged_gl_map if not is_zero_value_entry(entry, precision)]
+
+
+def merge_entry(entry, merged_gl_map, merged_entries, merge_properties):
+	"""Add the entry to an already merged entry with the same merge key, else append it"""
+	if entry._skip_merge:
+		merged_gl_map.append(entry)
+		return
+
+	entry.merge_key = get_merge_key(entry, merge_properties)
+	same_head = merged_entries.get(entry.merge_key)
+
+	# if there is already an entry in this account then just add it
+	# to that entry
+	if same_head:
+		for field in (
+			"debit",
+			"debit_in_account_currency",
+			"debit_in_transaction_currency",
+			"credit",
+			"credit_in_account_currency",
+			"credit_in_transaction_currency",
+		):
+			same_head[field] = flt(same_head.get(field)) + flt(entry.get(field))
+	else:
+		merged_entries[entry.merge_key] = entry
+		merged_gl_map.append(entry)
+
+
+def is_zero_value_entry(entry, precision):
+	return (
+		flt(entry.debit, precision) == 0
+		and flt(entry.credit, precision) == 0
+		and not (
+			entry.voucher_type == "Journal Entry"
+			and frappe.get_cached_value("Journal Entry", entry.voucher_no, "voucher_type")
 			== "Exchange Gain Or Loss"
-		),
-		merged_gl_map,
+		)
 	)
-	merged_gl_map = list(merged_gl_map)
-
-	return merged_gl_map
 
 
 def get_merge_properties(dimensions=None):
@@ -346,53 +376,51 @@ def get_merge_key(entry, merge_properties):
 	return tuple(merge_key)
 
 
-def check_if_in_list(gle, gl_map):
-	for e in gl_map:
-		if e.merge_key == gle.merge_key:
-			return e
+def toggle_debit_credit_if_negative(gl_map):
+	for entry in gl_map:
+		toggle_debit_credit_of_entry(entry)
+
+	return gl_map
 
 
-def toggle_debit_credit_if_negative(gl_map):
+def toggle_debit_credit_of_entry(entry):
 	debit_credit_field_map = {
 		"debit": "credit",
 		"debit_in_account_currency": "credit_in_account_currency",
 		"debit_in_transaction_currency": "credit_in_transaction_currency",
 	}
 
-	for entry in gl_map:
-		# toggle debit, credit if negative entry
-		for debit_field, credit_field in debit_credit_field_map.items():
-			debit = flt(entry.get(debit_field))
-			credit = flt(entry.get(credit_field))
+	# toggle debit, credit if negative entry
+	for debit_field, credit_field in debit_credit_field_map.items():
+		debit = flt(entry.get(debit_field))
+		credit = flt(entry.get(credit_field))
 
-			if debit < 0 and credit < 0 and debit == credit:
-				debit *= -1
-				credit *= -1
+		if debit < 0 and credit < 0 and debit == credit:
+			debit *= -1
+			credit *= -1
 
-			if debit < 0:
-				credit = credit - debit
-				debit = 0.0
+		if debit < 0:
+			credit = credit - debit
+			debit = 0.0
+
+		if credit < 0:
+			debit = debit - credit
+			credit = 0.0
 
-			if credit < 0:
+		# update net values
+		# In some scenarios net value needs to be shown in the ledger
+		# This method updates net values as debit or credit
+		if entry.post_net_value and debit and credit:
+			if debit > credit:
 				debit = debit - credit
 				credit = 0.0
 
-			# update net values
-			# In some scenarios net value needs to be shown in the ledger
-			# This method updates net values as debit or credit
-			if entry.post_net_value and debit and credit:
-				if debit > credit:
-					debit = debit - credit
-					credit = 0.0
-
-				else:
-					credit = credit - debit
-					debit = 0.0
-
-			entry[debit_field] = debit
-			entry[credit_field] = credit
+			else:
+				credit = credit - debit
+				debit = 0.0
 
-	return gl_map
+		entry[debit_field] = debit
+		entry[credit_field] = credit
 
 
 def save_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
@@ -402,15 +430,19 @@ def save_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
 	process_debit_credit_difference(gl_map)
 
 	dimension_filter_map = get_dimension_filter_map()
-	if gl_map:
-		check_freezing_date(gl_map[0]["posting_date"], adv_adj)
-		is_opening = any(d.get("is_opening") == "Yes" for d in gl_map)
-		if gl_map[0]["voucher_type"] != "Period Closing Voucher":
-			validate_against_pcv(is_opening, gl_map[0]["posting_date"], gl_map[0]["company"])
+	validate_posting_period(gl_map, adv_adj)
 
-	for entry in gl_map:
-		validate_allowed_dimensions(entry, dimension_filter_map)
-		make_entry(entry, adv_adj, update_outstanding, from_repost)
+	if len(gl_map) >= LEDGER_BULK_INSERT_THRESHOLD:
+		gl_entries = make_entries_in_bulk(
+			gl_map, adv_adj, update_outstanding, from_repost, dimension_filter_map
+		)
+	else:
+		gl_entries = []
+		for entry in gl_map:
+			validate_allowed_dimensions(entry, dimension_filter_map)
+			gl_entries.append(make_entry(entry, adv_adj, update_outstanding, from_repost))
+
+	update_account_balance_rollup(gl_entries)
 
 
 def make_entry(args, adv_adj, update_outstanding, from_repost=False):
@@ -426,6 +458,53 @@ def make_entry(args, adv_adj, update_outstanding, from_repost=False):
 	if not from_repost and gle.voucher_type != "Period Closing Voucher":
 		validate_expense_against_budget(args)
 
+	return gle
+
+
+def make_entries_in_bulk(gl_map, adv_adj, update_outstanding, from_repost, dimension_filter_map):
+	"""
+	Validate all rows of a large GL map, insert them with a multi-row insert and run
+	the account level validations and outstanding updates once instead of per row.
+	"""
+	gl_entries = []
+	for args in gl_map:
+		validate_allowed_dimensions(args, dimension_filter_map)
+
+		gle = frappe.new_doc("GL Entry")
+		gle.update(args)
+		gle.flags.from_repost = from_repost
+		gle.flags.adv_adj = adv_adj
+		gle.flags.update_outstanding = update_outstanding or "Yes"
+		gle.run_method("validate")
+
+		if not from_repost and gle.voucher_type != "Period Closing Voucher":
+			gle.validate_account_details(adv_adj)
+			gle.validate_dimensions_for_pl_and_bs()
+
+		gl_entries.append(gle)
+
+	insert_ledger_entries_in_bulk("GL Entry", gl_entries)
+
+	if from_repost or gl_map[0].voucher_type == "Period Closing Voucher":
+		return gl_entries
+
+	for account in {gle.account for gle in gl_entries}:
+		validate_balance_type(account, adv_adj)
+		validate_frozen_account(account, adv_adj)
+
+	vouchers_to_update = {
+		(gle.account, gle.party_type, gle.party, gle.against_voucher_type, gle.against_voucher)
+		for gle in gl_entries
+		if gle.is_outstanding_to_be_updated()
+	}
+	for args in vouchers_to_update:
+		update_outstanding_amt(*args)
+
+	for args in gl_map:
+		validate_expense_against_budget(args)
+
+	return gl_entries
+
 
 def validate_cwip_accounts(gl_map):
 	"""Validate that CWIP account are not used in Journal Entry"""
@@ -717,6 +796,9 @@ def make_reverse_gl_entries(
 					query = query.set(gle.is_cancelled, True)
 
 				query.run()
+
+			if not immutable_ledger_enabled:
+				update_account_balance_rollup(gl_entries, cancel=True)
 		else:
 			if not immutable_ledger_enabled:
 				gle_names = [x.get("name") for x in gl_entries]
@@ -732,6 +814,9 @@ def make_reverse_gl_entries(
 						(now(), frappe.session.user, tuple(gle_names)),
 					)
 
+				update_account_balance_rollup(gl_entries, cancel=True)
+
+		reverse_gl_entries = []
 		for entry in gl_entries:
 			new_gle = copy.deepcopy(entry)
 			new_gle["name"] = None
@@ -758,7 +843,20 @@ def make_reverse_gl_entries(
 				new_gle["posting_date"] = frappe.form_dict.get("posting_date") or getdate()
 
 			if new_gle["debit"] or new_gle["credit"]:
-				make_entry(new_gle, adv_adj, "Yes")
+				reverse_gl_entries.append(make_entry(new_gle, adv_adj, "Yes"))
+
+		update_account_balance_rollup(reverse_gl_entries)
+
+
+def validate_posting_period(gl_map, adv_adj=False):
+	"""Throw if the GL map is posted in a frozen period or one closed by a Period Closing Voucher"""
+	if not gl_map:
+		return
+
+	check_freezing_date(gl_map[0]["posting_date"], adv_adj)
+	is_opening = any(d.get("is_opening") == "Yes" for d in gl_map)
+	if gl_map[0]["voucher_type"] != "Period Closing Voucher":
+		validate_against_pcv(is_opening, gl_map[0]["posting_date"], gl_map[0]["company"])
 
 
 def check_freezing_date(posting_date, adv_adj=False):
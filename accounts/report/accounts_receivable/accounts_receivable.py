@@ -15,6 +15,10 @@ from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
 )
+from nexa.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	get_vouchers_with_outstanding_query,
+	is_voucher_outstanding_ready,
+)
 from nexa.accounts.utils import (
 	build_qb_match_conditions,
 	get_advance_payment_doctypes,
@@ -37,6 +41,8 @@ from nexa.accounts.utils import (
 #  9. Report amounts are in party currency if in_party_currency is selected, otherwise company currency
 # 10. This report is based on Payment Ledger Entries
 
+PAYMENT_TERMS_BATCH_SIZE = 1000
+
 
 def execute(filters=None):
 	args = {
@@ -63,6 +69,7 @@ class ReceivablePayableReport:
 			self.filters.range = "30, 60, 90, 120"
 		self.ranges = [num.strip() for num in self.filters.range.split(",") if num.strip().isdigit()]
 		self.range_numbers = [num for num in range(1, len(self.ranges) + 2)]
+		self.range_days = [cint(days) for days in self.ranges]
 		self.ple_fetch_method = (
 			frappe.get_single_value("Accounts Settings", "receivable_payable_fetch_method")
 			or "Buffered Cursor"
@@ -136,6 +143,9 @@ class ReceivablePayableReport:
 		# Build delivery note map against all sales invoices
 		self.build_delivery_note_map()
 
+		if self.filters.based_on_payment_terms:
+			self.get_payment_terms_map()
+
 		self.build_data()
 
 	def fetch_ple_in_buffered_cursor(self):
@@ -620,25 +630,56 @@ class ReceivablePayableReport:
 
 		row.payment_terms = sorted(row.payment_terms, key=lambda x: x["due_date"])
 
+	def get_payment_terms_map(self):
+		# fetch payment schedules of all the invoices at once instead of querying them row by row
+		self.payment_terms_map = {}
+
+		# settled invoices are never split into terms
+		threshold = 1.0 / 10**self.currency_precision
+		invoices_by_type = {}
+		for row in self.voucher_balance.values():
+			outstanding = flt(row.invoiced - row.paid - row.credit_note, self.currency_precision)
+			outstanding_in_account_currency = flt(
+				row.invoiced_in_account_currency
+				- row.paid_in_account_currency
+				- row.credit_note_in_account_currency,
+				self.currency_precision,
+			)
+			if not self.is_invoice(row) or (
+				abs(outstanding) < threshold and abs(outstanding_in_account_currency) < threshold
+			):
+				continue
+
+			invoices_by_type.setdefault(row.voucher_type, set()).add(row.voucher_no)
+
+		for voucher_type, invoices in invoices_by_type.items():
+			invoices = list(invoices)
+			for i in range(0, len(invoices), PAYMENT_TERMS_BATCH_SIZE):
+				# nosemgrep
+				payment_terms_details = frappe.db.sql(
+					f"""
+					select
+						si.name, si.party_account_currency, si.currency, si.conversion_rate,
+						si.total_advance, ps.due_date, ps.payment_term, ps.payment_amount,
+						ps.base_payment_amount, ps.description, ps.paid_amount, ps.base_paid_amount,
+						ps.discounted_amount
+					from `tab{voucher_type}` si, `tabPayment Schedule` ps
+					where
+						si.name = ps.parent and ps.parenttype = %(voucher_type)s and
+						si.name in %(invoices)s and
+						si.is_return = 0
+					order by si.name, ps.paid_amount desc, due_date
+				""",
+					{"voucher_type": voucher_type, "invoices": invoices[i : i + PAYMENT_TERMS_BATCH_SIZE]},
+					as_dict=1,
+				)
+
+				for d in payment_terms_details:
+					self.payment_terms_map.setdefault((voucher_type, d.name), []).append(d)
+
 	def get_payment_terms(self, row):
 		# build payment_terms for row
-		# nosemgrep
-		payment_terms_details = frappe.db.sql(
-			f"""
-			select
-				si.name, si.party_account_currency, si.currency, si.conversion_rate,
-				si.total_advance, ps.due_date, ps.payment_term, ps.payment_amount, ps.base_payment_amount,
-				ps.description, ps.paid_amount, ps.base_paid_amount, ps.discounted_amount
-			from `tab{row.voucher_type}` si, `tabPayment Schedule` ps
-			where
-				si.name = ps.parent and ps.parenttype = '{row.voucher_type}' and
-				si.name = %s and
-				si.is_return = 0
-			order by ps.paid_amount desc, due_date
-		""",
-			row.voucher_no,
-			as_dict=1,
-		)
+		payment_terms_details = self.payment_terms_map.get((row.voucher_type, row.voucher_no), [])
 
 		original_row = frappe._dict(row)
 		row.payment_terms = []
@@ -651,7 +692,7 @@ class ReceivablePayableReport:
 		# Deduct that from paid amount pre allocation
 		row.paid -= flt(payment_terms_details[0].total_advance)
 
-		company_currency = frappe.get_value("Company", self.filters.get("company"), "default_currency")
+		company_currency = self.company_currency
 
 		# If single payment terms, no need to split the row
 		if len(payment_terms_details) == 1 and payment_terms_details[0].payment_term:
@@ -870,23 +911,23 @@ class ReceivablePayableReport:
 		self.get_ageing_data(entry_date, row)
 
 		# ageing buckets should not have amounts if due date is not reached
-		if getdate(entry_date) > getdate(self.age_as_on):
-			[setattr(row, f"range{i}", 0.0) for i in self.range_numbers]
+		if getdate(entry_date) > self.age_as_on:
+			for i in self.range_numbers:
+				row[f"range{i}"] = 0.0
 
 		row.total_due = sum(row[f"range{i}"] for i in self.range_numbers)
 
 	def get_ageing_data(self, entry_date, row):
 		# [0-30, 30-60, 60-90, 90-120, 120-above]
-		[setattr(row, f"range{i}", 0.0) for i in self.range_numbers]
+		for i in self.range_numbers:
+			row[f"range{i}"] = 0.0
 
 		if not (self.age_as_on and entry_date):
 			return
 
-		row.age = (getdate(self.age_as_on) - getdate(entry_date)).days or 0
+		row.age = (self.age_as_on - getdate(entry_date)).days or 0
 
-		index = next(
-			(i for i, days in enumerate(self.ranges) if cint(row.age) <= cint(days)), len(self.ranges)
-		)
+		index = next((i for i, days in enumerate(self.range_days) if row.age <= days), len(self.range_days))
 		row["range" + str(index + 1)] = row.outstanding
 
 	def prepare_ple_query(self):
@@ -929,6 +970,9 @@ class ReceivablePayableReport:
 			.where(Criterion.any(self.or_filters))
 		)
 
+		if is_voucher_outstanding_ready():
+			query = query.where(self.get_unsettled_vouchers_condition())
+
 		if self.filters.get("show_remarks"):
 			if remarks_length := frappe.get_single_value(
 				"Accounts Settings", "receivable_payable_remarks_length"
@@ -947,6 +991,25 @@ class ReceivablePayableReport:
 
 		self.ple_query = query
 
+	def get_unsettled_vouchers_condition(self):
+		"""
+		A voucher settled today, with nothing posted against it after the report date, was
+		settled on the report date as well. Ledger entries against such vouchers are skipped.
+		"""
+		later_ple = qb.DocType("Payment Ledger Entry").as_("later_ple")
+		posted_later = (
+			qb.from_(later_ple)
+			.select(later_ple.against_voucher_no)
+			.where((later_ple.delinked == 0) & (later_ple.posting_date > self.filters.report_date))
+		)
+
+		if self.filters.company:
+			posted_later = posted_later.where(later_ple.company == self.filters.company)
+
+		return self.ple.against_voucher_no.isin(
+			get_vouchers_with_outstanding_query(self.filters.company)
+		) | self.ple.against_voucher_no.isin(posted_later)
+
 	def get_sales_invoices_or_customers_based_on_sales_person(self):
 		if self.filters.get("sales_person"):
 			lft, rgt = frappe.db.get_value("Sales Person", self.filters.get("sales_person"), ["lft", "rgt"])
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import frappe
 from frappe import qb
 from frappe.tests import IntegrationTestCase
@@ -5,6 +7,7 @@ from frappe.utils import add_days, flt, getdate, today
 
 from nexa.accounts.doctype.payment_entry.payment_entry import get_payment_entry
 from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from nexa.accounts.report.accounts_receivable import accounts_receivable
 from nexa.accounts.report.accounts_receivable.accounts_receivable import execute
 from nexa.accounts.test.accounts_mixin import AccountsTestMixin
 from nexa.selling.doctype.sales_order.test_sales_order import make_sales_order
@@ -199,6 +202,35 @@ class TestAccountsReceivable(AccountsTestMixin, IntegrationTestCase):
 		row = report[1]
 		self.assertTrue(len(row) == 0)
 
+	def test_payment_terms_fetched_once_for_all_invoices(self):
+		filters = {
+			"company": self.company,
+			"based_on_payment_terms": 1,
+			"report_date": today(),
+			"range": "30, 60, 90, 120",
+		}
+
+		invoices = [self.create_sales_invoice() for _ in range(3)]
+
+		def get_payment_schedule_queries():
+			with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+				report = execute(filters)
+
+			queries = [call for call in sql.call_args_list if "tabPayment Schedule" in str(call.args[0])]
+			return report, len(queries)
+
+		report, queries = get_payment_schedule_queries()
+		self.assertEqual(queries, 1)
+
+		# one query per batch of invoices
+		with patch.object(accounts_receivable, "PAYMENT_TERMS_BATCH_SIZE", 2):
+			self.assertEqual(get_payment_schedule_queries()[1], 2)
+
+		for si in invoices:
+			rows = [row for row in report[1] if row.voucher_no == si.name]
+			self.assertEqual([row.invoiced for row in rows], [30, 50, 20])
+			self.assertEqual([row.outstanding for row in rows], [30, 50, 20])
+
 	def test_accounts_receivable_with_partial_payment(self):
 		filters = {
 			"company": self.company,
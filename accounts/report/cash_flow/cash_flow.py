@@ -1,26 +1,26 @@
 # Copyright (c) 2013, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
-
-from datetime import timedelta
-
 import frappe
 from frappe import _
-from frappe.query_builder import DocType
 from frappe.utils import cstr, flt
-from pypika import Order
 
+from nexa.accounts.doctype.account_closing_balance.account_closing_balance import get_opening_balances
+from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
+	get_accounting_dimensions,
+	get_dimension_with_children,
+)
 from nexa.accounts.report.financial_statements import (
 	get_columns,
 	get_cost_centers_with_children,
 	get_data,
 	get_filtered_list_for_consolidated_report,
 	get_period_list,
-	set_gl_entries_by_account,
 )
 from nexa.accounts.report.profit_and_loss_statement.profit_and_loss_statement import (
 	get_net_profit_loss,
 )
+from nexa.accounts.report.utils import convert_to_presentation_currency, get_currency
 from nexa.accounts.utils import get_fiscal_year
 
 
@@ -303,29 +303,35 @@ def show_opening_and_closing_balance(out, period_list, currency, net_change_in_c
 
 
 def get_opening_balance(company, period_list, filters):
-	from copy import deepcopy
-
 	cash_value = {}
 	account_types = get_cash_flow_accounts()
 	net_profit_loss = 0.0
 
-	local_filters = deepcopy(filters)
-	local_filters.start_date, local_filters.end_date = get_opening_range_using_fiscal_year(
-		company, period_list
+	account_type_map = frappe._dict(
+		frappe.get_all("Account", filters={"company": company}, fields=["name", "account_type"], as_list=True)
 	)
 
+	# balances before the report period, read from the last Account Closing Balance onwards
+	finance_books, dimension_filters = get_opening_balance_filters(company, filters)
+	gl_sum_by_account_type = {}
+	for balance in get_opening_balances(
+		company, period_list[0]["from_date"], finance_books=finance_books, dimension_filters=dimension_filters
+	):
+		if not balance.is_period_closing_voucher_entry:
+			account_type = account_type_map.get(balance.account)
+			gl_sum_by_account_type.setdefault(account_type, 0.0)
+			gl_sum_by_account_type[account_type] += flt(balance.credit) - flt(balance.debit)
+
 	for section in account_types:
 		section_name = section.get("section_name")
 		cash_value.setdefault(section_name, 0.0)
 
 		if section_name == "Operations":
-			net_profit_loss += get_net_income(company, period_list, local_filters)
+			net_profit_loss += get_net_income(company, period_list, filters)
 
 		for account in section.get("account_types", []):
 			account_type = account.get("account_type")
-			local_filters.account_type = account_type
-
-			amount = get_account_type_based_gl_data(company, local_filters) or 0.0
+			amount = gl_sum_by_account_type.get(account_type, 0.0)
 
 			if account_type == "Depreciation":
 				cash_value[section_name] += amount * -1
@@ -336,70 +342,68 @@ def get_opening_balance(company, period_list, filters):
 
 
 def get_net_income(company, period_list, filters):
-	gl_entries_by_account_for_income, gl_entries_by_account_for_expense = {}, {}
 	income, expense = 0.0, 0.0
-	from_date, to_date = get_opening_range_using_fiscal_year(company, period_list)
-
-	for root_type in ["Income", "Expense"]:
-		for root in frappe.db.sql(
-			"""select lft, rgt from tabAccount
-				where root_type=%s and ifnull(parent_account, '') = ''""",
-			root_type,
-			as_dict=1,
-		):
-			set_gl_entries_by_account(
-				company,
-				from_date,
-				to_date,
-				filters,
-				gl_entries_by_account_for_income
-				if root_type == "Income"
-				else gl_entries_by_account_for_expense,
-				root.lft,
-				root.rgt,
-				root_type=root_type,
-				ignore_closing_entries=True,
-			)
+	root_type_map = frappe._dict(
+		frappe.get_all(
+			"Account",
+			filters={"company": company, "root_type": ("in", ["Income", "Expense"])},
+			fields=["name", "root_type"],
+			as_list=True,
+		)
+	)
+
+	finance_books, dimension_filters = get_opening_balance_filters(company, filters, with_dimensions=True)
+	balances = [
+		balance
+		for balance in get_opening_balances(
+			company,
+			period_list[0]["from_date"],
+			finance_books=finance_books,
+			dimension_filters=dimension_filters,
+		)
+		if balance.account in root_type_map and not balance.is_period_closing_voucher_entry
+	]
 
-	for entries in gl_entries_by_account_for_income.values():
-		for entry in entries:
-			if entry.posting_date <= to_date:
-				amount = (entry.debit - entry.credit) * -1
-				income = flt((income + amount), 2)
+	if filters.get("presentation_currency"):
+		convert_to_presentation_currency(balances, get_currency(filters))
 
-	for entries in gl_entries_by_account_for_expense.values():
-		for entry in entries:
-			if entry.posting_date <= to_date:
-				amount = entry.debit - entry.credit
-				expense = flt((expense + amount), 2)
+	for balance in balances:
+		if root_type_map[balance.account] == "Income":
+			amount = (balance.debit - balance.credit) * -1
+			income = flt((income + amount), 2)
+		else:
+			amount = balance.debit - balance.credit
+			expense = flt((expense + amount), 2)
 
 	return income - expense
 
 
-def get_opening_range_using_fiscal_year(company, period_list):
-	first_from_date = period_list[0]["from_date"]
-	previous_day = first_from_date - timedelta(days=1)
+def get_opening_balance_filters(company, filters, with_dimensions=False):
+	"""Finance Books and dimension values to filter the opening balances on, like the report periods"""
+	finance_books = [cstr(filters.finance_book)]
+	if filters.include_default_book_entries:
+		finance_books.append(cstr(frappe.get_cached_value("Company", company, "default_finance_book")))
+
+	dimension_filters = {}
+	if filters.get("cost_center"):
+		dimension_filters["cost_center"] = get_cost_centers_with_children(filters.cost_center)
 
-	# Get the earliest fiscal year for the company
+	if not with_dimensions:
+		return finance_books, dimension_filters
 
-	FiscalYear = DocType("Fiscal Year")
-	FiscalYearCompany = DocType("Fiscal Year Company")
+	if filters.get("project"):
+		project = filters.project
+		dimension_filters["project"] = project if isinstance(project, list) else frappe.parse_json(project)
 
-	earliest_fy = (
-		frappe.qb.from_(FiscalYear)
-		.join(FiscalYearCompany)
-		.on(FiscalYearCompany.parent == FiscalYear.name)
-		.select(FiscalYear.year_start_date)
-		.where(FiscalYearCompany.company == company)
-		.orderby(FiscalYear.year_start_date, order=Order.asc)
-		.limit(1)
-	).run(as_dict=True)
+	for dimension in get_accounting_dimensions(as_list=False):
+		if filters.get(dimension.fieldname):
+			values = filters.get(dimension.fieldname)
+			if frappe.get_cached_value("DocType", dimension.document_type, "is_tree"):
+				values = get_dimension_with_children(dimension.document_type, values)
 
-	if not earliest_fy:
-		frappe.throw(_("Not able to find the earliest Fiscal Year for the given company."))
+			dimension_filters[dimension.fieldname] = values
 
-	company_start_date = earliest_fy[0]["year_start_date"]
-	return company_start_date, previous_day
+	return finance_books, dimension_filters
 
 
 def get_report_summary(summary_data, currency):
@@ -3,13 +3,15 @@
 
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import frappe
 from frappe import _
 from frappe.query_builder import Criterion
-from frappe.utils import flt, getdate
+from frappe.utils import add_days, flt, getdate
 
 import nexa
+from nexa.accounts.doctype.account_closing_balance.account_closing_balance import get_opening_balances
 from nexa.accounts.report.balance_sheet.balance_sheet import (
 	get_chart_data,
 	get_provisional_profit_loss,
@@ -40,6 +42,8 @@ from nexa.accounts.report.profit_and_loss_statement.profit_and_loss_statement im
 from nexa.accounts.report.utils import convert, convert_to_presentation_currency
 from nexa.accounts.utils import get_zero_cutoff
 
+MAX_CONSOLIDATION_WORKERS = 8
+
 
 def execute(filters=None):
 	columns, data, message, chart = [], [], [], []
@@ -336,26 +340,28 @@ def get_data(companies, root_type, balance_must_be, fiscal_year, filters=None, i
 
 	filters.end_date = end_date
 
-	gl_entries_by_account = {}
-	for root in frappe.db.sql(
-		"""select lft, rgt from tabAccount
-			where root_type=%s and ifnull(parent_account, '') = ''""",
-		root_type,
-		as_dict=1,
-	):
-		set_gl_entries_by_account(
-			start_date,
-			end_date,
-			root.lft,
-			root.rgt,
-			filters,
-			gl_entries_by_account,
-			accounts_by_name,
-			accounts,
-			ignore_closing_entries=ignore_closing_entries,
-			root_type=root_type,
+	# balance sheet balances before the period are read from the last Account Closing Balance onwards
+	opening_date = None
+	if filters.report == "Balance Sheet":
+		opening_date = (
+			fiscal_year.year_start_date
+			if filters.filter_based_on == "Fiscal Year"
+			else filters.period_start_date
 		)
 
+	gl_entries_by_account = {}
+	set_gl_entries_by_account(
+		start_date,
+		end_date,
+		filters,
+		gl_entries_by_account,
+		accounts_by_name,
+		accounts,
+		ignore_closing_entries=ignore_closing_entries,
+		root_type=root_type,
+		opening_date=opening_date,
+	)
+
 	calculate_values(accounts_by_name, gl_entries_by_account, companies, filters, fiscal_year)
 	accumulate_values_into_parents(accounts, accounts_by_name, companies)
 
@@ -581,16 +587,20 @@ def prepare_data(accounts, start_date, end_date, balance_must_be, companies, com
 def set_gl_entries_by_account(
 	from_date,
 	to_date,
-	root_lft,
-	root_rgt,
 	filters,
 	gl_entries_by_account,
 	accounts_by_name,
 	accounts,
 	ignore_closing_entries=False,
 	root_type=None,
+	opening_date=None,
 ):
-	"""Returns a dict like { "account": [gl entries], ... }"""
+	"""
+	Returns a dict like { "account": [gl entries], ... }
+
+	If `opening_date` is set, balances before it are returned as a single entry per
+	account dated the day before, and only later GL Entries are read.
+	"""
 
 	company_lft, company_rgt = frappe.get_cached_value("Company", filters.get("company"), ["lft", "rgt"])
 
@@ -604,47 +614,25 @@ def set_gl_entries_by_account(
 		as_dict=1,
 	)
 
+	args = frappe._dict(
+		{
+			"from_date": from_date,
+			"to_date": to_date,
+			"root_type": root_type,
+			"ignore_closing_entries": ignore_closing_entries,
+			"opening_date": opening_date,
+			"finance_book": filters.get("finance_book"),
+			"include_default_book_entries": filters.get("include_default_book_entries"),
+		}
+	)
+	gl_entries_by_company = get_gl_entries_by_company([d.name for d in companies], args)
+
 	currency_info = frappe._dict(
 		{"report_date": to_date, "presentation_currency": filters.get("presentation_currency")}
 	)
 
 	for d in companies:
-		gle = frappe.qb.DocType("GL Entry")
-		account = frappe.qb.DocType("Account")
-		query = (
-			frappe.qb.from_(gle)
-			.inner_join(account)
-			.on(account.name == gle.account)
-			.select(
-				gle.posting_date,
-				gle.account,
-				gle.debit,
-				gle.credit,
-				gle.is_opening,
-				gle.company,
-				gle.fiscal_year,
-				gle.debit_in_account_currency,
-				gle.credit_in_account_currency,
-				gle.account_currency,
-				account.account_name,
-				account.account_number,
-			)
-			.where(
-				(gle.company == d.name)
-				& (gle.is_cancelled == 0)
-				& (gle.posting_date <= to_date)
-				& (account.lft >= root_lft)
-				& (account.rgt <= root_rgt)
-			)
-			.orderby(gle.account, gle.posting_date)
-		)
-
-		if root_type:
-			query = query.where(account.root_type == root_type)
-		additional_conditions = get_additional_conditions(from_date, ignore_closing_entries, filters, d)
-		if additional_conditions:
-			query = query.where(Criterion.all(additional_conditions))
-		gl_entries = query.run(as_dict=True)
+		gl_entries = gl_entries_by_company[d.name]
 
 		if filters and filters.get("presentation_currency") != d.default_currency:
 			currency_info["company"] = d.name
@@ -663,6 +651,122 @@ def set_gl_entries_by_account(
 	return gl_entries_by_account
 
 
+def get_gl_entries_by_company(companies, args):
+	"""
+	Returns a dict like { "company": [gl entries], ... } in the currency of each company.
+
+	Companies don't depend on each other, so they are read concurrently, each worker with
+	its own database connection. Tests read uncommitted data, so they are read in turn.
+	"""
+	if len(companies) < 2 or frappe.in_test:
+		return {company: get_company_gl_entries(company, args) for company in companies}
+
+	site, sites_path, user = frappe.local.site, frappe.local.sites_path, frappe.session.user
+
+	def get_entries_in_worker(company):
+		frappe.init(site, sites_path=sites_path)
+		try:
+			frappe.connect()
+			frappe.set_user(user)
+			return get_company_gl_entries(company, args)
+		finally:
+			frappe.destroy()
+
+	with ThreadPoolExecutor(max_workers=min(len(companies), MAX_CONSOLIDATION_WORKERS)) as executor:
+		return dict(zip(companies, executor.map(get_entries_in_worker, companies), strict=True))
+
+
+def get_company_gl_entries(company, args):
+	"""GL Entries of `company` for the period"""
+	gl_entries = []
+	if args.opening_date and not args.from_date:
+		gl_entries = get_opening_entries(company, args)
+
+	gle = frappe.qb.DocType("GL Entry")
+	account = frappe.qb.DocType("Account")
+	query = (
+		frappe.qb.from_(gle)
+		.inner_join(account)
+		.on(account.name == gle.account)
+		.select(
+			gle.posting_date,
+			gle.account,
+			gle.debit,
+			gle.credit,
+			gle.is_opening,
+			gle.company,
+			gle.fiscal_year,
+			gle.debit_in_account_currency,
+			gle.credit_in_account_currency,
+			gle.account_currency,
+			account.account_name,
+			account.account_number,
+		)
+		.where((gle.company == company) & (gle.is_cancelled == 0) & (gle.posting_date <= args.to_date))
+		.orderby(gle.account, gle.posting_date)
+	)
+
+	if args.root_type:
+		query = query.where(account.root_type == args.root_type)
+	additional_conditions = get_additional_conditions(
+		args.from_date or args.opening_date, args.ignore_closing_entries, args, company
+	)
+	if additional_conditions:
+		query = query.where(Criterion.all(additional_conditions))
+	gl_entries += query.run(as_dict=True)
+
+	return gl_entries
+
+
+def get_opening_entries(company, args):
+	account_filters = {"company": company}
+	if args.root_type:
+		account_filters["root_type"] = args.root_type
+
+	accounts = {
+		account.name: account
+		for account in frappe.get_all(
+			"Account", filters=account_filters, fields=["name", "account_name", "account_number"]
+		)
+	}
+
+	finance_books = [args.finance_book]
+	if args.include_default_book_entries:
+		finance_books.append(frappe.get_cached_value("Company", company, "default_finance_book"))
+
+	opening_entries = []
+	posting_date = add_days(args.opening_date, -1)
+	for balance in get_opening_balances(
+		company, args.opening_date, finance_books=[fb for fb in finance_books if fb]
+	):
+		if balance.account not in accounts:
+			continue
+
+		if args.ignore_closing_entries and balance.is_period_closing_voucher_entry:
+			continue
+
+		opening_entries.append(
+			frappe._dict(
+				{
+					"posting_date": getdate(posting_date),
+					"account": balance.account,
+					"debit": balance.debit,
+					"credit": balance.credit,
+					"is_opening": "No",
+					"company": company,
+					"fiscal_year": None,
+					"debit_in_account_currency": balance.debit_in_account_currency,
+					"credit_in_account_currency": balance.credit_in_account_currency,
+					"account_currency": balance.account_currency,
+					"account_name": accounts[balance.account].account_name,
+					"account_number": accounts[balance.account].account_number,
+				}
+			)
+		)
+
+	return opening_entries
+
+
 def get_account_details(account):
 	return frappe.get_cached_value(
 		"Account",
@@ -715,7 +819,7 @@ def validate_entries(key, entry, accounts_by_name, accounts):
 		accounts.insert(idx + 1, args)
 
 
-def get_additional_conditions(from_date, ignore_closing_entries, filters, d):
+def get_additional_conditions(from_date, ignore_closing_entries, filters, company):
 	gle = frappe.qb.DocType("GL Entry")
 	additional_conditions = []
 
@@ -731,7 +835,7 @@ def get_additional_conditions(from_date, ignore_closing_entries, filters, d):
 		finance_books.append(filter_fb)
 
 	if filters.get("include_default_book_entries"):
-		if company_fb := frappe.get_cached_value("Company", d.name, "default_finance_book"):
+		if company_fb := frappe.get_cached_value("Company", company, "default_finance_book"):
 			finance_books.append(company_fb)
 
 		additional_conditions.append((gle.finance_book.isin(finance_books)) | gle.finance_book.isnull())
@@ -0,0 +1,51 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import today
+
+from nexa.accounts.report.consolidated_financial_statement import consolidated_financial_statement
+from nexa.accounts.report.consolidated_financial_statement.consolidated_financial_statement import (
+	get_gl_entries_by_company,
+)
+from nexa.accounts.utils import get_fiscal_year
+
+COMPANIES = ["_Test Company", "_Test Company 1"]
+
+
+class TestConsolidatedFinancialStatement(IntegrationTestCase):
+	def test_companies_read_concurrently(self):
+		_fiscal_year, from_date, to_date = get_fiscal_year(today(), company="_Test Company")
+		args = frappe._dict(
+			{
+				"from_date": from_date,
+				"to_date": to_date,
+				"root_type": None,
+				"ignore_closing_entries": 0,
+				"opening_date": None,
+				"finance_book": None,
+				"include_default_book_entries": 1,
+			}
+		)
+
+		# workers have their own connections and only see committed entries, so nothing is posted here
+		gl_entries_in_turn = get_gl_entries_by_company(COMPANIES, args)
+
+		with (
+			patch.object(frappe, "in_test", False),
+			patch.object(
+				consolidated_financial_statement,
+				"get_company_gl_entries",
+				wraps=consolidated_financial_statement.get_company_gl_entries,
+			) as get_company_gl_entries,
+		):
+			gl_entries_concurrently = get_gl_entries_by_company(COMPANIES, args)
+
+		self.assertEqual(get_company_gl_entries.call_count, len(COMPANIES))
+		self.assertEqual(gl_entries_concurrently, gl_entries_in_turn)
+
+		# workers tear down their own site context only
+		self.assertTrue(frappe.db.exists("Company", "_Test Company"))
@@ -13,6 +13,13 @@ from frappe.query_builder.functions import Max, Min, Sum
 from frappe.utils import add_days, add_months, cint, cstr, flt, formatdate, get_first_day, getdate
 from pypika.terms import ExistsCriterion
 
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	get_account_balance_rollup_upto,
+	get_rollup_date_ranges,
+)
+from nexa.accounts.doctype.account_closing_balance.account_closing_balance import (
+	get_closing_balance_anchor,
+)
 from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
@@ -442,47 +449,46 @@ def set_gl_entries_by_account(
 	gl_entries = []
 
 	# For balance sheet
-	ignore_closing_balances = frappe.get_single_value("Accounts Settings", "ignore_account_closing_balance")
-	if not from_date and not ignore_closing_balances:
-		last_period_closing_voucher = frappe.db.get_all(
-			"Period Closing Voucher",
-			filters={
-				"docstatus": 1,
-				"company": filters.company,
-				"period_end_date": ("<", filters["period_start_date"]),
-			},
-			fields=["period_end_date", "name"],
-			order_by="period_end_date desc",
-			limit=1,
+	last_period_closing_voucher = None
+	if not from_date:
+		last_period_closing_voucher = get_closing_balance_anchor(
+			filters.company, filters["period_start_date"]
+		)
+
+	if last_period_closing_voucher:
+		gl_entries += get_accounting_entries(
+			"Account Closing Balance",
+			from_date,
+			to_date,
+			filters,
+			root_lft,
+			root_rgt,
+			root_type,
+			ignore_closing_entries,
+			last_period_closing_voucher.name,
+			group_by_account=group_by_account,
+		)
+		from_date = add_days(last_period_closing_voucher.period_end_date, 1)
+		ignore_opening_entries = True
+
+	# daily balances of past days are read from the rollup, only later days from GL Entry
+	rollup_range, gl_range = get_rollup_date_ranges(from_date, to_date, get_account_balance_rollup_upto())
+	for doctype, date_range in (("Account Balance Rollup", rollup_range), ("GL Entry", gl_range)):
+		if not date_range:
+			continue
+
+		gl_entries += get_accounting_entries(
+			doctype,
+			date_range[0],
+			date_range[1],
+			filters,
+			root_lft,
+			root_rgt,
+			root_type,
+			ignore_closing_entries,
+			ignore_opening_entries=ignore_opening_entries,
+			group_by_account=group_by_account,
 		)
-		if last_period_closing_voucher:
-			gl_entries += get_accounting_entries(
-				"Account Closing Balance",
-				from_date,
-				to_date,
-				filters,
-				root_lft,
-				root_rgt,
-				root_type,
-				ignore_closing_entries,
-				last_period_closing_voucher[0].name,
-				group_by_account=group_by_account,
-			)
-			from_date = add_days(last_period_closing_voucher[0].period_end_date, 1)
-			ignore_opening_entries = True
-
-	gl_entries += get_accounting_entries(
-		"GL Entry",
-		from_date,
-		to_date,
-		filters,
-		root_lft,
-		root_rgt,
-		root_type,
-		ignore_closing_entries,
-		ignore_opening_entries=ignore_opening_entries,
-		group_by_account=group_by_account,
-	)
 
 	if filters and filters.get("presentation_currency"):
 		convert_to_presentation_currency(gl_entries, get_currency(filters))
@@ -526,11 +532,13 @@ def get_accounting_entries(
 
 	ignore_is_opening = frappe.get_single_value("Accounts Settings", "ignore_is_opening_check_for_reporting")
 
-	if doctype == "GL Entry":
+	if doctype in ("GL Entry", "Account Balance Rollup"):
 		query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
-		query = query.where(gl_entry.is_cancelled == 0)
 		query = query.where(gl_entry.posting_date <= to_date)
-		query = query.force_index("posting_date_company_index")
+
+		if doctype == "GL Entry":
+			query = query.where(gl_entry.is_cancelled == 0)
+			query = query.force_index("posting_date_company_index")
 
 		if ignore_opening_entries and not ignore_is_opening:
 			query = query.where(gl_entry.is_opening == "No")
@@ -582,7 +590,7 @@ def apply_additional_conditions(doctype, query, from_date, ignore_closing_entrie
 		else:
 			query = query.where(gl_entry.is_period_closing_voucher_entry == 0)
 
-	if from_date and doctype == "GL Entry":
+	if from_date and doctype != "Account Closing Balance":
 		query = query.where(gl_entry.posting_date >= from_date)
 
 	if filters:
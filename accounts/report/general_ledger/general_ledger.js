@@ -225,6 +225,30 @@ frappe.query_reports["General Ledger"] = {
 	],
 	collapsible_filters: true,
 	seperate_check_filters: true,
+	onload: function (report) {
+		report.page.add_menu_item(__("Export in Background"), function () {
+			frappe.prompt(
+				{
+					fieldname: "file_format_type",
+					label: __("File Format"),
+					fieldtype: "Select",
+					options: ["CSV", "Excel"],
+					default: "CSV",
+					reqd: 1,
+				},
+				(values) => {
+					frappe.call({
+						method: "nexa.accounts.report.general_ledger.general_ledger.export_general_ledger",
+						args: {
+							filters: report.get_values(),
+							file_format_type: values.file_format_type,
+						},
+					});
+				},
+				__("Export General Ledger")
+			);
+		});
+	},
 };
 
 nexa.utils.add_dimensions("General Ledger", 15);
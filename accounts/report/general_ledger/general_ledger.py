@@ -2,10 +2,14 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import csv
+
 import frappe
+import openpyxl
 from frappe import _, _dict
+from frappe.desk.doctype.notification_log.notification_log import make_notification_logs
 from frappe.query_builder import Criterion
-from frappe.utils import cstr, getdate
+from frappe.utils import cstr, flt, getdate
 
 from nexa import get_company_currency, get_default_company
 from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
@@ -13,9 +17,16 @@ from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_dimension_with_children,
 )
 from nexa.accounts.report.financial_statements import get_cost_centers_with_children
-from nexa.accounts.report.utils import convert_to_presentation_currency, get_currency
+from nexa.accounts.report.utils import (
+	convert_to_presentation_currency,
+	get_currency,
+	get_presentation_currency_converter,
+)
 from nexa.accounts.utils import get_account_currency
 
+# Categories whose GL Entries can be read group by group, see `get_streamed_result`
+STREAMED_CATEGORIES = ("Categorize by Account", "Categorize by Party")
+
 DEBIT_CREDIT_DICT = {
 	"debit": 0.0,
 	"credit": 0.0,
@@ -30,6 +41,16 @@ def execute(filters=None):
 	if not filters:
 		return [], []
 
+	filters, account_details = prepare_filters(filters)
+
+	columns = get_columns(filters)
+
+	res = get_result(filters, account_details)
+
+	return columns, res
+
+
+def prepare_filters(filters):
 	account_details = {}
 
 	if filters and filters.get("print_in_account_currency") and not filters.get("account"):
@@ -47,11 +68,7 @@ def execute(filters=None):
 
 	filters = set_account_currency(filters)
 
-	columns = get_columns(filters)
-
-	res = get_result(filters, account_details)
-
-	return columns, res
+	return filters, account_details
 
 
 def validate_filters(filters, account_details):
@@ -159,6 +176,26 @@ def get_result(filters, account_details):
 
 def get_gl_entries(filters, accounting_dimensions):
 	currency_map = get_currency(filters)
+
+	gl_entries = frappe.db.sql(
+		get_gl_entries_query(filters, accounting_dimensions),
+		filters,
+		as_dict=1,
+	)
+
+	party_name_map = get_party_name_map()
+
+	for gl_entry in gl_entries:
+		if gl_entry.party_type and gl_entry.party:
+			gl_entry.party_name = party_name_map.get(gl_entry.party_type, {}).get(gl_entry.party)
+
+	if filters.get("presentation_currency"):
+		return convert_to_presentation_currency(gl_entries, currency_map, filters)
+	else:
+		return gl_entries
+
+
+def get_gl_entries_query(filters, accounting_dimensions, conditions=None, order_by_statement=None):
 	select_fields = """, debit, credit, debit_in_account_currency,
 		credit_in_account_currency """
 
@@ -168,20 +205,19 @@ def get_gl_entries(filters, accounting_dimensions):
 		else:
 			select_fields += """,remarks"""
 
-	order_by_statement = "order by posting_date, account, creation"
+	if not order_by_statement:
+		order_by_statement = "order by posting_date, account, creation"
 
-	if filters.get("include_dimensions"):
-		order_by_statement = "order by posting_date, creation"
+		if filters.get("include_dimensions"):
+			order_by_statement = "order by posting_date, creation"
 
-	if filters.get("categorize_by") == "Categorize by Voucher":
-		order_by_statement = "order by posting_date, voucher_type, voucher_no"
-	if filters.get("categorize_by") == "Categorize by Account":
-		order_by_statement = "order by account, posting_date, creation"
+		if filters.get("categorize_by") == "Categorize by Voucher":
+			order_by_statement = "order by posting_date, voucher_type, voucher_no"
+		if filters.get("categorize_by") == "Categorize by Account":
+			order_by_statement = "order by account, posting_date, creation"
 
-	if filters.get("include_default_book_entries"):
-		filters["company_fb"] = frappe.get_cached_value(
-			"Company", filters.get("company"), "default_finance_book"
-		)
+	if conditions is None:
+		conditions = get_conditions(filters)
 
 	dimension_fields = ""
 	if accounting_dimensions:
@@ -193,8 +229,7 @@ def get_gl_entries(filters, accounting_dimensions):
 			"debit_in_transaction_currency, credit_in_transaction_currency, transaction_currency,"
 		)
 
-	gl_entries = frappe.db.sql(
-		f"""
+	return f"""
 		select
 			name as gl_entry, posting_date, account, party_type, party,
 			voucher_type, voucher_subtype, voucher_no, {dimension_fields}
@@ -202,28 +237,19 @@ def get_gl_entries(filters, accounting_dimensions):
 			against_voucher_type, against_voucher, account_currency,
 			against, is_opening, creation {select_fields}
 		from `tabGL Entry`
-		where company=%(company)s {get_conditions(filters)}
+		where company=%(company)s {conditions}
 		{order_by_statement}
-	""",
-		filters,
-		as_dict=1,
-	)
-
-	party_name_map = get_party_name_map()
-
-	for gl_entry in gl_entries:
-		if gl_entry.party_type and gl_entry.party:
-			gl_entry.party_name = party_name_map.get(gl_entry.party_type, {}).get(gl_entry.party)
-
-	if filters.get("presentation_currency"):
-		return convert_to_presentation_currency(gl_entries, currency_map, filters)
-	else:
-		return gl_entries
+	"""
 
 
 def get_conditions(filters):
 	conditions = []
 
+	if filters.get("include_default_book_entries"):
+		filters["company_fb"] = frappe.get_cached_value(
+			"Company", filters.get("company"), "default_finance_book"
+		)
+
 	ignore_is_opening = frappe.get_single_value("Accounts Settings", "ignore_is_opening_check_for_reporting")
 
 	if filters.get("account"):
@@ -622,6 +648,213 @@ def get_result_as_list(data, filters):
 	return data
 
 
+@frappe.whitelist()
+def export_general_ledger(filters, file_format_type="CSV"):
+	"""Export the General Ledger in the background, without loading all GL Entries in memory"""
+	if not frappe.get_cached_doc("Report", "General Ledger").is_permitted():
+		frappe.throw(_("You are not permitted to access the General Ledger report"), frappe.PermissionError)
+
+	filters = frappe._dict(frappe.parse_json(filters))
+	if filters.get("categorize_by") not in STREAMED_CATEGORIES:
+		frappe.throw(
+			_("Only a General Ledger categorized by {0} can be exported in the background").format(
+				_(" or ").join(_(d) for d in STREAMED_CATEGORIES)
+			)
+		)
+
+	frappe.enqueue(
+		build_general_ledger_export,
+		queue="long",
+		timeout=3600,
+		filters=filters,
+		file_format_type=file_format_type,
+		user=frappe.session.user,
+	)
+
+	frappe.msgprint(
+		_("The General Ledger is being exported. You will be notified once the file is ready."),
+		alert=True,
+	)
+
+
+def build_general_ledger_export(filters, file_format_type, user):
+	filters = prepare_filters(filters)[0]
+	columns = [d for d in get_columns(filters) if not d.get("hidden")]
+
+	extension = "xlsx" if file_format_type == "Excel" else "csv"
+	file_name = f"general_ledger_{frappe.generate_hash(length=10)}.{extension}"
+	file_path = frappe.get_site_path("private", "files", file_name)
+
+	header = [d["label"] for d in columns]
+	rows = ([row.get(d["fieldname"]) for d in columns] for row in get_streamed_result(filters))
+
+	if extension == "xlsx":
+		# write only workbooks flush every row to disk as it is appended
+		workbook = openpyxl.Workbook(write_only=True)
+		sheet = workbook.create_sheet(_("General Ledger"))
+		sheet.append(header)
+		for row in rows:
+			sheet.append(row)
+		workbook.save(file_path)
+	else:
+		with open(file_path, "w", newline="") as f:
+			writer = csv.writer(f)
+			writer.writerow(header)
+			writer.writerows(rows)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+
+	make_notification_logs(
+		{
+			"type": "Alert",
+			"subject": _("General Ledger export for {0} is ready").format(filters.company),
+			"document_type": "File",
+			"document_name": file_doc.name,
+		},
+		[user],
+	)
+
+
+def get_streamed_result(filters):
+	"""
+	Yield the report rows of a General Ledger categorized by account or party while the
+	GL Entries are read group by group through an unbuffered cursor. Only the totals of
+	the current group are kept in memory.
+	"""
+	accounting_dimensions = get_accounting_dimensions() if filters.get("include_dimensions") else []
+	group_by = get_group_by_field(filters.get("categorize_by"))
+	labels = get_translated_labels_for_totals()
+	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
+	show_opening_entries = filters.get("show_opening_entries")
+
+	opening_condition = "posting_date < %(from_date)s"
+	if not show_opening_entries:
+		opening_condition = f"({opening_condition} or is_opening = 'Yes')"
+
+	conditions = get_conditions(filters)
+	query = get_gl_entries_query(
+		filters,
+		accounting_dimensions,
+		conditions,
+		f"order by {group_by}, {opening_condition} desc, posting_date, account, creation",
+	)
+
+	# everything the rows need is fetched before the cursor is opened
+	party_name_map = get_party_name_map()
+	supplier_invoice_details = get_supplier_invoice_details()
+	openings = get_openings_by_account_currency(filters, conditions, opening_condition)
+	convert_entry = None
+	if filters.get("presentation_currency"):
+		convert_entry = get_presentation_currency_converter(
+			get_currency(filters), [d.account_currency for d in openings], filters
+		)
+
+	balance = 0.0
+
+	def get_row(row):
+		nonlocal balance
+		if not row.get("posting_date"):
+			balance = 0.0
+
+		balance = get_balance(row, balance, "debit", "credit")
+		row["balance"] = balance
+		row["account_currency"] = filters.account_currency
+		row["presentation_currency"] = filters.presentation_currency
+		return row
+
+	def get_total_row(totals, key):
+		row = _dict(totals[key])
+		row["account"] = labels[key]
+		return get_row(row)
+
+	def get_blank_row():
+		return get_row({"debit_in_transaction_currency": None, "credit_in_transaction_currency": None})
+
+	totals = get_totals_dict()
+	for d in openings:
+		if convert_entry:
+			convert_entry(d)
+		update_totals(totals, ("opening", "closing"), d)
+
+	yield get_total_row(totals, "opening")
+
+	group_by_value, group_totals, has_entries = None, None, False
+	with frappe.db.unbuffered_cursor():
+		for gle in frappe.db.sql(query, filters, as_dict=1, as_iterator=True):
+			if group_totals is None or gle.get(group_by) != group_by_value:
+				if has_entries:
+					yield get_total_row(group_totals, "total")
+					yield get_total_row(group_totals, "closing")
+
+				group_by_value, group_totals, has_entries = gle.get(group_by), get_totals_dict(), False
+
+			if gle.party_type and gle.party:
+				gle.party_name = party_name_map.get(gle.party_type, {}).get(gle.party)
+
+			if convert_entry:
+				convert_entry(gle)
+
+			if gle.posting_date < from_date or (cstr(gle.is_opening) == "Yes" and not show_opening_entries):
+				update_totals(group_totals, ("opening", "closing"), gle)
+
+			elif gle.posting_date <= to_date or (cstr(gle.is_opening) == "Yes" and show_opening_entries):
+				if not has_entries:
+					yield get_blank_row()
+					yield get_total_row(group_totals, "opening")
+					has_entries = True
+
+				update_totals(group_totals, ("total", "closing"), gle)
+				update_totals(totals, ("total", "closing"), gle)
+
+				gle.bill_no = supplier_invoice_details.get(gle.against_voucher, "")
+				gle.voucher_subtype = _(gle.voucher_subtype)
+				gle.against_voucher_type = _(gle.against_voucher_type)
+				gle.remarks = _(gle.remarks)
+				gle.party_type = _(gle.party_type)
+
+				yield get_row(gle)
+
+	if has_entries:
+		yield get_total_row(group_totals, "total")
+		yield get_total_row(group_totals, "closing")
+
+	yield get_blank_row()
+	yield get_total_row(totals, "total")
+	yield get_total_row(totals, "closing")
+
+
+def get_openings_by_account_currency(filters, conditions, opening_condition):
+	"""Opening of all the GL Entries, per account currency so that it can be converted like them"""
+	sum_fields = ", ".join(
+		f"sum(case when {opening_condition} then {field} else 0 end) as {field}"
+		for field in ("debit", "credit", "debit_in_account_currency", "credit_in_account_currency")
+	)
+
+	return frappe.db.sql(
+		f"""
+		select account_currency, {sum_fields}
+		from `tabGL Entry`
+		where company=%(company)s {conditions}
+		group by account_currency
+	""",
+		filters,
+		as_dict=1,
+	)
+
+
+def update_totals(totals, keys, gle):
+	for key in keys:
+		for field in ("debit", "credit", "debit_in_account_currency", "credit_in_account_currency"):
+			totals[key][field] += flt(gle.get(field))
+
+
 def get_supplier_invoice_details():
 	inv_details = {}
 	for d in frappe.db.sql(
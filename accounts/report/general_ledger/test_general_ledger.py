@@ -4,10 +4,14 @@
 import frappe
 from frappe import qb
 from frappe.tests import IntegrationTestCase
-from frappe.utils import flt, today
+from frappe.utils import add_days, flt, today
 
 from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
-from nexa.accounts.report.general_ledger.general_ledger import execute
+from nexa.accounts.report.general_ledger.general_ledger import (
+	execute,
+	get_streamed_result,
+	prepare_filters,
+)
 from nexa.controllers.sales_and_purchase_return import make_return_doc
 
 
@@ -332,3 +336,26 @@ class TestGeneralLedger(IntegrationTestCase):
 		)
 		actual = set([x.voucher_no for x in data if x.voucher_no])
 		self.assertEqual(expected, actual)
+
+	def test_streamed_result_matches_report(self):
+		create_sales_invoice(posting_date=add_days(today(), -5), rate=300)
+		si = create_sales_invoice(posting_date=today(), rate=200)
+		make_return_doc(si.doctype, si.name).submit()
+
+		for categorize_by in ("Categorize by Account", "Categorize by Party"):
+			filters = frappe._dict(
+				{
+					"company": self.company,
+					"from_date": add_days(today(), -1),
+					"to_date": today(),
+					"categorize_by": categorize_by,
+				}
+			)
+			columns, data = execute(frappe._dict(filters))
+			streamed_data = list(get_streamed_result(prepare_filters(frappe._dict(filters))[0]))
+
+			fields = ("account", "voucher_no", "debit", "credit", "balance")
+			self.assertEqual(
+				[tuple(row.get(field) for field in fields) for row in streamed_data],
+				[tuple(row.get(field) for field in fields) for row in data],
+			)
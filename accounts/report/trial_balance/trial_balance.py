@@ -8,6 +8,12 @@ from frappe.query_builder.functions import Sum
 from frappe.utils import add_days, cstr, flt, formatdate, getdate
 
 import nexa
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	get_account_balance_rollup_upto,
+)
+from nexa.accounts.doctype.account_closing_balance.account_closing_balance import (
+	get_closing_balance_anchor,
+)
 from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
@@ -146,18 +152,7 @@ def get_opening_balances(filters, ignore_is_opening):
 def get_rootwise_opening_balances(filters, report_type, ignore_is_opening):
 	gle = []
 
-	last_period_closing_voucher = ""
-	ignore_closing_balances = frappe.get_single_value("Accounts Settings", "ignore_account_closing_balance")
-
-	if not ignore_closing_balances:
-		last_period_closing_voucher = frappe.db.get_all(
-			"Period Closing Voucher",
-			filters={"docstatus": 1, "company": filters.company, "period_end_date": ("<", filters.from_date)},
-			fields=["period_end_date", "name"],
-			order_by="period_end_date desc",
-			limit=1,
-		)
-
+	last_period_closing_voucher = get_closing_balance_anchor(filters.company, filters.from_date)
 	accounting_dimensions = get_accounting_dimensions(as_list=False)
 
 	if last_period_closing_voucher:
@@ -166,15 +161,14 @@ def get_rootwise_opening_balances(filters, report_type, ignore_is_opening):
 			filters,
 			report_type,
 			accounting_dimensions,
-			period_closing_voucher=last_period_closing_voucher[0].name,
+			period_closing_voucher=last_period_closing_voucher.name,
 			ignore_is_opening=ignore_is_opening,
 		)
 
 		# Report getting generate from the mid of a fiscal year
-		if getdate(last_period_closing_voucher[0].period_end_date) < getdate(add_days(filters.from_date, -1)):
-			start_date = add_days(last_period_closing_voucher[0].period_end_date, 1)
-			gle += get_opening_balance(
-				"GL Entry",
+		if getdate(last_period_closing_voucher.period_end_date) < getdate(add_days(filters.from_date, -1)):
+			start_date = add_days(last_period_closing_voucher.period_end_date, 1)
+			gle += get_gl_opening_balance(
 				filters,
 				report_type,
 				accounting_dimensions,
@@ -182,8 +176,8 @@ def get_rootwise_opening_balances(filters, report_type, ignore_is_opening):
 				ignore_is_opening=ignore_is_opening,
 			)
 	else:
-		gle = get_opening_balance(
-			"GL Entry", filters, report_type, accounting_dimensions, ignore_is_opening=ignore_is_opening
+		gle = get_gl_opening_balance(
+			filters, report_type, accounting_dimensions, ignore_is_opening=ignore_is_opening
 		)
 
 	opening = frappe._dict()
@@ -202,6 +196,34 @@ def get_rootwise_opening_balances(filters, report_type, ignore_is_opening):
 	return opening
 
 
+def get_gl_opening_balance(filters, report_type, accounting_dimensions, start_date=None, ignore_is_opening=0):
+	"""Opening balances from GL Entry, reading the days which are rolled up from Account Balance Rollup"""
+	rollup_upto = get_account_balance_rollup_upto()
+	if not rollup_upto:
+		return get_opening_balance(
+			"GL Entry",
+			filters,
+			report_type,
+			accounting_dimensions,
+			start_date=start_date,
+			ignore_is_opening=ignore_is_opening,
+		)
+
+	gle = []
+	for doctype in ("Account Balance Rollup", "GL Entry"):
+		gle += get_opening_balance(
+			doctype,
+			filters,
+			report_type,
+			accounting_dimensions,
+			start_date=start_date,
+			ignore_is_opening=ignore_is_opening,
+			rollup_upto=rollup_upto,
+		)
+
+	return gle
+
+
 def get_opening_balance(
 	doctype,
 	filters,
@@ -210,6 +232,7 @@ def get_opening_balance(
 	period_closing_voucher=None,
 	start_date=None,
 	ignore_is_opening=0,
+	rollup_upto=None,
 ):
 	closing_balance = frappe.qb.DocType(doctype)
 	accounts = frappe.db.get_all("Account", filters={"report_type": report_type}, pluck="name")
@@ -252,18 +275,24 @@ def get_opening_balance(
 	if doctype == "GL Entry":
 		opening_balance = opening_balance.where(closing_balance.is_cancelled == 0)
 
+	if rollup_upto:
+		if doctype == "Account Balance Rollup":
+			opening_balance = opening_balance.where(closing_balance.posting_date < rollup_upto)
+		else:
+			opening_balance = opening_balance.where(closing_balance.posting_date >= rollup_upto)
+
 	if (
 		not filters.show_unclosed_fy_pl_balances
 		and report_type == "Profit and Loss"
-		and doctype == "GL Entry"
+		and doctype != "Account Closing Balance"
 	):
 		opening_balance = opening_balance.where(closing_balance.posting_date >= filters.year_start_date)
 
 	if not flt(filters.with_period_closing_entry_for_opening):
-		if doctype == "Account Closing Balance":
-			opening_balance = opening_balance.where(closing_balance.is_period_closing_voucher_entry == 0)
-		else:
+		if doctype == "GL Entry":
 			opening_balance = opening_balance.where(closing_balance.voucher_type != "Period Closing Voucher")
+		else:
+			opening_balance = opening_balance.where(closing_balance.is_period_closing_voucher_entry == 0)
 
 	if filters.cost_center:
 		lft, rgt = frappe.db.get_value("Cost Center", filters.cost_center, ["lft", "rgt"])
@@ -94,11 +94,21 @@ def convert_to_presentation_currency(gl_entries, currency_info, filters=None):
 	:param currency_info:
 	:return:
 	"""
-	converted_gl_list = []
+	account_currencies = list(set(entry["account_currency"] for entry in gl_entries))
+	convert_entry = get_presentation_currency_converter(currency_info, account_currencies, filters)
+
+	return [convert_entry(entry) for entry in gl_entries]
+
+
+def get_presentation_currency_converter(currency_info, account_currencies, filters=None):
+	"""
+	Returns a function converting a single GL Entry to the presentation currency, for GL
+	Entries which are not loaded together. `account_currencies` are all the account
+	currencies of the entries which will be converted.
+	"""
 	presentation_currency = currency_info["presentation_currency"]
 	company_currency = currency_info["company_currency"]
-
-	account_currencies = list(set(entry["account_currency"] for entry in gl_entries))
+	date = currency_info["report_date"]
 	exchange_gain_or_loss = False
 
 	if filters and isinstance(filters.get("account"), list):
@@ -107,22 +117,24 @@ def convert_to_presentation_currency(gl_entries, currency_info, filters=None):
 
 		exchange_gain_or_loss = len(account_filter) == 1 and account_filter[0] == gain_loss_account
 
-	for entry in gl_entries:
+	use_account_currency = (
+		len(account_currencies) == 1
+		and account_currencies[0] == presentation_currency
+		and not exchange_gain_or_loss
+	) and not (filters and filters.get("show_amount_in_company_currency"))
+
+	if account_currencies and not use_account_currency:
+		# fetch the rate once, so that converting entries doesn't need the database
+		get_rate_as_at(date, presentation_currency, company_currency)
+
+	def convert_entry(entry):
 		debit = flt(entry["debit"])
 		credit = flt(entry["credit"])
-		debit_in_account_currency = flt(entry["debit_in_account_currency"])
-		credit_in_account_currency = flt(entry["credit_in_account_currency"])
-		account_currency = entry["account_currency"]
-
-		if (
-			len(account_currencies) == 1
-			and account_currency == presentation_currency
-			and not exchange_gain_or_loss
-		) and not (filters and filters.get("show_amount_in_company_currency")):
-			entry["debit"] = debit_in_account_currency
-			entry["credit"] = credit_in_account_currency
+
+		if use_account_currency:
+			entry["debit"] = flt(entry["debit_in_account_currency"])
+			entry["credit"] = flt(entry["credit_in_account_currency"])
 		else:
-			date = currency_info["report_date"]
 			converted_debit_value = convert(debit, presentation_currency, company_currency, date)
 			converted_credit_value = convert(credit, presentation_currency, company_currency, date)
 
@@ -132,9 +144,9 @@ def convert_to_presentation_currency(gl_entries, currency_info, filters=None):
 			if entry.get("credit"):
 				entry["credit"] = converted_credit_value
 
-		converted_gl_list.append(entry)
+		return entry
 
-	return converted_gl_list
+	return convert_entry
 
 
 def get_appropriate_company(filters):
@@ -2,6 +2,7 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import copy
 from collections import defaultdict
 from json import loads
 from typing import TYPE_CHECKING, Optional
@@ -11,6 +12,7 @@ import frappe.defaults
 from frappe import _, qb, throw
 from frappe.desk.reportview import build_match_conditions
 from frappe.model.meta import get_field_precision
+from frappe.model.naming import set_new_name
 from frappe.query_builder import AliasedQuery, Case, Criterion, Table
 from frappe.query_builder.functions import Count, Max, Round, Sum
 from frappe.query_builder.utils import DocType
@@ -36,7 +38,20 @@ import nexa
 
 # imported to enable nexa.accounts.utils.get_account_currency
 from nexa.accounts.doctype.account.account import get_account_currency
-from nexa.accounts.doctype.accounting_dimension.accounting_dimension import get_dimensions
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	get_account_balance_rollup_upto,
+	update_account_balance_rollup,
+)
+from nexa.accounts.doctype.accounting_dimension.accounting_dimension import (
+	get_accounting_dimensions,
+	get_dimensions,
+)
+from nexa.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	get_outstanding_vouchers,
+	is_voucher_outstanding_maintained,
+	is_voucher_outstanding_ready,
+	refresh_voucher_outstanding,
+)
 from nexa.stock import get_warehouse_account_map
 from nexa.stock.utils import get_stock_value_on
 
@@ -53,7 +68,17 @@ class PaymentEntryUnlinkError(frappe.ValidationError):
 
 
 GL_REPOSTING_CHUNK = 100
+GLE_AMOUNT_FIELDS = (
+	"debit",
+	"credit",
+	"debit_in_account_currency",
+	"credit_in_account_currency",
+	"debit_in_transaction_currency",
+	"credit_in_transaction_currency",
+)
 OUTSTANDING_DOCTYPES = frozenset(["Sales Invoice", "Purchase Invoice", "Fees"])
+# GL maps with at least these many rows have their ledger entries inserted in bulk
+LEDGER_BULK_INSERT_THRESHOLD = 50
 
 
 @frappe.whitelist()
@@ -211,7 +236,7 @@ def get_balance_on(
 	if not cost_center and frappe.form_dict.get("cost_center"):
 		cost_center = frappe.form_dict.get("cost_center")
 
-	cond = ["is_cancelled=0"]
+	cond = []
 	if start_date:
 		cond.append("posting_date >= %s" % frappe.db.escape(cstr(start_date)))
 	if date:
@@ -305,17 +330,41 @@ def get_balance_on(
 		else:
 			select_field = "sum(round(debit, %s)) - sum(round(credit, %s))"
 
+		# party balances are not rolled up
+		rollup_upto = not (party_type and party) and get_account_balance_rollup_upto()
+		if rollup_upto:
+			return get_balance_from_rollup(select_field, cond, precision, rollup_upto)
+
 		bal = frappe.db.sql(
 			"""
 			SELECT {}
 			FROM `tabGL Entry` gle
-			WHERE {}""".format(select_field, " and ".join(cond)),
+			WHERE {}""".format(select_field, " and ".join(["is_cancelled=0", *cond])),
 			(precision, precision),
 		)[0][0]
 		# if bal is None, return 0
 		return flt(bal)
 
 
+def get_balance_from_rollup(select_field, cond, precision, rollup_upto):
+	"""Balance from the daily rollup before `rollup_upto` and from GL Entry on and after it"""
+	bal = frappe.db.sql(
+		"""
+		SELECT sum(balance) FROM (
+			SELECT {select_field} as balance
+			FROM `tabAccount Balance Rollup` gle
+			WHERE {conditions} and posting_date < %s
+			UNION ALL
+			SELECT {select_field} as balance
+			FROM `tabGL Entry` gle
+			WHERE {conditions} and is_cancelled=0 and posting_date >= %s
+		) balances""".format(select_field=select_field, conditions=" and ".join(cond)),
+		(precision, precision, rollup_upto, precision, precision, rollup_upto),
+	)[0][0]
+
+	return flt(bal)
+
+
 def get_count_on(account, fieldname, date):
 	cond = ["is_cancelled=0"]
 	if date:
@@ -482,9 +531,19 @@ def reconcile_against_document(
 			reconciled_entries[(row.voucher_type, row.voucher_no)] = []
 
 		reconciled_entries[(row.voucher_type, row.voucher_no)].append(row)
+
+	# an invoice allocated against several payments needs its outstanding computed only once
+	vouchers_to_update = {}
 	for key, entries in reconciled_entries.items():
 		voucher_type, voucher_no = key
 
+		if voucher_type != "Journal Entry" and not skip_ref_details_update_for_pe:
+			# reference details of the payment are built from the invoices' current outstanding
+			against_vouchers = {(entry.against_voucher_type, entry.against_voucher) for entry in entries}
+			for voucher in [d for d in vouchers_to_update if d[:2] in against_vouchers]:
+				del vouchers_to_update[voucher]
+				update_voucher_outstanding(*voucher)
+
 		doc = frappe.get_doc(voucher_type, voucher_no)
 		frappe.flags.ignore_party_validation = True
 
@@ -531,15 +590,20 @@ def reconcile_against_document(
 
 		# Only update outstanding for newly linked vouchers
 		for entry in entries:
-			update_voucher_outstanding(
-				entry.against_voucher_type,
-				entry.against_voucher,
-				entry.account,
-				entry.party_type,
-				entry.party,
+			vouchers_to_update.setdefault(
+				(
+					entry.against_voucher_type,
+					entry.against_voucher,
+					entry.account,
+					entry.party_type,
+					entry.party,
+				)
 			)
 		frappe.flags.ignore_party_validation = False
 
+	for voucher in vouchers_to_update:
+		update_voucher_outstanding(*voucher)
+
 
 def check_if_advance_entry_modified(args):
 	"""
@@ -930,6 +994,21 @@ def update_accounting_ledgers_after_reference_removal(
 
 	# Payment Ledger
 	ple = qb.DocType("Payment Ledger Entry")
+
+	# entries are moved from the reference to the payments, both their outstanding changes
+	affected_vouchers = [(ref_type, ref_no)]
+	if is_voucher_outstanding_maintained():
+		affected_vouchers_query = (
+			qb.from_(ple)
+			.select(ple.voucher_type, ple.voucher_no)
+			.distinct()
+			.where((ple.against_voucher_type == ref_type) & (ple.against_voucher_no == ref_no))
+			.where(ple.delinked == 0)
+		)
+		if payment_name:
+			affected_vouchers_query = affected_vouchers_query.where(ple.voucher_no == payment_name)
+		affected_vouchers += affected_vouchers_query.run()
+
 	ple_update_query = (
 		qb.update(ple)
 		.set(ple.against_voucher_type, ple.voucher_type)
@@ -944,6 +1023,7 @@ def update_accounting_ledgers_after_reference_removal(
 	if payment_name:
 		ple_update_query = ple_update_query.where(ple.voucher_no == payment_name)
 	ple_update_query.run()
+	refresh_voucher_outstanding(affected_vouchers)
 
 	# Advance Payment
 	adv = qb.DocType("Advance Payment Ledger Entry")
@@ -1229,6 +1309,12 @@ def get_outstanding_invoices(
 	common_filter.append(ple.party_type == party_type)
 	common_filter.append(ple.party == party)
 
+	# read only the ledger of the unpaid invoices, if they are known
+	if vouchers is None and is_voucher_outstanding_ready():
+		vouchers = get_outstanding_vouchers(party_type, party, account, party_account_type)
+		if not vouchers:
+			return outstanding_invoices
+
 	ple_query = QueryPaymentLedger()
 	invoice_list = ple_query.get_voucher_outstandings(
 		vouchers=vouchers,
@@ -1508,7 +1594,7 @@ def repost_gle_for_stock_vouchers(
 	warehouse_account=None,
 	repost_doc: Optional["RepostItemValuation"] = None,
 ):
-	from nexa.accounts.general_ledger import toggle_debit_credit_if_negative
+	from nexa.accounts.general_ledger import toggle_debit_credit_if_negative, validate_posting_period
 
 	if not stock_vouchers:
 		return
@@ -1525,6 +1611,8 @@ def repost_gle_for_stock_vouchers(
 
 	for stock_vouchers_chunk in create_batch(stock_vouchers, GL_REPOSTING_CHUNK):
 		gle = get_voucherwise_gl_entries(stock_vouchers_chunk, posting_date)
+		gle_updates = {}
+		updated_gles = []
 
 		for voucher_type, voucher_no in stock_vouchers_chunk:
 			existing_gle = gle.get((voucher_type, voucher_no), [])
@@ -1536,11 +1624,26 @@ def repost_gle_for_stock_vouchers(
 				if not existing_gle or not compare_existing_and_expected_gle(
 					existing_gle, expected_gle, precision
 				):
+					changed_amounts = get_changed_gle_amounts(existing_gle, expected_gle, precision)
+					if changed_amounts is not None:
+						# amounts updated in place are held to the same periods as entries posted again
+						validate_posting_period(expected_gle)
+						gle_updates.update(changed_amounts)
+						updated_gles.extend(
+							d for d in existing_gle if d.name in changed_amounts and not d.is_cancelled
+						)
+						continue
+
 					_delete_accounting_ledger_entries(voucher_type, voucher_no)
 					voucher_obj.make_gl_entries(gl_entries=expected_gle, from_repost=True)
 			else:
 				_delete_accounting_ledger_entries(voucher_type, voucher_no)
 
+		if gle_updates:
+			frappe.db.bulk_update("GL Entry", gle_updates, chunk_size=500)
+			update_account_balance_rollup(updated_gles, cancel=True)
+			update_account_balance_rollup([{**d, **gle_updates[d.name]} for d in updated_gles])
+
 		if not frappe.in_test:
 			frappe.db.commit()
 
@@ -1563,7 +1666,13 @@ def _delete_adv_pl_entries(voucher_type, voucher_no):
 
 def _delete_gl_entries(voucher_type, voucher_no):
 	gle = qb.DocType("GL Entry")
-	qb.from_(gle).delete().where((gle.voucher_type == voucher_type) & (gle.voucher_no == voucher_no)).run()
+	condition = (gle.voucher_type == voucher_type) & (gle.voucher_no == voucher_no)
+
+	if get_account_balance_rollup_upto():
+		gl_entries = qb.from_(gle).select("*").where(condition & (gle.is_cancelled == 0)).run(as_dict=True)
+		update_account_balance_rollup(gl_entries, cancel=True)
+
+	qb.from_(gle).delete().where(condition).run()
 
 
 def _delete_accounting_ledger_entries(voucher_type, voucher_no):
@@ -1635,8 +1744,8 @@ def get_future_stock_vouchers(posting_date, posting_time, for_warehouses=None, f
 def get_voucherwise_gl_entries(future_stock_vouchers, posting_date):
 	"""Get voucherwise list of GL entries.
 
-	Only fetches GLE fields required for comparing with new GLE.
-	Check compare_existing_and_expected_gle function below.
+	Only fetches GLE fields required for comparing with new GLE and updating their amounts.
+	Check compare_existing_and_expected_gle and get_changed_gle_amounts functions below.
 
 	returns:
 	        Dict[Tuple[voucher_type, voucher_no], List[GL Entries]]
@@ -1646,13 +1755,38 @@ def get_voucherwise_gl_entries(future_stock_vouchers, posting_date):
 		return gl_entries
 
 	voucher_nos = [d[1] for d in future_stock_vouchers]
+	fields = [
+		"name",
+		"account",
+		"cost_center",
+		"project",
+		"party_type",
+		"party",
+		"voucher_type",
+		"voucher_no",
+		"voucher_detail_no",
+		"against_voucher_type",
+		"against_voucher",
+		"finance_book",
+		"company",
+		"posting_date",
+		"fiscal_year",
+		"account_currency",
+		"is_opening",
+		"is_cancelled",
+		"reporting_currency_exchange_rate",
+		*GLE_AMOUNT_FIELDS,
+		*get_accounting_dimensions(),
+	]
 
 	gles = frappe.db.sql(
 		"""
-		select name, account, credit, debit, cost_center, project, voucher_type, voucher_no
+		select {}
 			from `tabGL Entry`
 		where
-			posting_date >= {} and voucher_no in ({})""".format("%s", ", ".join(["%s"] * len(voucher_nos))),
+			posting_date >= %s and voucher_no in ({})""".format(
+			", ".join(f"`{field}`" for field in fields), ", ".join(["%s"] * len(voucher_nos))
+		),
 		tuple([posting_date, *voucher_nos]),
 		as_dict=1,
 	)
@@ -1689,6 +1823,63 @@ def compare_existing_and_expected_gle(existing_gle, expected_gle, precision):
 	return matched
 
 
+def get_changed_gle_amounts(existing_gle, expected_gle, precision):
+	"""Get amounts to be updated on existing GL entries to match the expected GL entries.
+
+	Returns None if the entries differ by anything other than the amounts, or if a changed
+	entry affects a party ledger. Such vouchers need their GL entries to be posted again.
+
+	returns:
+	        Dict[GL Entry name, Dict[fieldname, amount]]
+	"""
+	from nexa.accounts.general_ledger import (
+		get_accounting_dimensions_for_offsetting_entry,
+		get_debit_credit_difference,
+		get_merge_properties,
+		process_gl_map,
+	)
+
+	if get_accounting_dimensions_for_offsetting_entry(expected_gle, expected_gle[0].company):
+		return
+
+	expected_gle = process_gl_map(copy.deepcopy(expected_gle), precision=precision, from_repost=True)
+	if len(expected_gle) != len(existing_gle):
+		return
+
+	debit_credit_diff, _trx_cur_debit_credit_diff = get_debit_credit_difference(expected_gle, precision)
+	if debit_credit_diff:
+		return
+
+	merge_properties = get_merge_properties(get_accounting_dimensions())
+
+	def get_key(entry):
+		return tuple(entry.get(fieldname) or "" for fieldname in merge_properties)
+
+	existing_gle_map = {get_key(entry): entry for entry in existing_gle}
+	if len(existing_gle_map) != len(existing_gle):
+		return
+
+	changed_amounts = {}
+	for entry in expected_gle:
+		existing_entry = existing_gle_map.get(get_key(entry))
+		if not existing_entry:
+			return
+
+		amounts = {fieldname: flt(entry.get(fieldname), precision) for fieldname in GLE_AMOUNT_FIELDS}
+		if all(flt(existing_entry[fieldname], precision) == amounts[fieldname] for fieldname in amounts):
+			continue
+
+		if entry.party or entry.against_voucher:
+			return
+
+		exchange_rate = flt(existing_entry.reporting_currency_exchange_rate)
+		amounts["debit_in_reporting_currency"] = flt(amounts["debit"] * exchange_rate)
+		amounts["credit_in_reporting_currency"] = flt(amounts["credit"] * exchange_rate)
+		changed_amounts[existing_entry.name] = amounts
+
+	return changed_amounts
+
+
 def get_stock_accounts(company, voucher_type=None, voucher_no=None, accounts=None):
 	stock_accounts = [
 		d.name
@@ -1952,20 +2143,89 @@ def create_payment_ledger_entry(
 	if gl_entries:
 		ple_map = get_payment_ledger_entries(gl_entries, cancel=cancel)
 
-		for entry in ple_map:
-			ple = frappe.get_doc(entry)
+		if not cancel and len(gl_entries) >= LEDGER_BULK_INSERT_THRESHOLD:
+			make_payment_ledger_entries_in_bulk(ple_map, adv_adj, update_outstanding, from_repost)
+		else:
+			for entry in ple_map:
+				ple = frappe.get_doc(entry)
+
+				if cancel:
+					delink_original_entry(ple, partial_cancel=partial_cancel)
+					if is_immutable_ledger_enabled():
+						ple.delinked = 0
+						ple.posting_date = frappe.form_dict.get("posting_date") or getdate()
+
+				ple.flags.ignore_permissions = 1
+				ple.flags.adv_adj = adv_adj
+				ple.flags.from_repost = from_repost
+				ple.flags.update_outstanding = update_outstanding
+				ple.submit()
+
+		refresh_voucher_outstanding(
+			(entry.against_voucher_type, entry.against_voucher_no)
+			for entry in ple_map
+			if entry.doctype == "Payment Ledger Entry"
+		)
+
+
+def make_payment_ledger_entries_in_bulk(ple_map, adv_adj=0, update_outstanding="Yes", from_repost=0):
+	"""Insert Payment Ledger Entries with a multi-row insert and update every voucher's outstanding once"""
+	if not ple_map:
+		return
+
+	ple_docs = []
+	for entry in ple_map:
+		ple = frappe.get_doc(entry)
+		ple.run_method("validate")
 
-			if cancel:
-				delink_original_entry(ple, partial_cancel=partial_cancel)
-				if is_immutable_ledger_enabled():
-					ple.delinked = 0
-					ple.posting_date = frappe.form_dict.get("posting_date") or getdate()
+		if not from_repost:
+			ple.validate_account_details()
+			ple.validate_dimensions_for_pl_and_bs()
+			ple.validate_allowed_dimensions()
 
-			ple.flags.ignore_permissions = 1
-			ple.flags.adv_adj = adv_adj
-			ple.flags.from_repost = from_repost
-			ple.flags.update_outstanding = update_outstanding
-			ple.submit()
+		ple_docs.append(ple)
+
+	insert_ledger_entries_in_bulk("Payment Ledger Entry", ple_docs)
+
+	if not from_repost:
+		from nexa.accounts.doctype.gl_entry.gl_entry import validate_balance_type, validate_frozen_account
+
+		for account in {ple.account for ple in ple_docs}:
+			validate_frozen_account(account, adv_adj)
+			validate_balance_type(account, adv_adj)
+
+	if update_outstanding != "Yes" or frappe.flags.is_reverse_depr_entry:
+		return
+
+	vouchers_to_update = {
+		(ple.against_voucher_type, ple.against_voucher_no, ple.account, ple.party_type, ple.party)
+		for ple in ple_docs
+		if ple.against_voucher_type in OUTSTANDING_DOCTYPES
+	}
+	for args in vouchers_to_update:
+		update_voucher_outstanding(*args)
+
+
+def insert_ledger_entries_in_bulk(doctype, docs):
+	"""Insert validated ledger entries with a single multi-row insert, skipping the per-row ORM hooks"""
+	timestamp = get_datetime()
+	for doc in docs:
+		if not doc.name:
+			doc.run_method("autoname")
+			if not doc.name:
+				set_new_name(doc)
+
+		doc.docstatus = 1
+		doc.owner = doc.modified_by = frappe.session.user
+		doc.creation = doc.modified = timestamp
+
+	fields = list(docs[0].get_valid_dict(convert_dates_to_str=True).keys())
+	frappe.db.bulk_insert(
+		doctype,
+		fields,
+		[tuple(doc.get_valid_dict(convert_dates_to_str=True).get(field) for field in fields) for doc in docs],
+		chunk_size=1000,
+	)
 
 
 def update_voucher_outstanding(voucher_type, voucher_no, account, party_type, party):
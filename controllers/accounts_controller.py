@@ -71,6 +71,7 @@ from nexa.stock.get_item_details import (
 	get_item_details,
 	get_item_tax_map,
 	get_item_warehouse_,
+	item_details_batch,
 )
 from nexa.utilities.regional import temporary_flag
 from nexa.utilities.transaction_base import TransactionBase
@@ -944,114 +945,118 @@ class AccountsController(TransactionBase):
 
 			self.pricing_rules = []
 
-			for item in self.get("items"):
-				if item.get("item_code"):
-					ctx: ItemDetailsCtx = ItemDetailsCtx(parent_dict.copy())
-					ctx.update(item.as_dict())
+			# the parent carries the price lists of the rows
+			with item_details_batch([{**parent_dict, "item_code": d.item_code} for d in self.get("items")]):
+				for item in self.get("items"):
+					if item.get("item_code"):
+						ctx: ItemDetailsCtx = ItemDetailsCtx(parent_dict.copy())
+						ctx.update(item.as_dict())
 
-					ctx.update(
-						{
-							"doctype": self.doctype,
-							"name": self.name,
-							"child_doctype": item.doctype,
-							"child_docname": item.name,
-							"ignore_pricing_rule": (
-								self.ignore_pricing_rule if hasattr(self, "ignore_pricing_rule") else 0
-							),
-						}
-					)
+						ctx.update(
+							{
+								"doctype": self.doctype,
+								"name": self.name,
+								"child_doctype": item.doctype,
+								"child_docname": item.name,
+								"ignore_pricing_rule": (
+									self.ignore_pricing_rule if hasattr(self, "ignore_pricing_rule") else 0
+								),
+							}
+						)
 
-					if not ctx.transaction_date:
-						ctx.transaction_date = ctx.posting_date
-
-					if self.get("is_subcontracted"):
-						ctx.is_subcontracted = self.is_subcontracted
-
-					ret = get_item_details(ctx, self, for_validate=for_validate, overwrite_warehouse=False)
-					for fieldname, value in ret.items():
-						if item.meta.get_field(fieldname) and value is not None:
-							if (
-								item.get(fieldname) is None
-								or fieldname in force_item_fields
-								or (
-									fieldname in ["serial_no", "batch_no"]
-									and item.get("use_serial_batch_fields")
-								)
-							):
-								item.set(fieldname, value)
+						if not ctx.transaction_date:
+							ctx.transaction_date = ctx.posting_date
 
-								if fieldname == "batch_no" and item.batch_no and not item.is_free_item:
-									if ret.get("rate"):
-										item.set("rate", ret.get("rate"))
+						if self.get("is_subcontracted"):
+							ctx.is_subcontracted = self.is_subcontracted
 
-									if not item.get("price_list_rate") and ret.get("price_list_rate"):
-										item.set("price_list_rate", ret.get("price_list_rate"))
+						ret = get_item_details(
+							ctx, self, for_validate=for_validate, overwrite_warehouse=False
+						)
+						for fieldname, value in ret.items():
+							if item.meta.get_field(fieldname) and value is not None:
+								if (
+									item.get(fieldname) is None
+									or fieldname in force_item_fields
+									or (
+										fieldname in ["serial_no", "batch_no"]
+										and item.get("use_serial_batch_fields")
+									)
+								):
+									item.set(fieldname, value)
 
-							elif fieldname in ["cost_center", "conversion_factor"] and not item.get(
-								fieldname
-							):
-								item.set(fieldname, value)
-							elif fieldname == "item_tax_rate" and not (
-								self.get("is_return") and self.get("return_against")
-							):
-								item.set(fieldname, value)
-							elif fieldname == "serial_no":
-								# Ensure that serial numbers are matched against Stock UOM
-								item_conversion_factor = item.get("conversion_factor") or 1.0
-								item_qty = abs(item.get("qty")) * item_conversion_factor
+									if fieldname == "batch_no" and item.batch_no and not item.is_free_item:
+										if ret.get("rate"):
+											item.set("rate", ret.get("rate"))
+
+										if not item.get("price_list_rate") and ret.get("price_list_rate"):
+											item.set("price_list_rate", ret.get("price_list_rate"))
 
-								if item_qty != len(get_serial_nos(item.get("serial_no"))):
+								elif fieldname in ["cost_center", "conversion_factor"] and not item.get(
+									fieldname
+								):
+									item.set(fieldname, value)
+								elif fieldname == "item_tax_rate" and not (
+									self.get("is_return") and self.get("return_against")
+								):
+									item.set(fieldname, value)
+								elif fieldname == "serial_no":
+									# Ensure that serial numbers are matched against Stock UOM
+									item_conversion_factor = item.get("conversion_factor") or 1.0
+									item_qty = abs(item.get("qty")) * item_conversion_factor
+
+									if item_qty != len(get_serial_nos(item.get("serial_no"))):
+										item.set(fieldname, value)
+
+								elif (
+									ret.get("pricing_rule_removed")
+									and value is not None
+									and fieldname
+									in [
+										"discount_percentage",
+										"discount_amount",
+										"rate",
+										"margin_rate_or_amount",
+										"margin_type",
+										"remove_free_item",
+									]
+								):
+									# reset pricing rule fields if pricing_rule_removed
 									item.set(fieldname, value)
 
-							elif (
-								ret.get("pricing_rule_removed")
-								and value is not None
-								and fieldname
-								in [
-									"discount_percentage",
-									"discount_amount",
-									"rate",
-									"margin_rate_or_amount",
-									"margin_type",
-									"remove_free_item",
-								]
-							):
-								# reset pricing rule fields if pricing_rule_removed
-								item.set(fieldname, value)
+								elif fieldname == "expense_account" and not item.get("expense_account"):
+									item.expense_account = value
 
-							elif fieldname == "expense_account" and not item.get("expense_account"):
-								item.expense_account = value
+						if self.doctype in ["Purchase Invoice", "Sales Invoice"] and item.meta.get_field(
+							"is_fixed_asset"
+						):
+							item.set("is_fixed_asset", ret.get("is_fixed_asset", 0))
 
-					if self.doctype in ["Purchase Invoice", "Sales Invoice"] and item.meta.get_field(
-						"is_fixed_asset"
-					):
-						item.set("is_fixed_asset", ret.get("is_fixed_asset", 0))
-
-					# Double check for cost center
-					# Items add via promotional scheme may not have cost center set
-					if hasattr(item, "cost_center") and not item.get("cost_center"):
-						item.set(
-							"cost_center",
-							self.get("cost_center") or nexa.get_default_cost_center(self.company),
-						)
+						# Double check for cost center
+						# Items add via promotional scheme may not have cost center set
+						if hasattr(item, "cost_center") and not item.get("cost_center"):
+							item.set(
+								"cost_center",
+								self.get("cost_center") or nexa.get_default_cost_center(self.company),
+							)
 
-					if ret.get("pricing_rules"):
-						self.apply_pricing_rule_on_items(item, ret)
-						self.set_pricing_rule_details(item, ret)
-				else:
-					# Transactions line item without item code
-
-					uom = item.get("uom")
-					stock_uom = item.get("stock_uom")
-					if bool(uom) != bool(stock_uom):  # xor
-						item.stock_uom = item.uom = uom or stock_uom
-
-					# UOM cannot be zero so substitute as 1
-					item.conversion_factor = (
-						get_uom_conv_factor(item.get("uom"), item.get("stock_uom"))
-						or item.get("conversion_factor")
-						or 1
-					)
+						if ret.get("pricing_rules"):
+							self.apply_pricing_rule_on_items(item, ret)
+							self.set_pricing_rule_details(item, ret)
+					else:
+						# Transactions line item without item code
+
+						uom = item.get("uom")
+						stock_uom = item.get("stock_uom")
+						if bool(uom) != bool(stock_uom):  # xor
+							item.stock_uom = item.uom = uom or stock_uom
+
+						# UOM cannot be zero so substitute as 1
+						item.conversion_factor = (
+							get_uom_conv_factor(item.get("uom"), item.get("stock_uom"))
+							or item.get("conversion_factor")
+							or 1
+						)
 
 			if self.doctype == "Purchase Invoice":
 				self.set_expense_account(for_validate)
@@ -24,6 +24,40 @@ from nexa.utilities.regional import temporary_flag
 ItemWiseTaxDetail = frappe._dict
 
 
+class ItemTaxContext:
+	"""
+	Item tax maps of a transaction. Every distinct map is built and parsed once, and is
+	reused by later recalculations of the transaction as long as the taxes, company and
+	item tax template it was built from are unchanged.
+	"""
+
+	def __init__(self):
+		self.item_tax_maps = {}
+		self.parsed_item_tax_maps = {}
+
+	def get_item_tax_map(self, doc, tax_template, template_modified=None):
+		taxes = tuple(
+			(t.get("account_head"), t.get("rate"))
+			for t in (doc.get("taxes") or [])
+			if not t.get("set_by_item_tax_template")
+		)
+		key = (doc.get("company"), taxes, tax_template, template_modified)
+		if key not in self.item_tax_maps:
+			self.item_tax_maps[key] = get_item_tax_map(doc=doc, tax_template=tax_template, as_json=True)
+
+		return self.item_tax_maps[key]
+
+	def load(self, item_tax_rate):
+		"""Parsed item tax map, shared between rows and hence not to be modified"""
+		if not item_tax_rate:
+			return {}
+
+		if item_tax_rate not in self.parsed_item_tax_maps:
+			self.parsed_item_tax_maps[item_tax_rate] = json.loads(item_tax_rate)
+
+		return self.parsed_item_tax_maps[item_tax_rate]
+
+
 class calculate_taxes_and_totals:
 	def __init__(self, doc: Document):
 		self.doc = doc
@@ -36,6 +70,11 @@ class calculate_taxes_and_totals:
 			)
 
 		self._items = self.filter_rows() if self.doc.doctype == "Quotation" else self.doc.get("items")
+		self._item_tax_rates = {}
+
+		if not doc.flags.item_tax_context:
+			doc.flags.item_tax_context = ItemTaxContext()
+		self.item_tax_context = doc.flags.item_tax_context
 
 		get_round_off_applicable_accounts(self.doc.company, frappe.flags.round_off_applicable_accounts)
 		self.calculate()
@@ -102,13 +141,23 @@ class calculate_taxes_and_totals:
 		if self.doc.get("is_return") and self.doc.get("return_against"):
 			return
 
-		for item in self.doc.items:
-			if item.item_code and item.get("item_tax_template"):
-				item_doc = frappe.get_cached_doc("Item", item.item_code)
+		items = [item for item in self.doc.items if item.item_code and item.get("item_tax_template")]
+		item_taxes = self.get_item_taxes({item.item_code for item in items})
+		templates = {}
+
+		for item in items:
+			if not item_taxes[item.item_code]:
+				# No validation if no taxes in item or item group
+				continue
+
+			net_rate = item.net_rate or item.rate
+			base_net_rate = item.base_net_rate or item.base_rate
+			key = (item.item_code, net_rate, base_net_rate)
+			if key not in templates:
 				ctx = ItemDetailsCtx(
 					{
-						"net_rate": item.net_rate or item.rate,
-						"base_net_rate": item.base_net_rate or item.base_rate,
+						"net_rate": net_rate,
+						"base_net_rate": base_net_rate,
 						"tax_category": self.doc.get("tax_category"),
 						"posting_date": self.doc.get("posting_date"),
 						"bill_date": self.doc.get("bill_date"),
@@ -116,38 +165,50 @@ class calculate_taxes_and_totals:
 						"company": self.doc.get("company"),
 					}
 				)
+				templates[key] = _get_item_tax_template(ctx, item_taxes[item.item_code], for_validate=True)
+
+			taxes = templates[key]
+			if taxes and item.item_tax_template not in taxes:
+				item.item_tax_template = taxes[0]
+				frappe.msgprint(
+					_("Row {0}: Item Tax template updated as per validity and rate applied").format(
+						item.idx, frappe.bold(item.item_code)
+					)
+				)
 
-				item_group = item_doc.item_group
-				item_group_taxes = []
-
-				while item_group:
-					item_group_doc = frappe.get_cached_doc("Item Group", item_group)
-					item_group_taxes += item_group_doc.taxes or []
-					item_group = item_group_doc.parent_item_group
-
-				item_taxes = item_doc.taxes or []
+	def get_item_taxes(self, item_codes):
+		"""Item Tax rows of each item followed by those of its item group and the group's parents"""
+		item_group_taxes = {}
+
+		def get_item_group_taxes(item_group):
+			if item_group not in item_group_taxes:
+				item_group_doc = frappe.get_cached_doc("Item Group", item_group)
+				item_group_taxes[item_group] = (item_group_doc.taxes or []) + (
+					get_item_group_taxes(item_group_doc.parent_item_group)
+					if item_group_doc.parent_item_group
+					else []
+				)
 
-				if not item_group_taxes and (not item_taxes):
-					# No validation if no taxes in item or item group
-					continue
+			return item_group_taxes[item_group]
 
-				taxes = _get_item_tax_template(ctx, item_taxes + item_group_taxes, for_validate=True)
+		item_taxes = {}
+		for item_code in item_codes:
+			item_doc = frappe.get_cached_doc("Item", item_code)
+			item_taxes[item_code] = (item_doc.taxes or []) + (
+				get_item_group_taxes(item_doc.item_group) if item_doc.item_group else []
+			)
 
-				if taxes:
-					if item.item_tax_template not in taxes:
-						item.item_tax_template = taxes[0]
-						frappe.msgprint(
-							_("Row {0}: Item Tax template updated as per validity and rate applied").format(
-								item.idx, frappe.bold(item.item_code)
-							)
-						)
+		return item_taxes
 
 	def update_item_tax_map(self):
+		templates_modified = {
+			template: frappe.get_cached_value("Item Tax Template", template, "modified")
+			for template in {item.item_tax_template for item in self.doc.items if item.item_tax_template}
+		}
+
 		for item in self.doc.items:
-			item.item_tax_rate = get_item_tax_map(
-				doc=self.doc,
-				tax_template=item.item_tax_template,
-				as_json=True,
+			item.item_tax_rate = self.item_tax_context.get_item_tax_map(
+				self.doc, item.item_tax_template, templates_modified.get(item.item_tax_template)
 			)
 
 	def validate_conversion_rate(self):
@@ -313,7 +374,7 @@ class calculate_taxes_and_totals:
 				self._set_in_company_currency(item, ["net_rate", "net_amount"])
 
 	def _load_item_tax_rate(self, item_tax_rate):
-		return json.loads(item_tax_rate) if item_tax_rate else {}
+		return self.item_tax_context.load(item_tax_rate)
 
 	def get_current_tax_fraction(self, tax, item_tax_map):
 		"""
@@ -350,7 +411,12 @@ class calculate_taxes_and_totals:
 
 	def _get_tax_rate(self, tax, item_tax_map):
 		if tax.account_head in item_tax_map:
-			return flt(item_tax_map.get(tax.account_head), self.doc.precision("rate", tax))
+			# items share a handful of distinct rates, round each of them once
+			key = (tax.parentfield, item_tax_map.get(tax.account_head))
+			if key not in self._item_tax_rates:
+				self._item_tax_rates[key] = flt(key[1], self.doc.precision("rate", tax))
+
+			return self._item_tax_rates[key]
 		else:
 			return tax.rate
 
@@ -392,6 +458,13 @@ class calculate_taxes_and_totals:
 				if tax.charge_type == "Actual"
 			]
 		)
+		self._actual_tax_amounts = actual_tax_dict.copy()
+
+		# values which are the same for every item are looked up once per tax row
+		round_row_wise_tax = frappe.flags.round_row_wise_tax
+		precisions = [(tax.precision("tax_amount"), tax.precision("net_amount")) for tax in doc.taxes]
+		accumulate_tax = not (self.discount_amount_applied and doc.apply_discount_on == "Grand Total")
+		last_item_idx = len(self._items) - 1
 
 		for n, item in enumerate(self._items):
 			item_tax_map = self._load_item_tax_rate(item.item_tax_rate)
@@ -400,20 +473,18 @@ class calculate_taxes_and_totals:
 				current_net_amount, current_tax_amount = self.get_current_tax_and_net_amount(
 					item, tax, item_tax_map
 				)
-				if frappe.flags.round_row_wise_tax:
-					current_tax_amount = flt(current_tax_amount, tax.precision("tax_amount"))
-					current_net_amount = flt(current_net_amount, tax.precision("net_amount"))
+				if round_row_wise_tax:
+					current_tax_amount = flt(current_tax_amount, precisions[i][0])
+					current_net_amount = flt(current_net_amount, precisions[i][1])
 
 				# Adjust divisional loss to the last item
 				if tax.charge_type == "Actual":
 					actual_tax_dict[tax.idx] -= current_tax_amount
-					if n == len(self._items) - 1:
+					if n == last_item_idx:
 						current_tax_amount += actual_tax_dict[tax.idx]
 
 				# accumulate tax amount into tax.tax_amount
-				if tax.charge_type != "Actual" and not (
-					self.discount_amount_applied and self.doc.apply_discount_on == "Grand Total"
-				):
+				elif accumulate_tax:
 					tax.tax_amount += current_tax_amount
 					tax.net_amount += current_net_amount
 
@@ -501,7 +572,7 @@ class calculate_taxes_and_totals:
 		if tax.charge_type == "Actual":
 			current_net_amount = item.net_amount
 			# distribute the tax amount proportionally to each item row
-			actual = flt(tax.tax_amount, tax.precision("tax_amount"))
+			actual = self._actual_tax_amounts[tax.idx]
 
 			if tax.get("is_tax_withholding_account") and item.meta.get_field("apply_tds"):
 				if not item.get("apply_tds") or not self.doc.tax_withholding_net_total:
@@ -552,11 +623,12 @@ class calculate_taxes_and_totals:
 					tax_amount=flt(item_wise_tax_amount, tax.precision("tax_amount")),
 					net_amount=flt(item_wise_net_amount, tax.precision("net_amount")),
 				)
+		elif tax_data := tax.item_wise_tax_detail.get(key):
+			# rows of the same item add up in place, the breakup is rebuilt on every calculation
+			tax_data.tax_rate = tax_rate
+			tax_data.tax_amount += item_wise_tax_amount
+			tax_data.net_amount += item_wise_net_amount
 		else:
-			if tax_data := tax.item_wise_tax_detail.get(key):
-				item_wise_tax_amount += tax_data.tax_amount
-				item_wise_net_amount += tax_data.net_amount
-
 			tax.item_wise_tax_detail[key] = ItemWiseTaxDetail(
 				tax_rate=tax_rate,
 				tax_amount=item_wise_tax_amount,
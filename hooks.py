@@ -430,7 +430,9 @@ scheduler_events = {
 		"nexa.utilities.doctype.video.video.update_youtube_data",
 	],
 	"daily": [],
-	"daily_long": [],
+	"daily_long": [
+		"nexa.accounts.doctype.account_balance_rollup.account_balance_rollup.rollup_account_balances",
+	],
 	"daily_maintenance": [
 		"nexa.support.doctype.issue.issue.auto_close_tickets",
 		"nexa.crm.doctype.opportunity.opportunity.auto_close_opportunity",
@@ -550,6 +552,7 @@ accounting_dimension_doctypes = [
 	"Subcontracting Receipt",
 	"Subcontracting Receipt Item",
 	"Account Closing Balance",
+	"Account Balance Rollup",
 	"Supplier Quotation",
 	"Supplier Quotation Item",
 	"Payment Reconciliation",
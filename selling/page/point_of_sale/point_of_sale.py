@@ -5,10 +5,14 @@
 import json
 
 import frappe
-from frappe.utils import cint, get_datetime
+from frappe.utils import add_to_date, cint, create_batch, get_datetime, getdate, now, nowdate
 from frappe.utils.nestedset import get_root_of
 
-from nexa.accounts.doctype.pos_invoice.pos_invoice import get_item_group, get_stock_availability
+from nexa.accounts.doctype.pos_invoice.pos_invoice import (
+	get_item_group,
+	get_stock_availability,
+	get_stock_availability_by_item,
+)
 from nexa.accounts.doctype.pos_profile.pos_profile import get_child_nodes, get_item_groups
 from nexa.stock.get_item_details import get_conversion_factor
 from nexa.stock.utils import scan_barcode
@@ -25,7 +29,7 @@ def search_by_term(search_term, warehouse, price_list):
 	if not result:
 		return
 
-	item_doc = frappe.get_doc("Item", item_code)
+	item_doc = frappe.get_cached_doc("Item", item_code)
 
 	if not item_doc:
 		return
@@ -248,6 +252,240 @@ def get_items(start, page_length, price_list, item_group, pos_profile, search_te
 	return {"items": result}
 
 
+POS_ITEM_CATALOGUE_EXPIRY = 600
+
+# A transaction which set `modified` before a sync read the catalogue may commit after it. Every
+# delta reaches this many seconds behind the version a till has, so such changes are still sent.
+POS_ITEM_CATALOGUE_SYNC_OVERLAP = 300
+
+POS_ITEM_CATALOGUE_BATCH_SIZE = 1000
+
+
+@frappe.whitelist()
+def get_item_catalogue(pos_profile, price_list=None, since=None):
+	"""
+	Items sold by the POS Profile with their barcodes, UOMs, prices and the quantity available in
+	the profile's warehouse in stock UOM, so that a till can search and price items locally.
+
+	Without `since` the whole catalogue is returned, built once for all tills of the profile.
+	Tills keep the `version` of the catalogue and pass it back as `since` to only receive what
+	changed after it: changed items, prices and stock, and the items and prices to drop. Deltas
+	overlap the previous sync, so tills replace items and stock by item code and prices by name.
+	"""
+	frappe.has_permission("POS Profile", "read", pos_profile, throw=True)
+
+	profile_price_list = frappe.get_cached_value("POS Profile", pos_profile, "selling_price_list")
+	if price_list and price_list != profile_price_list:
+		# the till follows the customer's price list
+		frappe.has_permission("Price List", "read", price_list, throw=True)
+
+	price_list = price_list or profile_price_list
+	if since:
+		since = add_to_date(get_datetime(since), seconds=-POS_ITEM_CATALOGUE_SYNC_OVERLAP)
+		return build_item_catalogue(pos_profile, price_list, since=since)
+
+	# prices are only listed on the days they are valid
+	key = f"pos_item_catalogue::{pos_profile}::{price_list}::{nowdate()}"
+	catalogue = frappe.cache.get_value(key)
+	if not catalogue:
+		catalogue = build_item_catalogue(pos_profile, price_list)
+		frappe.cache.set_value(key, catalogue, expires_in_sec=POS_ITEM_CATALOGUE_EXPIRY)
+
+	return catalogue
+
+
+def build_item_catalogue(pos_profile, price_list, since=None):
+	version = now()
+
+	pos_profile_doc = frappe.get_cached_doc("POS Profile", pos_profile)
+	item_groups = set(get_item_group(pos_profile_doc))
+
+	items, removed_items = [], []
+	for item in get_catalogue_items(since):
+		if is_sold_in_pos(item, item_groups):
+			items.append(item)
+		else:
+			removed_items.append(item.item_code)
+
+	item_codes = [item.item_code for item in items]
+	barcodes = get_catalogue_child_rows("Item Barcode", ["barcode", "uom"], item_codes)
+	uoms = get_catalogue_child_rows("UOM Conversion Detail", ["uom", "conversion_factor"], item_codes)
+	for item in items:
+		item.barcodes = barcodes.get(item.item_code, [])
+		item.uoms = uoms.get(item.item_code, [])
+
+	prices, removed_prices = get_catalogue_prices(price_list, since)
+
+	return {
+		"version": version,
+		"since": since,
+		"items": items,
+		"removed_items": removed_items,
+		"prices": prices,
+		"removed_prices": removed_prices,
+		"stock": get_catalogue_stock(pos_profile_doc.warehouse, item_codes, since),
+	}
+
+
+def is_sold_in_pos(item, item_groups):
+	return bool(
+		not item.disabled
+		and not item.has_variants
+		and item.is_sales_item
+		and not item.is_fixed_asset
+		and (not item_groups or item.item_group in item_groups)
+	)
+
+
+def get_catalogue_items(since=None):
+	item = frappe.qb.DocType("Item")
+	query = frappe.qb.from_(item).select(
+		item.name.as_("item_code"),
+		item.item_name,
+		item.description,
+		item.item_group,
+		item.stock_uom,
+		item.sales_uom,
+		item.image.as_("item_image"),
+		item.is_stock_item,
+		item.disabled,
+		item.has_variants,
+		item.is_sales_item,
+		item.is_fixed_asset,
+	)
+
+	if since:
+		# items which are no longer sold have to be reported too
+		query = query.where(item.modified >= since)
+	else:
+		query = query.where(
+			(item.disabled == 0)
+			& (item.has_variants == 0)
+			& (item.is_sales_item == 1)
+			& (item.is_fixed_asset == 0)
+		)
+
+	return query.orderby(item.name).run(as_dict=True)
+
+
+def get_catalogue_child_rows(doctype, fields, item_codes):
+	"""Rows of an Item child table by item. Changed items are sent with all their rows."""
+	rows = {}
+	for batch in create_batch(item_codes, POS_ITEM_CATALOGUE_BATCH_SIZE):
+		for row in frappe.get_all(
+			doctype,
+			filters={"parenttype": "Item", "parent": ("in", batch)},
+			fields=["parent", *fields],
+			order_by="idx",
+		):
+			rows.setdefault(row.pop("parent"), []).append(row)
+
+	return rows
+
+
+def get_catalogue_prices(price_list, since=None):
+	"""Selling prices of the price list valid today. Deltas also carry the prices which became
+	valid or expired since the last sync, a till does not see those change otherwise."""
+	item_price = frappe.qb.DocType("Item Price")
+	today = getdate(nowdate())
+
+	query = (
+		frappe.qb.from_(item_price)
+		.select(
+			item_price.name,
+			item_price.item_code,
+			item_price.uom,
+			item_price.batch_no,
+			item_price.currency,
+			item_price.price_list_rate,
+			item_price.valid_from,
+			item_price.valid_upto,
+			item_price.selling,
+		)
+		.where(item_price.price_list == price_list)
+	)
+
+	if not since:
+		prices = query.where(
+			(item_price.selling == 1)
+			& (item_price.valid_from.isnull() | (item_price.valid_from <= today))
+			& (item_price.valid_upto.isnull() | (item_price.valid_upto >= today))
+		).run(as_dict=True)
+		for price in prices:
+			del price.selling
+
+		return prices, []
+
+	synced_on = getdate(since)
+	prices, removed_prices = [], []
+	for price in query.where(
+		(item_price.modified >= since)
+		| ((item_price.valid_from > synced_on) & (item_price.valid_from <= today))
+		| ((item_price.valid_upto >= synced_on) & (item_price.valid_upto < today))
+	).run(as_dict=True):
+		is_listed = (
+			price.pop("selling")
+			and (not price.valid_from or getdate(price.valid_from) <= today)
+			and (not price.valid_upto or getdate(price.valid_upto) >= today)
+		)
+		if is_listed:
+			prices.append(price)
+		else:
+			removed_prices.append(price.name)
+
+	for deleted_price in frappe.get_all(
+		"Deleted Document",
+		filters={"deleted_doctype": "Item Price", "creation": [">=", since]},
+		fields=["deleted_name", "data"],
+	):
+		if frappe.parse_json(deleted_price.data).get("price_list") == price_list:
+			removed_prices.append(deleted_price.deleted_name)
+
+	return prices, removed_prices
+
+
+def get_catalogue_stock(warehouse, item_codes, since=None):
+	"""Quantity available by item, as shown by `get_stock_availability`"""
+	if since:
+		item_codes = set(item_codes) | get_items_with_stock_changes(warehouse, since)
+
+	stock = {}
+	for batch in create_batch(list(item_codes), POS_ITEM_CATALOGUE_BATCH_SIZE):
+		for item_code, (qty, _is_stock_item) in get_stock_availability_by_item(batch, warehouse).items():
+			stock[item_code] = qty
+
+	return stock
+
+
+def get_items_with_stock_changes(warehouse, since):
+	item_codes = set(
+		frappe.get_all("Bin", filters={"warehouse": warehouse, "modified": [">=", since]}, pluck="item_code")
+	)
+
+	# POS Invoices submitted or cancelled since the last sync change the reserved qty
+	for child_table in ("POS Invoice Item", "Packed Item"):
+		item_codes.update(
+			frappe.get_all(
+				child_table,
+				filters={"warehouse": warehouse, "docstatus": ["!=", 0], "modified": [">=", since]},
+				pluck="item_code",
+			)
+		)
+
+	# availability of a bundle follows its components
+	bundles = set(frappe.get_all("Product Bundle", filters={"modified": [">=", since]}, pluck="name"))
+	if item_codes:
+		bundles.update(
+			frappe.get_all(
+				"Product Bundle Item",
+				filters={"parenttype": "Product Bundle", "item_code": ("in", list(item_codes))},
+				pluck="parent",
+			)
+		)
+
+	return item_codes | bundles
+
+
 @frappe.whitelist()
 def search_for_serial_or_batch_or_barcode_number(search_value: str) -> dict[str, str | None]:
 	return scan_barcode(search_value)
@@ -57,11 +57,102 @@ nexa.PointOfSale.ItemSelector = class {
 		this.get_items({}).then(({ message }) => {
 			this.render_item_list(message.items);
 		});
+		this.sync_catalogue();
 	}
 
-	get_items({ start = 0, page_length = 40, search_term = "" }) {
+	get_price_list() {
 		const doc = this.events.get_frm().doc;
-		const price_list = (doc && doc.selling_price_list) || this.price_list;
+		return (doc && doc.selling_price_list) || this.price_list;
+	}
+
+	sync_catalogue() {
+		// scanned barcodes are looked up in a local copy of the catalogue, which only pulls changes
+		const price_list = this.get_price_list();
+		if (this.catalogue && this.catalogue.price_list !== price_list) {
+			this.catalogue = null;
+		}
+
+		this.catalogue_synced_on = Date.now();
+		return frappe
+			.call({
+				method: "nexa.selling.page.point_of_sale.point_of_sale.get_item_catalogue",
+				args: {
+					pos_profile: this.pos_profile,
+					price_list,
+					since: this.catalogue ? this.catalogue.version : null,
+				},
+			})
+			.then(({ message }) => message && this.update_catalogue(price_list, message));
+	}
+
+	update_catalogue(price_list, changes) {
+		if (!this.catalogue || this.catalogue.price_list !== price_list) {
+			if (changes.since) return;
+			this.catalogue = { price_list, items: {}, prices: {}, stock: {} };
+		}
+
+		const catalogue = this.catalogue;
+		catalogue.version = changes.version;
+		changes.removed_items.forEach((item_code) => delete catalogue.items[item_code]);
+		changes.items.forEach((item) => (catalogue.items[item.item_code] = item));
+		changes.removed_prices.forEach((name) => delete catalogue.prices[name]);
+		changes.prices.forEach((price) => (catalogue.prices[price.name] = price));
+		Object.assign(catalogue.stock, changes.stock);
+
+		catalogue.barcodes = {};
+		Object.values(catalogue.items).forEach((item) => {
+			item.barcodes.forEach((d) => {
+				catalogue.barcodes[d.barcode.toLowerCase()] = { ...d, item_code: item.item_code };
+			});
+		});
+
+		catalogue.prices_by_item = {};
+		Object.values(catalogue.prices).forEach((price) => {
+			const item_prices = catalogue.prices_by_item[price.item_code] || [];
+			item_prices.push(price);
+			catalogue.prices_by_item[price.item_code] = item_prices;
+		});
+	}
+
+	get_scanned_item(search_term) {
+		// same result as searching the barcode on the server
+		const catalogue = this.catalogue;
+		if (!catalogue || catalogue.price_list !== this.get_price_list()) return;
+
+		const scanned = catalogue.barcodes[search_term.toLowerCase()];
+		const item = scanned && catalogue.items[scanned.item_code];
+		if (!item) return;
+
+		const uom = scanned.uom || item.stock_uom;
+		const conversion_factor = scanned.uom
+			? (item.uoms.find((d) => d.uom === scanned.uom) || {}).conversion_factor || 1
+			: 1;
+
+		const uom_rank = (price) => (price.uom === uom ? 0 : price.uom === item.stock_uom ? 1 : 2);
+		const prices = [...(catalogue.prices_by_item[item.item_code] || [])];
+		const price = prices.sort((a, b) => uom_rank(a) - uom_rank(b))[0] || {};
+
+		return {
+			barcode: scanned.barcode,
+			batch_no: "",
+			description: item.description,
+			is_stock_item: item.is_stock_item,
+			item_code: item.item_code,
+			item_group: item.item_group,
+			item_image: item.item_image,
+			item_name: item.item_name,
+			serial_no: "",
+			stock_uom: item.stock_uom,
+			uom,
+			conversion_factor,
+			actual_qty: Math.floor((catalogue.stock[item.item_code] || 0) / conversion_factor),
+			currency: price.currency,
+			price_list_rate: price.price_list_rate,
+		};
+	}
+
+	get_items({ start = 0, page_length = 40, search_term = "" }) {
+		const price_list = this.get_price_list();
 		let { item_group, pos_profile } = this;
 
 		!item_group && (item_group = this.parent_item_group);
@@ -362,6 +453,18 @@ nexa.PointOfSale.ItemSelector = class {
 	filter_items({ search_term = "" } = {}) {
 		const selling_price_list = this.events.get_frm().doc.selling_price_list;
 
+		if (Date.now() - (this.catalogue_synced_on || 0) > 60000) {
+			this.sync_catalogue();
+		}
+
+		const scanned_item = search_term && this.get_scanned_item(search_term);
+		if (scanned_item) {
+			this.items = [scanned_item];
+			this.render_item_list(this.items);
+			this.auto_add_item && this.search_field.$input[0].value && this.add_filtered_item_to_cart();
+			return;
+		}
+
 		if (search_term) {
 			search_term = search_term.toLowerCase();
 
@@ -10,6 +10,11 @@ from frappe.model.document import Document
 from frappe.utils import cint, comma_and, create_batch, get_link_to_form
 from frappe.utils.background_jobs import get_job, is_job_enqueued
 
+from nexa.accounts.doctype.account_balance_rollup.account_balance_rollup import (
+	enqueue_rebuild_account_balance_rollup,
+	get_account_balance_rollup_upto,
+)
+
 LEDGER_ENTRY_DOCTYPES = frozenset(
 	(
 		"GL Entry",
@@ -346,6 +351,10 @@ class TransactionDeletionRecord(Document):
 				self.db_set("delete_transactions", 1)
 				self.db_set("error_log", None)
 
+				# GL Entries are deleted directly, so the daily balances are rolled up again
+				if get_account_balance_rollup_upto():
+					enqueue_rebuild_account_balance_rollup()
+
 	def get_doctypes_to_be_ignored_list(self):
 		singles = frappe.get_all("DocType", filters={"issingle": 1}, pluck="name")
 		doctypes_to_be_ignored_list = singles
@@ -8,7 +8,8 @@ from frappe.exceptions import QueryDeadlockError, QueryTimeoutError
 from frappe.model.document import Document
 from frappe.query_builder import DocType, Interval
 from frappe.query_builder.functions import Max, Now
-from frappe.utils import cint, get_link_to_form, get_weekday, getdate, now, nowtime
+from frappe.utils import cint, get_datetime, get_link_to_form, get_weekday, getdate, now, nowtime
+from frappe.utils.background_jobs import enqueue, is_job_enqueued
 from frappe.utils.user import get_users_with_role
 from rq.timeouts import JobTimeoutException
 
@@ -38,6 +39,7 @@ class RepostItemValuation(Document):
 		allow_zero_rate: DF.Check
 		amended_from: DF.Link | None
 		based_on: DF.Literal["Transaction", "Item and Warehouse"]
+		coalesced_reposts: DF.Int
 		company: DF.Link | None
 		current_index: DF.Int
 		distinct_item_and_warehouse: DF.Code | None
@@ -45,10 +47,13 @@ class RepostItemValuation(Document):
 		gl_reposting_index: DF.Int
 		item_code: DF.Link | None
 		items_to_be_repost: DF.Code | None
+		merged_into: DF.Link | None
 		posting_date: DF.Date
 		posting_time: DF.Time | None
 		recreate_stock_ledgers: DF.Check
+		reposting_checkpoint: DF.Code | None
 		reposting_data_file: DF.Attach | None
+		saved_sle_replays: DF.Int
 		status: DF.Literal["Queued", "In Progress", "Completed", "Skipped", "Failed"]
 		total_reposting_count: DF.Int
 		via_landed_cost_voucher: DF.Check
@@ -241,6 +246,7 @@ class RepostItemValuation(Document):
 		self.current_index = 0
 		self.distinct_item_and_warehouse = None
 		self.items_to_be_repost = None
+		self.reposting_checkpoint = None
 		self.gl_reposting_index = 0
 		self.clear_attachment()
 		self.db_update()
@@ -473,8 +479,13 @@ def repost_entries():
 	if not in_configured_timeslot():
 		return
 
+	coalesce_queued_reposts()
 	riv_entries = get_repost_item_valuation_entries()
 
+	if no_of_jobs := get_no_of_parallel_reposting_jobs():
+		enqueue_parallel_reposting([row.name for row in riv_entries], no_of_jobs)
+		return
+
 	for row in riv_entries:
 		doc = frappe.get_doc("Repost Item Valuation", row.name)
 		if doc.status in ("Queued", "In Progress"):
@@ -486,6 +497,292 @@ def repost_entries():
 		return
 
 
+def coalesce_queued_reposts():
+	"""Merge queued reposts into a single entry per item-warehouse.
+
+	The earliest queued "Item and Warehouse" repost of an item-warehouse replays everything
+	the later ones would, so those are skipped. A "Transaction" repost is skipped as well
+	when all its item-warehouses are covered this way, the surviving entries are moved back
+	to its posting datetime if it is earlier and its voucher is carried over to their
+	affected transactions so that the GL entries are still reposted.
+	"""
+	entries = frappe.get_all(
+		"Repost Item Valuation",
+		filters={"status": "Queued", "docstatus": 1},
+		fields=[
+			"name",
+			"based_on",
+			"voucher_type",
+			"voucher_no",
+			"item_code",
+			"warehouse",
+			"company",
+			"posting_date",
+			"posting_time",
+			"creation",
+			"allow_negative_stock",
+			"allow_zero_rate",
+			"via_landed_cost_voucher",
+			"recreate_stock_ledgers",
+			"affected_transactions",
+			"reposting_data_file",
+			"coalesced_reposts",
+			"saved_sle_replays",
+		],
+	)
+
+	for entry in entries:
+		entry.posting_datetime = get_datetime(f"{entry.posting_date} {entry.posting_time}")
+
+	entries.sort(key=lambda d: (d.posting_datetime, d.creation))
+
+	def get_key(entry, item_code, warehouse):
+		return (entry.company, item_code, warehouse, entry.allow_negative_stock, entry.allow_zero_rate)
+
+	survivors = {}
+	merged = {}
+	for entry in entries:
+		if entry.based_on != "Item and Warehouse" or entry.via_landed_cost_voucher:
+			continue
+
+		key = get_key(entry, entry.item_code, entry.warehouse)
+		if key not in survivors:
+			entry.queued_posting_datetime = entry.posting_datetime
+			survivors[key] = entry
+			continue
+
+		merged.setdefault(survivors[key].name, []).append(entry)
+		entry.saved_sle_replays = get_sle_count_to_replay(
+			entry.item_code, entry.warehouse, entry.posting_datetime
+		)
+
+	for entry in entries:
+		if entry.based_on != "Transaction" or entry.via_landed_cost_voucher or entry.recreate_stock_ledgers:
+			continue
+
+		items_to_be_repost = get_items_to_be_repost(entry.voucher_type, entry.voucher_no)
+		if not items_to_be_repost:
+			continue
+
+		covered_by = []
+		for row in items_to_be_repost:
+			survivor = survivors.get(get_key(entry, row.item_code, row.warehouse))
+			if not survivor:
+				break
+
+			covered_by.append(survivor)
+		else:
+			for survivor in covered_by:
+				survivor.posting_datetime = min(survivor.posting_datetime, entry.posting_datetime)
+
+			merged.setdefault(covered_by[0].name, []).append(entry)
+			entry.saved_sle_replays = sum(
+				get_sle_count_to_replay(row.item_code, row.warehouse, entry.posting_datetime)
+				for row in items_to_be_repost
+			)
+
+	for survivor in survivors.values():
+		merged_entries = merged.get(survivor.name, [])
+		if not merged_entries and survivor.posting_datetime == survivor.queued_posting_datetime:
+			continue
+
+		affected_transactions = get_affected_transactions(survivor)
+		affected_transactions.update(
+			(d.voucher_type, d.voucher_no) for d in merged_entries if d.based_on == "Transaction"
+		)
+
+		# replaying from an earlier transaction costs the survivor the entries in between
+		extra_sle_replays = get_sle_count_to_replay(
+			survivor.item_code, survivor.warehouse, survivor.posting_datetime
+		) - get_sle_count_to_replay(survivor.item_code, survivor.warehouse, survivor.queued_posting_datetime)
+
+		frappe.db.set_value(
+			"Repost Item Valuation",
+			survivor.name,
+			{
+				"posting_date": survivor.posting_datetime.date(),
+				"posting_time": survivor.posting_datetime.time(),
+				"affected_transactions": frappe.as_json(affected_transactions),
+				"coalesced_reposts": cint(survivor.coalesced_reposts) + len(merged_entries),
+				"saved_sle_replays": cint(survivor.saved_sle_replays)
+				+ sum(d.saved_sle_replays for d in merged_entries)
+				- extra_sle_replays,
+			},
+		)
+
+		for entry in merged_entries:
+			frappe.db.set_value(
+				"Repost Item Valuation",
+				entry.name,
+				{"status": "Skipped", "merged_into": survivor.name},
+			)
+
+	if merged and not frappe.in_test:
+		frappe.db.commit()
+
+
+def get_sle_count_to_replay(item_code, warehouse, posting_datetime):
+	return frappe.db.count(
+		"Stock Ledger Entry",
+		{
+			"item_code": item_code,
+			"warehouse": warehouse,
+			"posting_datetime": (">=", posting_datetime),
+			"is_cancelled": 0,
+		},
+	)
+
+
+def get_no_of_parallel_reposting_jobs():
+	"""Returns the number of parallel reposting jobs, 0 if parallel reposting is disabled."""
+	settings = frappe.get_cached_doc("Stock Reposting Settings")
+	if not settings.enable_parallel_reposting or cint(settings.no_of_parallel_reposting) <= 1:
+		return 0
+
+	return cint(settings.no_of_parallel_reposting)
+
+
+def get_parallel_reposting_job_id(shard):
+	return f"repost_item_valuation::shard::{shard}"
+
+
+def enqueue_parallel_reposting(riv_names, no_of_jobs):
+	"""Split queued reposts into independent groups and repost each shard in a separate job.
+
+	Scheduling is skipped while any shard from the previous run is still pending, the
+	remaining entries are picked up again by the next scheduler run."""
+	if not riv_names:
+		return
+
+	if any(is_job_enqueued(get_parallel_reposting_job_id(shard)) for shard in range(no_of_jobs)):
+		return
+
+	groups = get_independent_reposting_groups(riv_names)
+	for shard, shard_entries in enumerate(distribute_reposting_groups(groups, no_of_jobs)):
+		if not shard_entries:
+			continue
+
+		enqueue(
+			repost_entries_in_shard,
+			queue="long",
+			timeout=7200,
+			job_id=get_parallel_reposting_job_id(shard),
+			now=frappe.in_test,
+			riv_names=shard_entries,
+		)
+
+
+def repost_entries_in_shard(riv_names):
+	"""Reposts the given entries in order, skipping the ones already processed elsewhere."""
+	for name in riv_names:
+		status = frappe.db.get_value("Repost Item Valuation", name, "status", for_update=True)
+		if status not in ("Queued", "In Progress"):
+			continue
+
+		doc = frappe.get_doc("Repost Item Valuation", name)
+		repost(doc)
+		doc.deduplicate_similar_repost()
+
+
+def get_independent_reposting_groups(riv_names):
+	"""Group reposts which can not be processed concurrently.
+
+	Two reposts depend on each other when their stock footprints overlap, the footprint
+	being every item touched by a future stock transaction of the reposted items (e.g.
+	the finished good of a manufacture entry consuming a reposted raw material). Such
+	reposts end up in the same group, the order of `riv_names` is kept within a group."""
+
+	parent = {name: name for name in riv_names}
+
+	def find(name):
+		while parent[name] != name:
+			parent[name] = parent[parent[name]]
+			name = parent[name]
+		return name
+
+	item_owner = {}
+	for name in riv_names:
+		for item_code in get_reposting_footprint(name):
+			if item_code not in item_owner:
+				item_owner[item_code] = name
+				continue
+
+			root, other_root = find(name), find(item_owner[item_code])
+			if root != other_root:
+				parent[root] = other_root
+
+	groups = {}
+	for name in riv_names:
+		groups.setdefault(find(name), []).append(name)
+
+	return list(groups.values())
+
+
+def get_reposting_footprint(riv_name):
+	doc = frappe.db.get_value(
+		"Repost Item Valuation",
+		riv_name,
+		[
+			"based_on",
+			"voucher_type",
+			"voucher_no",
+			"item_code",
+			"posting_date",
+			"posting_time",
+			"company",
+			"items_to_be_repost",
+			"reposting_data_file",
+		],
+		as_dict=True,
+	)
+
+	if doc.based_on == "Transaction":
+		items = {d.get("item_code") for d in get_items_to_be_repost(doc.voucher_type, doc.voucher_no, doc)}
+	else:
+		items = {doc.item_code}
+
+	items.discard(None)
+	posting_datetime = get_datetime(f"{doc.posting_date} {doc.posting_time}")
+
+	pending_items = set(items)
+	while pending_items:
+		pending_items = get_items_in_future_vouchers(pending_items, posting_datetime, doc.company) - items
+		items.update(pending_items)
+
+	return items
+
+
+def get_items_in_future_vouchers(items, posting_datetime, company):
+	sle = DocType("Stock Ledger Entry")
+	voucher_sle = DocType("Stock Ledger Entry").as_("voucher_sle")
+
+	return set(
+		(
+			frappe.qb.from_(sle)
+			.inner_join(voucher_sle)
+			.on((voucher_sle.voucher_type == sle.voucher_type) & (voucher_sle.voucher_no == sle.voucher_no))
+			.select(voucher_sle.item_code)
+			.distinct()
+			.where(
+				(sle.item_code.isin(list(items)))
+				& (sle.posting_datetime >= posting_datetime)
+				& (sle.company == company)
+				& (sle.is_cancelled == 0)
+				& (voucher_sle.is_cancelled == 0)
+			)
+		).run(pluck=True)
+	)
+
+
+def distribute_reposting_groups(groups, no_of_jobs):
+	"""Assign groups to shards, largest group first to the least loaded shard."""
+	shards = [[] for _ in range(no_of_jobs)]
+	for group in sorted(groups, key=len, reverse=True):
+		min(shards, key=len).extend(group)
+
+	return shards
+
+
 def get_repost_item_valuation_entries():
 	return frappe.db.sql(
 		""" SELECT name from `tabRepost Item Valuation`
@@ -2,10 +2,10 @@
 # See license.txt
 
 
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
 import frappe
-from frappe.tests import IntegrationTestCase
+from frappe.tests import IntegrationTestCase, change_settings
 from frappe.utils import add_days, add_to_date, now, nowdate, today
 
 from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
@@ -14,7 +14,12 @@ from nexa.controllers.stock_controller import create_item_wise_repost_entries
 from nexa.stock.doctype.item.test_item import make_item
 from nexa.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from nexa.stock.doctype.repost_item_valuation.repost_item_valuation import (
+	coalesce_queued_reposts,
+	distribute_reposting_groups,
+	get_independent_reposting_groups,
 	in_configured_timeslot,
+	repost_entries,
+	repost_entries_in_shard,
 )
 from nexa.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 from nexa.stock.tests.test_utils import StockTestMixin
@@ -296,6 +301,62 @@ class TestRepostItemValuation(IntegrationTestCase, StockTestMixin):
 			gle_filters={"account": "Stock In Hand - TCP1"},
 		)
 
+	def test_gl_repost_updates_changed_amounts_in_place(self):
+		company = "_Test Company with perpetual inventory"
+		se = make_stock_entry(company=company, qty=1, rate=10, target="Stores - TCP1")
+
+		gles = frappe.get_all(
+			"GL Entry",
+			filters={"voucher_no": se.name, "is_cancelled": 0},
+			fields=["name", "debit", "credit"],
+		)
+		for gle in gles:
+			frappe.db.set_value(
+				"GL Entry", gle.name, {"debit": gle.debit and 99, "credit": gle.credit and 99}
+			)
+
+		repost_gle_for_stock_vouchers(stock_vouchers=[(se.doctype, se.name)], posting_date=today())
+
+		reposted_gles = frappe.get_all(
+			"GL Entry",
+			filters={"voucher_no": se.name, "is_cancelled": 0},
+			fields=["name", "debit", "credit"],
+		)
+		self.assertCountEqual(reposted_gles, gles)
+
+	def test_gl_repost_in_place_not_allowed_in_frozen_period(self):
+		company = "_Test Company with perpetual inventory"
+		se = make_stock_entry(company=company, qty=1, rate=10, target="Stores - TCP1")
+
+		gles = frappe.get_all(
+			"GL Entry",
+			filters={"voucher_no": se.name, "is_cancelled": 0},
+			fields=["name", "debit", "credit"],
+		)
+		for gle in gles:
+			frappe.db.set_value(
+				"GL Entry", gle.name, {"debit": gle.debit and 99, "credit": gle.credit and 99}
+			)
+
+		with change_settings(
+			"Accounts Settings", {"acc_frozen_upto": today(), "frozen_accounts_modifier": None}
+		):
+			self.assertRaises(
+				frappe.ValidationError,
+				repost_gle_for_stock_vouchers,
+				stock_vouchers=[(se.doctype, se.name)],
+				posting_date=today(),
+			)
+
+		self.assertTrue(
+			all(
+				d.debit in (0, 99) and d.credit in (0, 99)
+				for d in frappe.get_all(
+					"GL Entry", filters={"voucher_no": se.name, "is_cancelled": 0}, fields=["debit", "credit"]
+				)
+			)
+		)
+
 	def test_duplicate_ple_on_repost(self):
 		from nexa.accounts import utils
 
@@ -455,3 +516,341 @@ class TestRepostItemValuation(IntegrationTestCase, StockTestMixin):
 						"name",
 					)
 				)
+
+	def test_batched_replay_of_future_sles(self):
+		from nexa.stock import stock_ledger
+
+		# lower numbers to simplify test
+		orig_batch_size = stock_ledger.SLE_REPLAY_BATCH_SIZE
+		stock_ledger.SLE_REPLAY_BATCH_SIZE = 2
+		self.addCleanup(setattr, stock_ledger, "SLE_REPLAY_BATCH_SIZE", orig_batch_size)
+
+		item = self.make_item().name
+		warehouse = "_Test Warehouse - _TC"
+
+		for _ in range(5):
+			make_stock_entry(item_code=item, to_warehouse=warehouse, qty=1, rate=10)
+
+		consumption = make_stock_entry(item_code=item, from_warehouse=warehouse, qty=5)
+		self.assertSLEs(consumption, [{"actual_qty": -5, "stock_value_difference": -50}])
+
+		# backdated receipt, future SLEs are replayed in batches of 2
+		make_stock_entry(
+			item_code=item,
+			to_warehouse=warehouse,
+			qty=5,
+			rate=20,
+			posting_date=add_days(today(), -1),
+		)
+
+		self.assertSLEs(
+			consumption,
+			[{"actual_qty": -5, "stock_value_difference": -100, "qty_after_transaction": 5}],
+		)
+
+	def test_repost_resumes_from_checkpoint(self):
+		from nexa.stock.doctype.repost_item_valuation.repost_item_valuation import repost
+
+		item = self.make_item().name
+		warehouse = "_Test Warehouse - _TC"
+
+		receipts = [
+			make_stock_entry(item_code=item, to_warehouse=warehouse, qty=1, rate=10) for _ in range(3)
+		]
+		consumption = make_stock_entry(item_code=item, from_warehouse=warehouse, qty=2)
+
+		def _get_sle(voucher_no):
+			return frappe.db.get_value(
+				"Stock Ledger Entry", {"voucher_no": voucher_no, "is_cancelled": 0}, "name"
+			)
+
+		# entries before the checkpoint are not replayed again, entries after it are
+		frappe.db.set_value("Stock Ledger Entry", _get_sle(receipts[0].name), "stock_value_difference", 999)
+		frappe.db.set_value("Stock Ledger Entry", _get_sle(consumption.name), "stock_value_difference", 0)
+
+		riv = frappe.get_doc(
+			doctype="Repost Item Valuation",
+			item_code=item,
+			warehouse=warehouse,
+			based_on="Item and Warehouse",
+			posting_date=receipts[0].posting_date,
+			posting_time=receipts[0].posting_time,
+		)
+		riv.flags.dont_run_in_test = True
+		riv.submit()
+		riv.db_set(
+			"reposting_checkpoint",
+			frappe.as_json(
+				{
+					"current_index": 0,
+					"item_code": item,
+					"warehouse": warehouse,
+					"sle_id": _get_sle(receipts[-1].name),
+				}
+			),
+		)
+
+		repost(riv)
+
+		self.assertEqual(
+			frappe.db.get_value("Stock Ledger Entry", _get_sle(receipts[0].name), "stock_value_difference"),
+			999,
+		)
+		self.assertSLEs(consumption, [{"actual_qty": -2, "stock_value_difference": -20}])
+
+		riv.reload()
+		self.assertEqual(riv.status, "Completed")
+		self.assertFalse(riv.reposting_checkpoint)
+
+		# transactions replayed before the checkpoint are still reposted
+		self.assertTrue(
+			{(d.doctype, d.name) for d in [*receipts, consumption]}
+			<= {tuple(d) for d in frappe.parse_json(riv.affected_transactions)}
+		)
+
+	def test_independent_reposting_groups(self):
+		warehouse = "_Test Warehouse - _TC"
+		item_a, item_b, item_c = (self.make_item().name for _ in range(3))
+
+		for item in (item_a, item_b, item_c):
+			make_stock_entry(item_code=item, to_warehouse=warehouse, qty=10, rate=10)
+
+		# item_b's valuation depends on item_a through a common transaction
+		se = make_stock_entry(item_code=item_a, from_warehouse=warehouse, qty=1, do_not_save=True)
+		se.append(
+			"items",
+			{
+				"item_code": item_b,
+				"t_warehouse": warehouse,
+				"qty": 1,
+				"conversion_factor": 1.0,
+				"uom": "Nos",
+				"stock_uom": "Nos",
+			},
+		)
+		se.purpose = se.stock_entry_type = "Repack"
+		se.items[0].s_warehouse = warehouse
+		se.items[0].t_warehouse = None
+		se.submit()
+
+		rivs = []
+		for item in (item_a, item_b, item_c):
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item,
+				warehouse=warehouse,
+				based_on="Item and Warehouse",
+				posting_date=add_days(today(), -1),
+				posting_time="00:00:00",
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv.name)
+
+		groups = get_independent_reposting_groups(rivs)
+		self.assertCountEqual(groups, [[rivs[0], rivs[1]], [rivs[2]]])
+
+		shards = distribute_reposting_groups(groups, 2)
+		self.assertCountEqual(shards, [[rivs[0], rivs[1]], [rivs[2]]])
+
+		for name in rivs:
+			frappe.db.set_value("Repost Item Valuation", name, "status", "Skipped")
+
+	def test_parallel_repost_matches_serial_repost(self):
+		def make_backdated_transactions():
+			warehouse = "_Test Warehouse - _TC"
+			items = [self.make_item().name for _ in range(3)]
+
+			for item in items:
+				make_stock_entry(
+					item_code=item,
+					to_warehouse=warehouse,
+					qty=10,
+					rate=10,
+					posting_date=add_days(today(), -2),
+				)
+
+			# item_b is valued from item_a, item_c is independent of both
+			se = make_stock_entry(item_code=items[0], from_warehouse=warehouse, qty=5, do_not_save=True)
+			se.append(
+				"items",
+				{
+					"item_code": items[1],
+					"t_warehouse": warehouse,
+					"qty": 5,
+					"conversion_factor": 1.0,
+					"uom": "Nos",
+					"stock_uom": "Nos",
+				},
+			)
+			se.purpose = se.stock_entry_type = "Repack"
+			se.items[0].s_warehouse = warehouse
+			se.items[0].t_warehouse = None
+			se.submit()
+			make_stock_entry(item_code=items[2], from_warehouse=warehouse, qty=5)
+
+			frappe.flags.dont_execute_stock_reposts = True
+			for item, rate in ((items[0], 20), (items[2], 30)):
+				make_stock_entry(
+					item_code=item,
+					to_warehouse=warehouse,
+					qty=10,
+					rate=rate,
+					posting_date=add_days(today(), -3),
+				)
+			frappe.flags.dont_execute_stock_reposts = False
+
+			return items
+
+		def get_sle_values(items):
+			return [
+				frappe.get_all(
+					"Stock Ledger Entry",
+					filters={"item_code": item, "is_cancelled": 0},
+					fields=["actual_qty", "qty_after_transaction", "valuation_rate", "stock_value"],
+					order_by="posting_datetime, creation",
+					as_list=True,
+				)
+				for item in items
+			]
+
+		serial_items = make_backdated_transactions()
+		repost_entries()
+
+		parallel_items = make_backdated_transactions()
+		sle_values_before_repost = get_sle_values(parallel_items)
+		with (
+			change_settings(
+				"Stock Reposting Settings", {"enable_parallel_reposting": 1, "no_of_parallel_reposting": 2}
+			),
+			patch(
+				"nexa.stock.doctype.repost_item_valuation.repost_item_valuation.repost_entries_in_shard",
+				wraps=repost_entries_in_shard,
+			) as repost_shard,
+		):
+			repost_entries()
+
+		# item_a with item_b and item_c are reposted in separate jobs
+		self.assertEqual(repost_shard.call_count, 2)
+		self.assertNotEqual(get_sle_values(parallel_items), sle_values_before_repost)
+		self.assertEqual(get_sle_values(parallel_items), get_sle_values(serial_items))
+
+	def test_coalescing_of_queued_reposts(self):
+		item = self.make_item().name
+		warehouse = "_Test Warehouse - _TC"
+
+		receipts = [
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=1,
+				rate=10,
+				posting_date=add_days(today(), -days),
+			)
+			for days in (3, 2, 1)
+		]
+
+		rivs = []
+		for receipt in receipts:
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item,
+				warehouse=warehouse,
+				based_on="Item and Warehouse",
+				posting_date=receipt.posting_date,
+				posting_time=receipt.posting_time,
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv)
+
+		transaction_riv = frappe.get_doc(
+			doctype="Repost Item Valuation",
+			based_on="Transaction",
+			voucher_type=receipts[-1].doctype,
+			voucher_no=receipts[-1].name,
+			posting_date=receipts[-1].posting_date,
+			posting_time=receipts[-1].posting_time,
+		)
+		transaction_riv.flags.dont_run_in_test = True
+		transaction_riv.submit()
+
+		coalesce_queued_reposts()
+
+		for doc in rivs[1:] + [transaction_riv]:
+			doc.reload()
+			self.assertEqual(doc.status, "Skipped")
+			self.assertEqual(doc.merged_into, rivs[0].name)
+
+		rivs[0].reload()
+		self.assertEqual(rivs[0].status, "Queued")
+		self.assertEqual(rivs[0].coalesced_reposts, 3)
+		# later reposts would have replayed 2 + 1 + 1 entries
+		self.assertEqual(rivs[0].saved_sle_replays, 4)
+		self.assertIn(
+			(transaction_riv.voucher_type, transaction_riv.voucher_no),
+			{tuple(d) for d in frappe.parse_json(rivs[0].affected_transactions)},
+		)
+
+		rivs[0].db_set("status", "Skipped")
+
+	def test_coalescing_starts_from_earliest_repost(self):
+		item = self.make_item().name
+		warehouse = "_Test Warehouse - _TC"
+
+		receipts = [
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=1,
+				rate=10,
+				posting_date=add_days(today(), -days),
+			)
+			for days in (3, 2, 1)
+		]
+
+		transaction_riv = frappe.get_doc(
+			doctype="Repost Item Valuation",
+			based_on="Transaction",
+			voucher_type=receipts[0].doctype,
+			voucher_no=receipts[0].name,
+			posting_date=receipts[0].posting_date,
+			posting_time=receipts[0].posting_time,
+		)
+		transaction_riv.flags.dont_run_in_test = True
+		transaction_riv.submit()
+
+		rivs = []
+		for receipt in receipts[1:]:
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item,
+				warehouse=warehouse,
+				based_on="Item and Warehouse",
+				posting_date=receipt.posting_date,
+				posting_time=receipt.posting_time,
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv)
+
+		coalesce_queued_reposts()
+
+		for doc in [rivs[1], transaction_riv]:
+			doc.reload()
+			self.assertEqual(doc.status, "Skipped")
+			self.assertEqual(doc.merged_into, rivs[0].name)
+
+		# the merged repost starts from the earlier transaction
+		rivs[0].reload()
+		self.assertEqual(rivs[0].status, "Queued")
+		self.assertEqual(str(rivs[0].posting_date), str(receipts[0].posting_date))
+		self.assertEqual(rivs[0].coalesced_reposts, 2)
+		# 3 + 1 entries not replayed again, less the one entry the merged repost replays in addition
+		self.assertEqual(rivs[0].saved_sle_replays, 3)
+		self.assertIn(
+			(transaction_riv.voucher_type, transaction_riv.voucher_no),
+			{tuple(d) for d in frappe.parse_json(rivs[0].affected_transactions)},
+		)
+
+		rivs[0].db_set("status", "Skipped")
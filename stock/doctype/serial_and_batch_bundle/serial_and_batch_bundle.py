@@ -3,7 +3,6 @@
 
 import collections
 import csv
-import json
 from collections import Counter, defaultdict
 
 import frappe
@@ -30,7 +29,7 @@ from nexa.stock.serial_batch_bundle import (
 	get_batches_from_bundle,
 )
 from nexa.stock.serial_batch_bundle import get_serial_nos as get_serial_nos_from_bundle
-from nexa.stock.valuation import FIFOValuation
+from nexa.stock.valuation import FIFOValuation, dump_stock_queue
 
 
 class SerialNoExistsInFutureTransactionError(frappe.ValidationError):
@@ -515,7 +514,7 @@ class SerialandBatchBundle(Document):
 					else:
 						d.incoming_rate = abs(flt(sn_obj.batch_avg_rate.get(d.batch_no)))
 						stock_queue.append([d.qty, d.incoming_rate])
-					d.stock_queue = json.dumps(stock_queue)
+					d.stock_queue = dump_stock_queue(stock_queue)
 				else:
 					d.incoming_rate = abs(flt(sn_obj.batch_avg_rate.get(d.batch_no)))
 
@@ -665,7 +664,7 @@ class SerialandBatchBundle(Document):
 
 			if stock_queue and valuation_method == "FIFO" and d.batch_no in batches:
 				stock_queue.append([d.qty, d.incoming_rate])
-				d.stock_queue = json.dumps(stock_queue)
+				d.stock_queue = dump_stock_queue(stock_queue)
 
 			if save:
 				d.db_set(
@@ -12,6 +12,10 @@ from frappe.utils import add_days, get_date_str, get_link_to_form, nowtime, pars
 from frappe.utils.background_jobs import enqueue
 
 from nexa.stock.doctype.inventory_dimension.inventory_dimension import get_inventory_dimensions
+from nexa.stock.doctype.stock_ledger_snapshot.stock_ledger_snapshot import (
+	create_stock_ledger_snapshots,
+	remove_stock_ledger_snapshots,
+)
 
 
 class StockClosingEntry(Document):
@@ -89,6 +93,7 @@ class StockClosingEntry(Document):
 	def remove_stock_closing(self):
 		table = frappe.qb.DocType("Stock Closing Balance")
 		frappe.qb.from_(table).delete().where(table.stock_closing_entry == self.name).run()
+		remove_stock_ledger_snapshots(self.name)
 
 	@frappe.whitelist()
 	def enqueue_job(self):
@@ -129,6 +134,8 @@ class StockClosingEntry(Document):
 			new_doc.company = self.company
 			new_doc.save()
 
+		create_stock_ledger_snapshots(self.name, self.company, self.to_date)
+
 	def get_prepared_data(self):
 		if attachments := get_attachments(self.doctype, self.name):
 			attachment = attachments[0]
@@ -969,6 +969,99 @@ class TestStockLedgerEntry(IntegrationTestCase, StockTestMixin):
 		# same exact queue should be transferred
 		self.assertSLEs(transfer, expected_queues, sle_filters={"warehouse": target})
 
+	def test_bulk_insert_of_sl_entries(self):
+		from nexa.stock import stock_ledger
+
+		self.addCleanup(
+			setattr, stock_ledger, "SLE_BULK_INSERT_THRESHOLD", stock_ledger.SLE_BULK_INSERT_THRESHOLD
+		)
+		stock_ledger.SLE_BULK_INSERT_THRESHOLD = 2
+
+		item = make_item().name
+		source = "_Test Warehouse - _TC"
+		target = "Stores - _TC"
+
+		rates = [10 * i for i in range(1, 6)]
+
+		receipt = make_stock_entry(item_code=item, target=source, qty=10, do_not_save=True, rate=10)
+		for rate in rates[1:]:
+			row = frappe.copy_doc(receipt.items[0], ignore_no_copy=False)
+			row.basic_rate = rate
+			receipt.append("items", row)
+
+		receipt.save()
+		receipt.submit()
+
+		expected_queues = []
+		for idx in range(1, len(rates) + 1):
+			expected_queues.append(
+				{
+					"stock_queue": [[10, 10 * i] for i in range(1, idx + 1)],
+					"qty_after_transaction": 10 * idx,
+					"stock_value_difference": 10 * rates[idx - 1],
+				}
+			)
+		self.assertSLEs(receipt, expected_queues)
+
+		transfer = make_stock_entry(
+			item_code=item, source=source, target=target, qty=20, do_not_save=True, rate=10
+		)
+		transfer.append("items", frappe.copy_doc(transfer.items[0], ignore_no_copy=False))
+		transfer.save()
+		transfer.submit()
+
+		self.assertSLEs(
+			transfer,
+			[
+				{"stock_queue": [[10, 30], [10, 40], [10, 50]], "stock_value_difference": -300},
+				{"stock_queue": [[10, 50]], "stock_value_difference": -700},
+			],
+			sle_filters={"warehouse": source},
+		)
+		self.assertSLEs(
+			transfer,
+			[
+				{"stock_queue": [[10, 10], [10, 20]]},
+				{"stock_queue": [[10, 10], [10, 20], [10, 30], [10, 40]]},
+			],
+			sle_filters={"warehouse": target},
+		)
+
+		self.assertEqual(
+			frappe.db.get_value("Bin", {"item_code": item, "warehouse": source}, "actual_qty"), 10
+		)
+		self.assertEqual(
+			frappe.db.get_value("Bin", {"item_code": item, "warehouse": target}, "actual_qty"), 40
+		)
+		self.assertEqual(
+			frappe.db.get_value("Bin", {"item_code": item, "warehouse": target}, "stock_value"), 1000
+		)
+
+	def test_backdated_moving_average_repost_of_plain_entries(self):
+		item = make_item(properties={"valuation_method": "Moving Average"}).name
+		warehouse = "Stores - _TC"
+		common = {"company": "_Test Company", "warehouse": warehouse, "item_code": item}
+
+		make_purchase_receipt(**common, qty=10, rate=100, posting_date=add_days(today(), -3))
+		dn = create_delivery_note(
+			**common,
+			qty=5,
+			rate=150,
+			posting_date=add_days(today(), -2),
+			expense_account="Cost of Goods Sold - _TC",
+			cost_center="Main - _TC",
+		)
+		pr = make_purchase_receipt(**common, qty=10, rate=200, posting_date=add_days(today(), -1))
+
+		# backdated receipt revalues every later entry through the moving average
+		make_purchase_receipt(**common, qty=10, rate=50, posting_date=add_days(today(), -4))
+
+		self.assertSLEs(dn, [{"qty_after_transaction": 15, "stock_value_difference": -375}])
+		self.assertSLEs(
+			pr,
+			[{"qty_after_transaction": 25, "valuation_rate": 125, "stock_value": 3125}],
+		)
+
 	def test_fifo_multi_item_repack_consumption(self):
 		rm = make_item("_TestFifoRepackRM")
 		packed = make_item("_TestFifoRepackFinished")
@@ -0,0 +1,157 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, flt, get_datetime, getdate, now
+
+
+class StockLedgerSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		ageing_fifo_queue: DF.LongText | None
+		ageing_total_qty: DF.Float
+		company: DF.Link | None
+		item_code: DF.Link | None
+		posting_datetime: DF.Datetime | None
+		qty_after_transaction: DF.Float
+		stock_closing_entry: DF.Link | None
+		stock_ledger_entry: DF.Link | None
+		stock_queue: DF.LongText | None
+		stock_value: DF.Currency
+		valuation_rate: DF.Currency
+		warehouse: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Ledger Snapshot", ["stock_closing_entry", "item_code", "warehouse"])
+
+
+def create_stock_ledger_snapshots(stock_closing_entry, company, to_date):
+	"""Snapshot the last stock ledger entry of every item-warehouse on or before `to_date`"""
+	sles = frappe.db.sql(
+		"""
+		select
+			sle.name, sle.item_code, sle.warehouse, sle.posting_datetime,
+			sle.qty_after_transaction, sle.valuation_rate, sle.stock_value, sle.stock_queue
+		from (
+			select name, row_number() over (
+				partition by item_code, warehouse
+				order by posting_datetime desc, creation desc
+			) as row_no
+			from `tabStock Ledger Entry`
+			where company = %(company)s and is_cancelled = 0 and posting_datetime < %(till)s
+		) latest_sle
+		inner join `tabStock Ledger Entry` sle on sle.name = latest_sle.name
+		where latest_sle.row_no = 1
+		""",
+		{"company": company, "till": get_datetime(add_days(getdate(to_date), 1))},
+		as_dict=True,
+	)
+
+	if not sles:
+		return
+
+	ageing_slots = get_ageing_slots(company, to_date)
+
+	timestamp = now()
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"company",
+		"stock_closing_entry",
+		"stock_ledger_entry",
+		"item_code",
+		"warehouse",
+		"posting_datetime",
+		"qty_after_transaction",
+		"valuation_rate",
+		"stock_value",
+		"stock_queue",
+		"ageing_total_qty",
+		"ageing_fifo_queue",
+	]
+
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			frappe.session.user,
+			frappe.session.user,
+			company,
+			stock_closing_entry,
+			sle.name,
+			sle.item_code,
+			sle.warehouse,
+			sle.posting_datetime,
+			sle.qty_after_transaction,
+			sle.valuation_rate,
+			sle.stock_value,
+			sle.stock_queue,
+			*get_ageing_values(ageing_slots.get((sle.item_code, sle.warehouse))),
+		)
+		for sle in sles
+	]
+
+	frappe.db.bulk_insert("Stock Ledger Snapshot", fields, values)
+
+
+def get_ageing_slots(company, to_date):
+	"""FIFO age slots of every item-warehouse, which the Stock Ageing report resumes from"""
+	from nexa.stock.report.stock_ageing.stock_ageing import FIFOSlots
+
+	filters = frappe._dict(
+		{"company": company, "to_date": str(getdate(to_date)), "show_warehouse_wise_stock": 1}
+	)
+
+	return FIFOSlots(filters).generate()
+
+
+def get_ageing_values(slots):
+	if not slots:
+		return (0.0, None)
+
+	return (flt(slots.get("total_qty")), frappe.as_json(slots["fifo_queue"], indent=None))
+
+
+def invalidate_stock_ledger_snapshots(sl_entries, posting_date):
+	"""
+	Remove the snapshots of the item-warehouses of `sl_entries`, posted or cancelled on
+	`posting_date`, which were taken on or after it.
+	"""
+	closing_entries = frappe.get_all(
+		"Stock Closing Entry",
+		filters={"company": sl_entries[0].get("company"), "docstatus": 1, "to_date": (">=", posting_date)},
+		pluck="name",
+	)
+	if not closing_entries:
+		return
+
+	snapshot = frappe.qb.DocType("Stock Ledger Snapshot")
+	(
+		frappe.qb.from_(snapshot)
+		.delete()
+		.where(
+			(snapshot.stock_closing_entry.isin(closing_entries))
+			& (snapshot.item_code.isin(list({sle.item_code for sle in sl_entries})))
+			& (snapshot.warehouse.isin(list({sle.warehouse for sle in sl_entries})))
+		)
+	).run()
+
+
+def remove_stock_ledger_snapshots(stock_closing_entry):
+	snapshot = frappe.qb.DocType("Stock Ledger Snapshot")
+	frappe.qb.from_(snapshot).delete().where(snapshot.stock_closing_entry == stock_closing_entry).run()
@@ -0,0 +1,152 @@
+# Copyright (c) 2025, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, getdate, today
+
+from nexa.stock.doctype.item.test_item import make_item
+from nexa.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from nexa.stock.doctype.stock_ledger_snapshot.stock_ledger_snapshot import (
+	create_stock_ledger_snapshots,
+	remove_stock_ledger_snapshots,
+)
+from nexa.stock.report.stock_ageing.stock_ageing import FIFOSlots
+
+
+class IntegrationTestStockLedgerSnapshot(IntegrationTestCase):
+	def setUp(self):
+		self.item = make_item().name
+		self.warehouse = "_Test Warehouse - _TC"
+
+	def make_closing_entry(self, to_date):
+		closing_entry = frappe.get_doc(
+			{
+				"doctype": "Stock Closing Entry",
+				"company": "_Test Company",
+				"from_date": add_days(to_date, -7),
+				"to_date": to_date,
+				"status": "Completed",
+				"docstatus": 1,
+			}
+		)
+		closing_entry.db_insert()
+		self.addCleanup(remove_stock_ledger_snapshots, closing_entry.name)
+
+		create_stock_ledger_snapshots(closing_entry.name, "_Test Company", to_date)
+		return closing_entry.name
+
+	def test_backdated_entry_before_closing_not_allowed(self):
+		make_stock_entry(
+			item_code=self.item,
+			to_warehouse=self.warehouse,
+			qty=10,
+			rate=10,
+			posting_date=add_days(today(), -5),
+		)
+		closing_entry = self.make_closing_entry(add_days(today(), -3))
+		snapshot = {"item_code": self.item, "stock_closing_entry": closing_entry}
+		self.assertEqual(frappe.db.get_value("Stock Ledger Snapshot", snapshot, "qty_after_transaction"), 10)
+
+		# entries before later ones need a repost, which the closing entry does not allow
+		self.assertRaises(
+			frappe.ValidationError,
+			make_stock_entry,
+			item_code=self.item,
+			to_warehouse=self.warehouse,
+			qty=5,
+			rate=10,
+			posting_date=add_days(today(), -6),
+		)
+
+	def test_backdated_entry_invalidates_snapshot(self):
+		make_stock_entry(
+			item_code=self.item,
+			to_warehouse=self.warehouse,
+			qty=10,
+			rate=10,
+			posting_date=add_days(today(), -5),
+		)
+		closing_entry = self.make_closing_entry(add_days(today(), -3))
+		snapshot = {"item_code": self.item, "stock_closing_entry": closing_entry}
+		self.assertTrue(frappe.db.exists("Stock Ledger Snapshot", snapshot))
+
+		# no later entries, so no repost, but the snapshot no longer holds
+		make_stock_entry(
+			item_code=self.item,
+			to_warehouse=self.warehouse,
+			qty=5,
+			rate=10,
+			posting_date=add_days(today(), -4),
+		)
+		self.assertFalse(frappe.db.exists("Stock Ledger Snapshot", snapshot))
+
+	def test_ageing_resumes_from_snapshot(self):
+		for days, qty in ((-5, 10), (-4, 5)):
+			make_stock_entry(
+				item_code=self.item,
+				to_warehouse=self.warehouse,
+				qty=qty,
+				rate=10,
+				posting_date=add_days(today(), days),
+			)
+
+		self.make_closing_entry(add_days(today(), -3))
+		self.assertEqual(
+			frappe.parse_json(
+				frappe.db.get_value("Stock Ledger Snapshot", {"item_code": self.item}, "ageing_fifo_queue")
+			),
+			[[10, str(getdate(add_days(today(), -5))), 100], [5, str(getdate(add_days(today(), -4))), 50]],
+		)
+
+		make_stock_entry(item_code=self.item, from_warehouse=self.warehouse, qty=12)
+
+		filters = frappe._dict(
+			{
+				"company": "_Test Company",
+				"to_date": today(),
+				"item_code": self.item,
+				"show_warehouse_wise_stock": 1,
+			}
+		)
+		slots = FIFOSlots(filters).generate()[(self.item, self.warehouse)]
+		self.assertEqual(slots["fifo_queue"], [[3, getdate(add_days(today(), -4)), 30]])
+		self.assertEqual(slots["total_qty"], 3)
+
+	def test_ageing_replays_stale_snapshot(self):
+		make_stock_entry(
+			item_code=self.item,
+			to_warehouse=self.warehouse,
+			qty=10,
+			rate=10,
+			posting_date=add_days(today(), -5),
+		)
+		self.make_closing_entry(add_days(today(), -3))
+
+		# a backdated entry before the snapshot, with the snapshot left in place
+		with patch("nexa.stock.stock_ledger.invalidate_stock_ledger_snapshots"):
+			make_stock_entry(
+				item_code=self.item,
+				to_warehouse=self.warehouse,
+				qty=5,
+				rate=10,
+				posting_date=add_days(today(), -4),
+			)
+		self.assertTrue(frappe.db.exists("Stock Ledger Snapshot", {"item_code": self.item}))
+
+		filters = frappe._dict(
+			{
+				"company": "_Test Company",
+				"to_date": today(),
+				"item_code": self.item,
+				"show_warehouse_wise_stock": 1,
+			}
+		)
+		slots = FIFOSlots(filters).generate()[(self.item, self.warehouse)]
+		self.assertEqual(
+			slots["fifo_queue"],
+			[[10, getdate(add_days(today(), -5)), 100], [5, getdate(add_days(today(), -4)), 50]],
+		)
+		self.assertEqual(slots["total_qty"], 15)
@@ -2,8 +2,10 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import datetime
 import json
 import typing
+from contextlib import contextmanager
 from functools import WRAPPER_ASSIGNMENTS, wraps
 
 import frappe
@@ -166,6 +168,102 @@ def get_item_details(
 	return out
 
 
+@frappe.whitelist()
+def get_item_details_for_items(items, doc=None, for_validate=False, overwrite_warehouse=True) -> list:
+	"""
+	Item details of all the rows of a transaction, in the same order as `items`, which is a list
+	of `get_item_details` ctx. Item Prices and Bins of all the items are fetched at once.
+	"""
+	items = [ItemDetailsCtx(d) for d in parse_json(items)]
+
+	if isinstance(doc, str):
+		doc = json.loads(doc)
+
+	with item_details_batch(items):
+		return [
+			get_item_details(ctx, doc, for_validate=for_validate, overwrite_warehouse=overwrite_warehouse)
+			for ctx in items
+		]
+
+
+@contextmanager
+def item_details_batch(items):
+	"""
+	Share the lookups of the `get_item_details` calls made for the rows of one transaction.
+	`items` are the rows, or their ctx, which need `item_code` and the price list fields.
+	"""
+	if frappe.flags.item_details_batch is not None:
+		yield
+		return
+
+	frappe.flags.item_details_batch = get_item_details_batch(items)
+	try:
+		yield
+	finally:
+		frappe.flags.item_details_batch = None
+
+
+def get_item_details_batch(items):
+	item_codes = {d.get("item_code") for d in items if d.get("item_code")}
+	price_lists = {
+		d.get("price_list") or d.get("selling_price_list") or d.get("buying_price_list") for d in items
+	}
+	price_lists.discard(None)
+	price_lists.discard("")
+
+	batch = frappe._dict(item_prices={}, bins={}, price_list_details={})
+	if not item_codes:
+		return batch
+
+	item_codes.update(
+		frappe.get_all(
+			"Item",
+			filters={"name": ("in", list(item_codes)), "variant_of": ("is", "set")},
+			pluck="variant_of",
+		)
+	)
+
+	# prices of items missing from the price list are known to be missing as well
+	for item_code in item_codes:
+		for price_list in price_lists:
+			batch.item_prices[(item_code, price_list)] = []
+
+	if price_lists:
+		item_prices = frappe.get_all(
+			"Item Price",
+			filters={"item_code": ("in", list(item_codes)), "price_list": ("in", list(price_lists))},
+			fields=[
+				"name",
+				"item_code",
+				"price_list",
+				"price_list_rate",
+				"uom",
+				"batch_no",
+				"customer",
+				"supplier",
+				"valid_from",
+				"valid_upto",
+			],
+		)
+
+		for d in item_prices:
+			batch.item_prices[(d.item_code, d.price_list)].append(d)
+
+	for item_code in item_codes:
+		batch.bins[item_code] = {}
+
+	bins = frappe.get_all(
+		"Bin",
+		filters={"item_code": ("in", list(item_codes))},
+		fields=["item_code", "warehouse", "projected_qty", "actual_qty", "reserved_qty"],
+	)
+
+	for d in bins:
+		batch.bins[d.item_code][d.warehouse] = d
+
+	return batch
+
+
 def remove_standard_fields(out: ItemDetails):
 	for key in child_table_fields + default_fields:
 		out.pop(key, None)
@@ -1021,6 +1119,10 @@ def insert_item_price(ctx: ItemDetailsCtx):
 	):
 		return
 
+	# the price is added or updated below, rows after this one have to read it from the database
+	if frappe.flags.item_details_batch:
+		frappe.flags.item_details_batch.item_prices.pop((ctx.item_code, ctx.price_list), None)
+
 	item_price = frappe.db.get_value(
 		"Item Price",
 		{
@@ -1089,6 +1191,12 @@ def get_item_price(
 	"""
 	pctx: ItemPriceCtx = frappe._dict(pctx)
 
+	batch = frappe.flags.item_details_batch
+	if batch and (item_code, pctx.price_list) in batch.item_prices:
+		return get_item_price_from_batch(
+			batch.item_prices[(item_code, pctx.price_list)], pctx, ignore_party, force_batch_no
+		)
+
 	ip = frappe.qb.DocType("Item Price")
 	query = (
 		frappe.qb.from_(ip)
@@ -1126,6 +1234,55 @@ def get_item_price(
 	return query.run(as_dict=True)
 
 
+def get_item_price_from_batch(item_prices, pctx: ItemPriceCtx, ignore_party=False, force_batch_no=False):
+	"""`get_item_price` evaluated on the Item Prices fetched for the batch"""
+	transaction_date = getdate(pctx.transaction_date) if pctx.transaction_date else None
+
+	matches = []
+	for d in item_prices:
+		if (d.uom or "") not in ("", pctx.uom):
+			continue
+
+		if force_batch_no:
+			if not pctx.batch_no or d.batch_no != pctx.batch_no:
+				continue
+		elif (d.batch_no or "") not in ("", pctx.batch_no):
+			continue
+
+		if not ignore_party:
+			if pctx.customer:
+				if d.customer != pctx.customer:
+					continue
+			elif pctx.supplier:
+				if d.supplier != pctx.supplier:
+					continue
+			elif d.customer or d.supplier:
+				continue
+
+		if transaction_date and not (
+			getdate(d.valid_from or "2000-01-01") <= transaction_date <= getdate(d.valid_upto or "2500-12-31")
+		):
+			continue
+
+		matches.append(d)
+
+	if not matches:
+		return []
+
+	# latest validity first, then batch specific prices, then uom specific prices
+	d = max(
+		matches,
+		key=lambda d: (
+			d.valid_from is not None,
+			d.valid_from or datetime.date.min,
+			d.batch_no or "",
+			d.uom is not None,
+			d.uom or "",
+		),
+	)
+	return [frappe._dict(name=d.name, price_list_rate=d.price_list_rate, uom=d.uom)]
+
+
 @frappe.whitelist()
 def get_batch_based_item_price(pctx: ItemPriceCtx | dict | str, item_code) -> float:
 	pctx = parse_json(pctx)
@@ -1389,6 +1546,19 @@ def get_bin_details(item_code, warehouse, company=None, include_child_warehouses
 
 		warehouses = get_child_warehouses(warehouse) if include_child_warehouses else [warehouse]
 
+		batch = frappe.flags.item_details_batch
+		if batch and item_code in batch.bins:
+			bins = [batch.bins[item_code][wh] for wh in warehouses if wh in batch.bins[item_code]]
+			bin_details = {
+				field: sum(flt(d[field]) for d in bins)
+				for field in ("projected_qty", "actual_qty", "reserved_qty")
+			}
+
+			if company:
+				bin_details["company_total_stock"] = get_company_total_stock(item_code, company)
+
+			return bin_details
+
 		bin = frappe.qb.DocType("Bin")
 		bin_details = (
 			frappe.qb.from_(bin)
@@ -1502,6 +1672,18 @@ def get_price_list_currency_and_exchange_rate(ctx: ItemDetailsCtx):
 	elif ctx.doctype in ["Purchase Order", "Purchase Receipt", "Purchase Invoice"]:
 		ctx.update({"exchange_rate": "for_buying"})
 
+	batch = frappe.flags.item_details_batch
+	key = (
+		ctx.price_list,
+		ctx.price_list_currency,
+		ctx.plc_conversion_rate,
+		ctx.company,
+		ctx.transaction_date,
+		ctx.exchange_rate,
+	)
+	if batch and key in batch.price_list_details:
+		return frappe._dict(batch.price_list_details[key])
+
 	price_list_details = get_price_list_details(ctx.price_list)
 
 	price_list_currency = price_list_details.get("currency")
@@ -1519,7 +1701,7 @@ def get_price_list_currency_and_exchange_rate(ctx: ItemDetailsCtx):
 			or plc_conversion_rate
 		)
 
-	return frappe._dict(
+	details = frappe._dict(
 		{
 			"price_list_currency": price_list_currency,
 			"price_list_uom_dependant": price_list_uom_dependant,
@@ -1527,6 +1709,11 @@ def get_price_list_currency_and_exchange_rate(ctx: ItemDetailsCtx):
 		}
 	)
 
+	if batch:
+		batch.price_list_details[key] = frappe._dict(details)
+
+	return details
+
 
 @frappe.whitelist()
 def get_default_bom(item_code=None):
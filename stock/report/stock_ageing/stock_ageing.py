@@ -2,12 +2,14 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import json
 from collections.abc import Iterator
 from operator import itemgetter
 
 import frappe
 from frappe import _
-from frappe.utils import cint, date_diff, flt, get_datetime
+from frappe.query_builder.functions import Min
+from frappe.utils import cint, date_diff, flt, get_datetime, getdate
 
 from nexa.stock.doctype.serial_no.serial_no import get_serial_nos
 
@@ -232,6 +234,8 @@ class FIFOSlots:
 		self.serial_no_batch_purchase_details = {}
 		self.filters = filters
 		self.sle = sle
+		self.snapshot_entry = None
+		self.stale_snapshots = []
 
 	def generate(self) -> dict:
 		"""
@@ -252,6 +256,12 @@ class FIFOSlots:
 
 		bundle_wise_serial_nos = frappe._dict({})
 		if stock_ledger_entries is None:
+			self.snapshot_entry = self.__get_snapshot_entry()
+			if self.snapshot_entry:
+				# resume from the slots persisted with the last stock closing
+				self.stale_snapshots = self.__get_stale_snapshots()
+				self.__restore_slots_from_snapshots()
+
 			bundle_wise_serial_nos = self.__get_bundle_wise_serial_nos()
 
 		with frappe.db.unbuffered_cursor():
@@ -289,6 +299,128 @@ class FIFOSlots:
 
 		return self.item_details
 
+	def __get_snapshot_entry(self) -> frappe._dict | None:
+		"Last completed Stock Closing Entry on or before the report date, if any."
+		if not self.filters.get("company"):
+			return None
+
+		entries = frappe.get_all(
+			"Stock Closing Entry",
+			filters={
+				"company": self.filters.get("company"),
+				"docstatus": 1,
+				"status": "Completed",
+				"to_date": ("<=", self.filters.get("to_date")),
+			},
+			fields=["name", "to_date"],
+			order_by="to_date desc",
+			limit=1,
+		)
+
+		return entries[0] if entries else None
+
+	def __get_stale_snapshots(self) -> list:
+		"Snapshots of item-warehouses with entries up to the closing date created after the snapshot."
+		snapshot = frappe.qb.DocType("Stock Ledger Snapshot")
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		return (
+			frappe.qb.from_(snapshot)
+			.join(sle)
+			.on((sle.item_code == snapshot.item_code) & (sle.warehouse == snapshot.warehouse))
+			.select(snapshot.name)
+			.distinct()
+			.where(
+				(snapshot.stock_closing_entry == self.snapshot_entry.name)
+				& (sle.creation > snapshot.creation)
+				& (sle.posting_date <= self.snapshot_entry.to_date)
+			)
+		).run(pluck=True)
+
+	def __get_snapshot_condition(self, snapshot):
+		"Snapshots of the closing entry which still hold, the other item-warehouses are replayed in full."
+		condition = (snapshot.stock_closing_entry == self.snapshot_entry.name) & (
+			snapshot.ageing_fifo_queue.isnotnull()
+		)
+		if self.stale_snapshots:
+			condition &= snapshot.name.notin(self.stale_snapshots)
+
+		return condition
+
+	def __restore_slots_from_snapshots(self) -> None:
+		"Seed FIFO Queues and balances from the Stock Ledger Snapshots of the closing entry."
+		snapshot = frappe.qb.DocType("Stock Ledger Snapshot")
+		item = self.__get_item_query()
+
+		query = (
+			frappe.qb.from_(snapshot)
+			.from_(item)
+			.select(
+				item.name,
+				item.item_name,
+				item.item_group,
+				item.brand,
+				item.description,
+				item.stock_uom,
+				item.has_serial_no,
+				item.valuation_method,
+				snapshot.warehouse,
+				snapshot.valuation_rate,
+				snapshot.qty_after_transaction,
+				snapshot.ageing_total_qty,
+				snapshot.ageing_fifo_queue,
+			)
+			.where((snapshot.item_code == item.name) & self.__get_snapshot_condition(snapshot))
+		)
+		query = self.__apply_warehouse_filters(snapshot, query)
+
+		has_serial_no = False
+		for row in query.run(as_dict=True):
+			fifo_queue = [
+				[slot[0], getdate(slot[1]) if slot[1] else slot[1], slot[2]]
+				for slot in json.loads(row.pop("ageing_fifo_queue"))
+			]
+
+			self.item_details[(row.name, row.warehouse)] = {
+				"details": row,
+				"fifo_queue": fifo_queue,
+				"qty_after_transaction": row.pop("qty_after_transaction"),
+				"total_qty": row.pop("ageing_total_qty"),
+				"has_serial_no": row.has_serial_no,
+			}
+			has_serial_no = has_serial_no or row.has_serial_no
+
+		if has_serial_no:
+			self.serial_no_batch_purchase_details = self.__get_serial_no_purchase_dates()
+
+	def __get_serial_no_purchase_dates(self) -> dict:
+		"First inward date of serial nos up to the closing, in place of replaying them."
+		bundle = frappe.qb.DocType("Serial and Batch Bundle")
+		entry = frappe.qb.DocType("Serial and Batch Entry")
+
+		query = (
+			frappe.qb.from_(bundle)
+			.join(entry)
+			.on(bundle.name == entry.parent)
+			.select(entry.serial_no, Min(bundle.posting_datetime))
+			.where(
+				(bundle.docstatus == 1)
+				& (bundle.is_cancelled == 0)
+				& (bundle.type_of_transaction == "Inward")
+				& (entry.serial_no.isnotnull())
+				& (bundle.company == self.filters.get("company"))
+				& (bundle.posting_datetime <= get_datetime(f"{self.snapshot_entry.to_date} 23:59:59"))
+			)
+			.groupby(entry.serial_no)
+		)
+
+		if self.filters.get("item_code"):
+			query = query.where(bundle.item_code == self.filters.get("item_code"))
+
+		query = self.__apply_warehouse_filters(bundle, query)
+
+		return {serial_no: getdate(posting_datetime) for serial_no, posting_datetime in query.run()}
+
 	def __init_key_stores(self, row: dict) -> tuple:
 		"Initialise keys and FIFO Queue."
 
@@ -472,8 +604,27 @@ class FIFOSlots:
 			)
 		)
 
+		if self.snapshot_entry:
+			# only replay entries after the snapshot of the item-warehouse, if it still holds
+			snapshot = frappe.qb.DocType("Stock Ledger Snapshot")
+			sle_query = (
+				sle_query.left_join(snapshot)
+				.on(
+					(snapshot.item_code == sle.item_code)
+					& (snapshot.warehouse == sle.warehouse)
+					& self.__get_snapshot_condition(snapshot)
+				)
+				.where(snapshot.name.isnull() | (sle.posting_datetime > snapshot.posting_datetime))
+			)
+
+		sle_query = self.__apply_warehouse_filters(sle, sle_query)
+		sle_query = sle_query.orderby(sle.posting_datetime, sle.creation)
+
+		return sle_query.run(as_dict=True, as_iterator=True)
+
+	def __apply_warehouse_filters(self, table, query):
 		if self.filters.get("warehouse"):
-			sle_query = self.__get_warehouse_conditions(sle, sle_query)
+			query = self.__get_warehouse_conditions(table, query)
 		elif self.filters.get("warehouse_type"):
 			warehouses = frappe.get_all(
 				"Warehouse",
@@ -482,11 +633,9 @@ class FIFOSlots:
 			)
 
 			if warehouses:
-				sle_query = sle_query.where(sle.warehouse.isin(warehouses))
+				query = query.where(table.warehouse.isin(warehouses))
 
-		sle_query = sle_query.orderby(sle.posting_datetime, sle.creation)
-
-		return sle_query.run(as_dict=True, as_iterator=True)
+		return query
 
 	def __get_bundle_wise_serial_nos(self) -> dict:
 		bundle = frappe.qb.DocType("Serial and Batch Bundle")
@@ -4,7 +4,7 @@
 
 import json
 from operator import itemgetter
-from typing import Any, TypedDict
+from typing import TypedDict
 
 import frappe
 from frappe import _
@@ -33,9 +33,6 @@ class StockBalanceFilter(TypedDict):
 	show_variant_attributes: bool
 
 
-SLEntry = dict[str, Any]
-
-
 def execute(filters: StockBalanceFilter | None = None):
 	return StockBalanceReport(filters).run()
 
@@ -49,7 +46,6 @@ class StockBalanceReport:
 		self.start_from = None
 		self.data = []
 		self.columns = []
-		self.sle_entries: list[SLEntry] = []
 		self.set_company_currency()
 
 	def set_company_currency(self) -> None:
@@ -76,12 +72,14 @@ class StockBalanceReport:
 		return self.columns, self.data
 
 	def prepare_opening_stock(self) -> None:
+		"""Group the closing balance rows by item so they can be merged into the stream item by item"""
+		self.opening_stock = {}
 		opening_entries = self.get_entries_from_stock_closing_balance()
 
 		for entry in opening_entries:
 			key = self.get_group_by_key(entry)
 
-			self.item_warehouse_map[key] = frappe._dict(
+			self.opening_stock.setdefault(entry.item_code, {})[key] = frappe._dict(
 				{
 					"item_code": entry.item_code,
 					"warehouse": entry.warehouse,
@@ -170,6 +168,8 @@ class StockBalanceReport:
 				item_table.item_name,
 			)
 			.where((sle.docstatus < 2) & (sle.is_cancelled == 0))
+			.orderby(sle.item_code)
+			.orderby(sle.warehouse)
 			.orderby(sle.posting_datetime)
 			.orderby(sle.creation)
 		)
@@ -185,27 +185,47 @@ class StockBalanceReport:
 		self.sle_query = query
 
 	def prepare_item_warehouse_map_for_current_period(self):
-		self.opening_vouchers = self.get_opening_vouchers()
+		"""Stream the ledger in item order and finalize each item as soon as its last entry is read.
 
-		if self.filters.get("show_stock_ageing_data"):
-			self.sle_entries = self.sle_query.run(as_dict=True)
+		Entries are not held in memory, only the balance rows built from them. Every item's rows still
+		go into `self.item_warehouse_map`, which the report data is built from.
+		"""
+		self.opening_vouchers = self.get_opening_vouchers()
+		self.current_item_map = frappe._dict({})
+		current_item = None
 
 		# HACK: This is required to avoid causing db query in flt
 		_system_settings = frappe.get_cached_doc("System Settings")
 		with frappe.db.unbuffered_cursor():
-			if not self.filters.get("show_stock_ageing_data"):
-				self.sle_entries = self.sle_query.run(as_dict=True, as_iterator=True)
+			for entry in self.sle_query.run(as_dict=True, as_iterator=True):
+				if entry.item_code != current_item:
+					self.finalize_item()
+					current_item = entry.item_code
+					self.current_item_map.update(self.opening_stock.pop(current_item, {}))
 
-			for entry in self.sle_entries:
 				group_by_key = self.get_group_by_key(entry)
-				if group_by_key not in self.item_warehouse_map:
+				if group_by_key not in self.current_item_map:
 					self.initialize_data(group_by_key, entry)
 
 				self.prepare_item_warehouse_map(entry, group_by_key)
 
-		self.item_warehouse_map = filter_items_with_no_transactions(
-			self.item_warehouse_map, self.float_precision, self.inventory_dimensions
+		self.finalize_item()
+
+		# items which only have a closing balance and no entries in the period
+		for item_code in list(self.opening_stock):
+			self.current_item_map.update(self.opening_stock.pop(item_code))
+			self.finalize_item()
+
+	def finalize_item(self) -> None:
+		if not self.current_item_map:
+			return
+
+		self.item_warehouse_map.update(
+			filter_items_with_no_transactions(
+				self.current_item_map, self.float_precision, self.inventory_dimensions
+			)
 		)
+		self.current_item_map = frappe._dict({})
 
 	def prepare_new_data(self):
 		if self.filters.get("show_stock_ageing_data"):
@@ -214,8 +234,6 @@ class StockBalanceReport:
 
 		_func = itemgetter(1)
 
-		del self.sle_entries
-
 		sre_details = self.get_sre_reserved_qty_details()
 
 		variant_values = {}
@@ -278,7 +296,7 @@ class StockBalanceReport:
 		return get_reserved_qty_details(item_code_list, warehouse_list)
 
 	def prepare_item_warehouse_map(self, entry, group_by_key):
-		qty_dict = self.item_warehouse_map[group_by_key]
+		qty_dict = self.current_item_map[group_by_key]
 		for field in self.inventory_dimensions:
 			qty_dict[field] = entry.get(field)
 
@@ -311,7 +329,7 @@ class StockBalanceReport:
 		qty_dict.bal_val += value_diff
 
 	def initialize_data(self, group_by_key, entry):
-		self.item_warehouse_map[group_by_key] = frappe._dict(
+		self.current_item_map[group_by_key] = frappe._dict(
 			{
 				"item_code": entry.item_code,
 				"warehouse": entry.warehouse,
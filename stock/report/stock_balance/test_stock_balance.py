@@ -168,3 +168,25 @@ class TestStockBalance(IntegrationTestCase):
 		rows = stock_balance(self.filters.update({"show_variant_attributes": 1, "item_code": [variant.name]}))
 		self.assertPartialDictEq(attributes, rows[0])
 		self.assertInvariants(rows)
+
+	def test_interleaved_items_are_streamed_per_item(self):
+		other_item = make_item()
+		self.generate_stock_ledger(self.item.name, [_dict(qty=2, rate=10, posting_date="2021-01-01")])
+		self.generate_stock_ledger(other_item.name, [_dict(qty=3, rate=20, posting_date="2021-01-02")])
+		self.generate_stock_ledger(
+			self.item.name, [_dict(qty=4, rate=10, posting_date="2021-01-03", to_warehouse="Stores - _TC")]
+		)
+		self.generate_stock_ledger(other_item.name, [_dict(qty=1, rate=20, posting_date="2021-01-04")])
+
+		rows = stock_balance(self.filters.update({"item_code": [self.item.name, other_item.name]}))
+		self.assertInvariants(rows)
+
+		balances = {(row.item_code, row.warehouse): row.bal_qty for row in rows}
+		self.assertEqual(
+			balances,
+			{
+				(self.item.name, "_Test Warehouse - _TC"): 2,
+				(self.item.name, "Stores - _TC"): 4,
+				(other_item.name, "_Test Warehouse - _TC"): 4,
+			},
+		)
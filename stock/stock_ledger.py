@@ -4,6 +4,8 @@
 import copy
 import gzip
 import json
+from datetime import timedelta
+from itertools import groupby
 
 import frappe
 from frappe import _, bold, scrub
@@ -18,6 +20,7 @@ from frappe.utils import (
 	get_link_to_form,
 	getdate,
 	now,
+	now_datetime,
 	nowdate,
 	nowtime,
 	parse_json,
@@ -29,6 +32,9 @@ from nexa.stock.doctype.inventory_dimension.inventory_dimension import get_inven
 from nexa.stock.doctype.serial_and_batch_bundle.serial_and_batch_bundle import (
 	get_auto_batch_nos,
 )
+from nexa.stock.doctype.stock_ledger_snapshot.stock_ledger_snapshot import (
+	invalidate_stock_ledger_snapshots,
+)
 from nexa.stock.doctype.stock_reservation_entry.stock_reservation_entry import (
 	get_sre_reserved_batch_nos_details,
 	get_sre_reserved_serial_nos_details,
@@ -42,7 +48,31 @@ from nexa.stock.utils import (
 	get_stock_balance,
 	get_valuation_method,
 )
-from nexa.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
+from nexa.stock.valuation import (
+	FIFOValuation,
+	LIFOValuation,
+	dump_stock_queue,
+	round_off_if_near_zero,
+)
+
+
+# Number of future SLEs fetched, replayed and written back together while reposting
+SLE_REPLAY_BATCH_SIZE = 1000
+
+SLE_REPLAY_FIELDS = (
+	"actual_qty",
+	"is_cancelled",
+	"incoming_rate",
+	"outgoing_rate",
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_value_difference",
+	"stock_queue",
+)
+
+# Vouchers with at least these many plain SLEs are inserted and valuated in bulk
+SLE_BULK_INSERT_THRESHOLD = 50
 
 
 class NegativeStockError(frappe.ValidationError):
@@ -73,7 +103,16 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 			set_as_cancel(sl_entries[0].get("voucher_type"), sl_entries[0].get("voucher_no"))
 
 		args = get_args_for_future_sle(sl_entries[0])
-		future_sle_exists(args, sl_entries)
+		has_future_sle = future_sle_exists(args, sl_entries)
+
+		# a backdated posting or cancellation is not part of the snapshots taken after it
+		invalidate_stock_ledger_snapshots(sl_entries, args.posting_date)
+
+		if not (cancel or via_landed_cost_voucher or has_future_sle) and can_make_sl_entries_in_bulk(
+			sl_entries
+		):
+			make_sl_entries_in_bulk(sl_entries, allow_negative_stock)
+			return
 
 		for sle in sl_entries:
 			if sle.serial_no and not via_landed_cost_voucher:
@@ -116,6 +155,110 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 				)
 
 
+def can_make_sl_entries_in_bulk(sl_entries):
+	"""Bulk path is only taken for large vouchers of stock items without serial / batch numbers"""
+	if len(sl_entries) < SLE_BULK_INSERT_THRESHOLD:
+		return False
+
+	item_details = {
+		d.name: d
+		for d in frappe.get_all(
+			"Item",
+			filters={"name": ("in", list({sle.item_code for sle in sl_entries}))},
+			fields=["name", "is_stock_item", "has_serial_no", "has_batch_no", "has_variants"],
+		)
+	}
+
+	for sle in sl_entries:
+		item = item_details.get(sle.item_code)
+		if (
+			not item
+			or not item.is_stock_item
+			or item.has_serial_no
+			or item.has_batch_no
+			or item.has_variants
+			or not sle.get("actual_qty")
+			or sle.get("voucher_type") == "Stock Reconciliation"
+			or sle.get("serial_no")
+			or sle.get("batch_no")
+			or sle.get("serial_and_batch_bundle")
+		):
+			return False
+
+	return True
+
+
+def make_sl_entries_in_bulk(sl_entries, allow_negative_stock=False):
+	"""Insert SLEs with multi-row inserts and valuate them once per item-warehouse.
+
+	Only used when there are no future SLEs for the voucher, so the rows of every
+	item-warehouse are the latest entries and only need to be valuated in order.
+	"""
+	sle_docs = insert_sl_entries_in_bulk(sl_entries, allow_negative_stock)
+
+	item_warehouse_sles = {}
+	for sle in sle_docs:
+		item_warehouse_sles.setdefault((sle.item_code, sle.warehouse), []).append(sle)
+
+	for (item_code, warehouse), sles in item_warehouse_sles.items():
+		bin_name = get_or_make_bin(item_code, warehouse)
+		args = sles[-1].as_dict()
+		args.reserved_stock = flt(frappe.db.get_value("Bin", bin_name, "reserved_stock"))
+		args.actual_qty = sum(flt(sle.actual_qty) for sle in sles)
+
+		update_entries_after(
+			{
+				"item_code": item_code,
+				"warehouse": warehouse,
+				"posting_date": args.posting_date,
+				"posting_time": args.posting_time,
+				"voucher_type": args.voucher_type,
+				"voucher_no": args.voucher_no,
+				"sle_id": sles[0].name,
+				"sle_ids": tuple(sle.name for sle in sles),
+				"creation": sles[0].creation,
+				"reserved_stock": args.reserved_stock,
+			},
+			allow_negative_stock=allow_negative_stock,
+		)
+
+		validate_negative_qty_in_future_sle(args, allow_negative_stock)
+
+		for fieldname in ("ordered_qty", "reserved_qty", "indented_qty", "planned_qty"):
+			args[fieldname] = sum(flt(sle.get(fieldname)) for sle in sles)
+
+		update_bin_qty(bin_name, args)
+
+
+def insert_sl_entries_in_bulk(sl_entries, allow_negative_stock=False):
+	creation = now_datetime()
+	sle_docs = []
+
+	for idx, args in enumerate(sl_entries):
+		args["doctype"] = "Stock Ledger Entry"
+		sle = frappe.get_doc(args)
+		sle.allow_negative_stock = allow_negative_stock
+		sle.autoname()
+		sle.docstatus = 1
+		sle.owner = sle.modified_by = frappe.session.user
+		# distinct creation keeps the order of the rows while valuating
+		sle.creation = sle.modified = creation + timedelta(microseconds=idx)
+		sle.has_serial_no = sle.has_batch_no = 0
+
+		sle.run_method("validate")
+		sle.check_stock_frozen_date()
+		sle_docs.append(sle)
+
+	fields = list(sle_docs[0].get_valid_dict(convert_dates_to_str=True).keys())
+	frappe.db.bulk_insert(
+		"Stock Ledger Entry",
+		fields,
+		[tuple(sle.get_valid_dict(convert_dates_to_str=True).values()) for sle in sle_docs],
+	)
+
+	return sle_docs
+
+
 def repost_current_voucher(args, allow_negative_stock=False, via_landed_cost_voucher=False):
 	if args.get("actual_qty") or args.get("voucher_type") == "Stock Reconciliation":
 		if not args.get("posting_date"):
@@ -278,6 +421,7 @@ def repost_future_sle(
 			},
 			allow_negative_stock=allow_negative_stock,
 			via_landed_cost_voucher=via_landed_cost_voucher,
+			repost_doc=doc,
 		)
 		affected_transactions.update(obj.affected_transactions)
 
@@ -363,6 +507,7 @@ def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehou
 				"current_index": index,
 				"total_reposting_count": len(args),
 				"reposting_data_file": doc.reposting_data_file,
+				"reposting_checkpoint": None,
 			}
 		)
 
@@ -375,6 +520,7 @@ def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehou
 				),
 				"current_index": index,
 				"affected_transactions": frappe.as_json(affected_transactions),
+				"reposting_checkpoint": None,
 			}
 		)
 
@@ -520,6 +666,22 @@ def get_current_index(doc=None):
 		return doc.current_index
 
 
+def get_reposting_checkpoint(doc=None) -> dict:
+	if doc and doc.get("reposting_checkpoint"):
+		return parse_json(doc.reposting_checkpoint)
+
+	return frappe._dict()
+
+
+def update_reposting_checkpoint(doc, checkpoint):
+	"""Save the last replayed SLE of the item-warehouse being reposted,
+	so that a timed out or failed repost resumes after it."""
+	doc.db_set("reposting_checkpoint", frappe.as_json(checkpoint) if checkpoint else None)
+
+	if not frappe.in_test:
+		frappe.db.commit()
+
+
 class update_entries_after:
 	"""
 	update valution rate and qty after transaction
@@ -542,9 +704,11 @@ class update_entries_after:
 		allow_negative_stock=None,
 		via_landed_cost_voucher=False,
 		verbose=1,
+		repost_doc=None,
 	):
 		self.exceptions = {}
 		self.verbose = verbose
+		self.repost_doc = repost_doc
 		self.allow_zero_rate = allow_zero_rate
 		self.via_landed_cost_voucher = via_landed_cost_voucher
 		self.item_code = args.get("item_code")
@@ -560,14 +724,25 @@ class update_entries_after:
 		self.company = frappe.get_cached_value("Warehouse", self.args.warehouse, "company")
 		self.set_precision()
 		self.valuation_method = get_valuation_method(self.item_code)
+		self.inventory_dimension_fields = [d.fieldname for d in get_inventory_dimensions()]
+		self.landed_cost_based_on_pi = cint(
+			frappe.db.get_single_value("Buying Settings", "set_landed_cost_based_on_purchase_invoice_rate")
+		)
 
 		self.new_items_found = False
 		self.distinct_item_warehouses = args.get("distinct_item_warehouses", frappe._dict())
 		self.affected_transactions: set[tuple[str, str]] = set()
 		self.reserved_stock = self.get_reserved_stock()
 
+		# SLE values recalculated while reposting, written back in bulk per batch
+		self.pending_sle_updates = {}
+		self.original_sle_values = {}
+		self.replay_from_sle = None
+		self.updated_item_warehouses = set()
+
 		self.data = frappe._dict()
-		self.initialize_previous_data(self.args)
+		if not self.resume_from_checkpoint():
+			self.initialize_previous_data(self.args)
 		self.build()
 
 	def get_reserved_stock(self):
@@ -595,7 +770,7 @@ class update_entries_after:
 			frappe.get_meta("Stock Ledger Entry").get_field("stock_value")
 		)
 
-	def initialize_previous_data(self, args):
+	def initialize_previous_data(self, args, previous_sle=None):
 		"""
 		Get previous sl entries for current item for each related warehouse
 		and assigns into self.data dict
@@ -617,7 +792,8 @@ class update_entries_after:
 		"""
 		self.data.setdefault(args.warehouse, frappe._dict())
 		warehouse_dict = self.data[args.warehouse]
-		previous_sle = get_previous_sle_of_current_voucher(args)
+		if previous_sle is None:
+			previous_sle = get_previous_sle_of_current_voucher(args)
 		warehouse_dict.previous_sle = previous_sle
 
 		for key in ("qty_after_transaction", "valuation_rate", "stock_value"):
@@ -631,6 +807,55 @@ class update_entries_after:
 			}
 		)
 
+	def resume_from_checkpoint(self):
+		"""
+		Continue an interrupted repost of the current item-warehouse from the
+		last SLE which was replayed and committed before the interruption.
+		"""
+		if not self.repost_doc or self.args.get("sle_id"):
+			return False
+
+		checkpoint = get_reposting_checkpoint(self.repost_doc)
+		if (
+			not checkpoint
+			or checkpoint.current_index != self.args.get("current_index")
+			or checkpoint.item_code != self.item_code
+			or checkpoint.warehouse != self.args.warehouse
+		):
+			return False
+
+		last_sle = frappe.db.sql(
+			"""
+			select *, posting_datetime as "timestamp"
+			from `tabStock Ledger Entry`
+			where name = %s and is_cancelled = 0
+		""",
+			checkpoint.sle_id,
+			as_dict=1,
+		)
+
+		if not last_sle:
+			return False
+
+		self.initialize_previous_data(self.args, previous_sle=last_sle[0])
+		self.replay_from_sle = last_sle[0]
+		self.affected_transactions.update(
+			get_replayed_transactions(
+				self.item_code,
+				self.args.warehouse,
+				get_combine_datetime(self.args.posting_date, self.args.posting_time),
+				last_sle[0],
+			)
+		)
+
+		for key, value in (checkpoint.get("distinct_item_and_warehouse") or {}).items():
+			key = frappe.safe_eval(key)
+			self.distinct_item_warehouses[key] = frappe._dict(value)
+			self.updated_item_warehouses.add(key)
+			self.new_items_found = True
+
+		return True
+
 	def build(self):
 		from nexa.controllers.stock_controller import future_sle_exists
 
@@ -639,21 +864,32 @@ class update_entries_after:
 			if not future_sle_exists(self.args):
 				self.update_bin()
 		else:
-			entries_to_fix = self.get_future_entries_to_fix()
+			self.replay_future_entries()
+
+		if self.exceptions:
+			self.raise_exceptions()
 
-			i = 0
-			while i < len(entries_to_fix):
-				sle = entries_to_fix[i]
-				i += 1
+	def replay_future_entries(self):
+		"""
+		Replay future SLEs of the item-warehouse batch by batch, keeping the
+		running state in self.data and writing the recalculated values back
+		in bulk at the end of every batch.
+		"""
+		for entries_to_fix in self.get_future_entries_to_fix():
+			for is_plain, sl_entries in groupby(entries_to_fix, key=self.is_plain_moving_average_sle):
+				if is_plain:
+					self.process_plain_sles(sl_entries)
+					continue
 
-				self.process_sle(sle)
-				self.update_bin_data(sle)
+				for sle in sl_entries:
+					self.process_sle(sle)
 
-				if sle.dependant_sle_voucher_detail_no:
-					entries_to_fix = self.get_dependent_entries_to_fix(entries_to_fix, sle)
+					if sle.dependant_sle_voucher_detail_no:
+						entries_to_fix = self.get_dependent_entries_to_fix(entries_to_fix, sle)
 
-		if self.exceptions:
-			self.raise_exceptions()
+			self.flush_sle_updates()
+			self.update_bin_data(entries_to_fix[-1])
+			self.save_checkpoint(entries_to_fix[-1])
 
 	def has_stock_reco_with_serial_batch(self, sle):
 		if (
@@ -669,11 +905,16 @@ class update_entries_after:
 		for sle in sl_entries:
 			self.process_sle(sle)
 
+		self.flush_sle_updates()
+
 	def get_sle_against_current_voucher(self):
 		self.args["posting_datetime"] = get_combine_datetime(self.args.posting_date, self.args.posting_time)
 
+		# entries inserted in bulk are valuated together
+		sle_condition = "name in %(sle_ids)s" if self.args.get("sle_ids") else "creation = %(creation)s"
+
 		return frappe.db.sql(
-			"""
+			f"""
 			select
 				*, posting_datetime as "timestamp"
 			from
@@ -685,7 +926,7 @@ class update_entries_after:
 				and (
 					posting_datetime = %(posting_datetime)s
 				)
-				and creation = %(creation)s
+				and {sle_condition}
 			order by
 				creation ASC
 			for update
@@ -695,12 +936,79 @@ class update_entries_after:
 		)
 
 	def get_future_entries_to_fix(self):
+		"""Yield future SLEs of the item-warehouse in batches of SLE_REPLAY_BATCH_SIZE"""
 		# includes current entry!
-		args = self.data[self.args.warehouse].previous_sle or frappe._dict(
-			{"item_code": self.item_code, "warehouse": self.args.warehouse}
+		last_sle = self.replay_from_sle or self.data[self.args.warehouse].previous_sle
+
+		while True:
+			entries_to_fix = get_future_sle_batch(
+				self.item_code, self.args.warehouse, last_sle, SLE_REPLAY_BATCH_SIZE
+			)
+			if not entries_to_fix:
+				break
+
+			self.original_sle_values = {
+				sle.name: {field: sle.get(field) for field in SLE_REPLAY_FIELDS} for sle in entries_to_fix
+			}
+
+			yield entries_to_fix
+
+			if len(entries_to_fix) < SLE_REPLAY_BATCH_SIZE:
+				break
+
+			last_sle = entries_to_fix[-1]
+
+	def queue_sle_update(self, sle):
+		"""Keep the changed values of a replayed SLE to be written with the rest of the batch"""
+		original_values = self.original_sle_values.pop(sle.name, {})
+		values_to_update = {
+			field: sle.get(field)
+			for field in SLE_REPLAY_FIELDS
+			if field not in original_values or sle.get(field) != original_values[field]
+		}
+
+		if values_to_update:
+			self.pending_sle_updates.setdefault(sle.name, {}).update(values_to_update)
+
+	def flush_sle_updates(self):
+		if not self.pending_sle_updates:
+			return
+
+		frappe.db.bulk_update("Stock Ledger Entry", self.pending_sle_updates, chunk_size=500)
+		self.pending_sle_updates = {}
+
+	def save_checkpoint(self, sle):
+		if not self.repost_doc:
+			return
+
+		update_reposting_checkpoint(
+			self.repost_doc,
+			{
+				"current_index": self.args.get("current_index"),
+				"item_code": self.item_code,
+				"warehouse": self.args.warehouse,
+				"sle_id": sle.name,
+				"distinct_item_and_warehouse": {
+					str(key): self.distinct_item_warehouses[key] for key in self.updated_item_warehouses
+				},
+			},
 		)
 
-		return list(self.get_sle_after_datetime(args))
+	def requires_flushed_ledger(self, sle):
+		"""
+		Returns True if valuation of the SLE reads other ledger entries or vouchers
+		from the database, in which case pending SLE updates must be written first.
+		"""
+		return bool(
+			sle.serial_and_batch_bundle
+			or sle.serial_no
+			or sle.batch_no
+			or sle.recalculate_rate
+			or sle.is_adjustment_entry
+			or sle.dependant_sle_voucher_detail_no
+			or sle.voucher_type in ("Stock Reconciliation", "Stock Entry")
+			or self.has_landed_cost_based_on_pi(sle)
+		)
 
 	def get_dependent_entries_to_fix(self, entries_to_fix, sle):
 		dependant_sle = get_sle_by_voucher_detail_no(
@@ -739,6 +1047,9 @@ class update_entries_after:
 				self.distinct_item_warehouses[key] = val
 				self.new_items_found = True
 
+		if self.distinct_item_warehouses[key] is val:
+			self.updated_item_warehouses.add(key)
+
 	def is_dependent_voucher_reposted(self, dependant_sle) -> bool:
 		# Return False if the dependent voucher is not reposted
 
@@ -788,6 +1099,9 @@ class update_entries_after:
 		# previous sle data for this warehouse
 		self.wh_data = self.data[sle.warehouse]
 
+		if not self.args.get("sle_id") and self.requires_flushed_ledger(sle):
+			self.flush_sle_updates()
+
 		self.validate_previous_sle_qty(sle)
 		self.affected_transactions.add((sle.voucher_type, sle.voucher_no))
 
@@ -819,12 +1133,7 @@ class update_entries_after:
 		):
 			sle.outgoing_rate = get_incoming_rate_for_inter_company_transfer(sle)
 
-		dimensions = get_inventory_dimensions()
-		has_dimensions = False
-		if dimensions:
-			for dimension in dimensions:
-				if sle.get(dimension.get("fieldname")):
-					has_dimensions = True
+		has_dimensions = any(sle.get(fieldname) for fieldname in self.inventory_dimension_fields)
 
 		if sle.serial_and_batch_bundle:
 			self.calculate_valuation_for_serial_batch_bundle(sle)
@@ -864,20 +1173,55 @@ class update_entries_after:
 					]
 			else:
 				if self.valuation_method == "Moving Average":
-					self.get_moving_average_values(sle)
-					self.wh_data.qty_after_transaction += flt(sle.actual_qty)
-					self.wh_data.stock_value = flt(self.wh_data.qty_after_transaction) * flt(
-						self.wh_data.valuation_rate
-					)
-
-					if flt(self.wh_data.qty_after_transaction, self.flt_precision) != 0:
-						self.wh_data.valuation_rate = flt(
-							self.wh_data.stock_value, self.currency_precision
-						) / flt(self.wh_data.qty_after_transaction, self.flt_precision)
-
+					self.update_moving_average_values(sle)
 				else:
 					self.update_queue_values(sle)
 
+		self.update_sle_values(sle)
+
+	def is_plain_moving_average_sle(self, sle):
+		"""
+		Returns True if the SLE only moves qty at its own rate, so its valuation
+		needs nothing beyond the running moving average of the warehouse.
+		"""
+		return bool(
+			self.valuation_method == "Moving Average"
+			and not self.args.get("sle_id")
+			and sle.warehouse == self.args.warehouse
+			and not self.requires_flushed_ledger(sle)
+			and not (sle.voucher_type in ("Purchase Receipt", "Purchase Invoice") and sle.actual_qty < 0)
+		)
+
+	def process_plain_sles(self, sl_entries):
+		"""Valuate a run of plain moving average SLEs without the per-row checks of process_sle
+
+		Rows are still valued one after the other: the rate of a row is derived from the stock value
+		rounded after the previous row, and a row which fails the negative stock check only moves the qty.
+		"""
+		self.wh_data = self.data[self.args.warehouse]
+
+		for sle in sl_entries:
+			self.validate_previous_sle_qty(sle)
+			self.affected_transactions.add((sle.voucher_type, sle.voucher_no))
+
+			if not cint(self.allow_negative_stock) and not self.validate_negative_stock(sle):
+				self.wh_data.qty_after_transaction += flt(sle.actual_qty)
+				continue
+
+			self.update_moving_average_values(sle)
+			self.update_sle_values(sle)
+
+	def update_moving_average_values(self, sle):
+		self.get_moving_average_values(sle)
+		self.wh_data.qty_after_transaction += flt(sle.actual_qty)
+		self.wh_data.stock_value = flt(self.wh_data.qty_after_transaction) * flt(self.wh_data.valuation_rate)
+
+		if flt(self.wh_data.qty_after_transaction, self.flt_precision) != 0:
+			self.wh_data.valuation_rate = flt(self.wh_data.stock_value, self.currency_precision) / flt(
+				self.wh_data.qty_after_transaction, self.flt_precision
+			)
+
+	def update_sle_values(self, sle):
 		# rounding as per precision
 		self.wh_data.stock_value = flt(self.wh_data.stock_value, self.currency_precision)
 		if not self.wh_data.qty_after_transaction:
@@ -890,7 +1234,7 @@ class update_entries_after:
 		sle.qty_after_transaction = flt(self.wh_data.qty_after_transaction, self.flt_precision)
 		sle.valuation_rate = self.wh_data.valuation_rate
 		sle.stock_value = self.wh_data.stock_value
-		sle.stock_queue = json.dumps(self.wh_data.stock_queue)
+		sle.stock_queue = dump_stock_queue(self.wh_data.stock_queue)
 
 		if not sle.is_adjustment_entry:
 			sle.stock_value_difference = stock_value_difference
@@ -902,9 +1246,12 @@ class update_entries_after:
 				* -1
 			)
 
-		sle.doctype = "Stock Ledger Entry"
-		sle.modified = now()
-		frappe.get_doc(sle).db_update()
+		if self.args.get("sle_id") and not self.args.get("sle_ids"):
+			sle.doctype = "Stock Ledger Entry"
+			sle.modified = now()
+			frappe.get_doc(sle).db_update()
+		else:
+			self.queue_sle_update(sle)
 
 		if not self.args.get("sle_id") or (
 			sle.serial_and_batch_bundle and sle.auto_created_serial_and_batch_bundle
@@ -1077,12 +1424,7 @@ class update_entries_after:
 				sle.outgoing_rate = rate
 
 	def has_landed_cost_based_on_pi(self, sle):
-		if sle.voucher_type == "Purchase Receipt" and frappe.db.get_single_value(
-			"Buying Settings", "set_landed_cost_based_on_purchase_invoice_rate"
-		):
-			return True
-
-		return False
+		return bool(sle.voucher_type == "Purchase Receipt" and self.landed_cost_based_on_pi)
 
 	def get_incoming_outgoing_rate_from_transaction(self, sle):
 		rate = 0
@@ -1520,6 +1862,7 @@ class update_entries_after:
 	def get_fallback_rate(self, sle) -> float:
 		"""When exact incoming rate isn't available use any of other "average" rates as fallback.
 		This should only get used for negative stock."""
+		self.flush_sle_updates()
 		return get_valuation_rate(
 			sle.item_code,
 			sle.warehouse,
@@ -1757,6 +2100,83 @@ def get_stock_ledger_entries(
 	)
 
 
+def get_future_sle_batch(item_code, warehouse, last_sle=None, batch_size=SLE_REPLAY_BATCH_SIZE):
+	"""get the next batch of Stock Ledger Entries after `last_sle`, for reposting
+
+	Entries are ordered by (posting_datetime, creation, name) so that consecutive
+	batches can be fetched by continuing after the last entry of the previous batch.
+	"""
+	conditions = ""
+	params = {"item_code": item_code, "warehouse": warehouse, "batch_size": batch_size}
+
+	if last_sle and last_sle.get("name"):
+		conditions = """
+			and (
+				posting_datetime > %(posting_datetime)s
+				or (
+					posting_datetime = %(posting_datetime)s
+					and (creation > %(creation)s or (creation = %(creation)s and name > %(name)s))
+				)
+			)"""
+		params.update(
+			{
+				"posting_datetime": last_sle.get("posting_datetime")
+				or get_combine_datetime(last_sle.posting_date, last_sle.posting_time),
+				"creation": last_sle.creation,
+				"name": last_sle.name,
+			}
+		)
+
+	return frappe.db.sql(  # nosemgrep
+		f"""
+		select *, posting_datetime as "timestamp"
+		from `tabStock Ledger Entry`
+		where item_code = %(item_code)s
+			and warehouse = %(warehouse)s
+			and is_cancelled = 0
+			{conditions}
+		order by posting_datetime asc, creation asc, name asc
+		limit %(batch_size)s
+		for update""",
+		params,
+		as_dict=1,
+	)
+
+
+def get_replayed_transactions(item_code, warehouse, from_datetime, last_sle):
+	"""Vouchers of the item-warehouse's SLEs from `from_datetime` up to and including `last_sle`
+
+	Checkpoints don't carry the affected transactions, which would be written again with every
+	batch, so a resumed repost reads those of the entries replayed before it once.
+	"""
+	transactions = frappe.db.sql(
+		"""
+		select distinct voucher_type, voucher_no
+		from `tabStock Ledger Entry`
+		where item_code = %(item_code)s
+			and warehouse = %(warehouse)s
+			and is_cancelled = 0
+			and posting_datetime >= %(from_datetime)s
+			and (
+				posting_datetime < %(posting_datetime)s
+				or (
+					posting_datetime = %(posting_datetime)s
+					and (creation < %(creation)s or (creation = %(creation)s and name <= %(name)s))
+				)
+			)""",
+		{
+			"item_code": item_code,
+			"warehouse": warehouse,
+			"from_datetime": from_datetime,
+			"posting_datetime": last_sle.posting_datetime,
+			"creation": last_sle.creation,
+			"name": last_sle.name,
+		},
+	)
+
+	return {tuple(transaction) for transaction in transactions}
+
+
 def get_sle_by_voucher_detail_no(voucher_detail_no, excluded_sle=None):
 	return frappe.db.get_value(
 		"Stock Ledger Entry",
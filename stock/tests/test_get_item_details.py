@@ -1,7 +1,8 @@
 import frappe
 from frappe.tests import IntegrationTestCase
+from frappe.utils import flt
 
-from nexa.stock.get_item_details import get_item_details
+from nexa.stock.get_item_details import get_item_details, get_item_details_for_items
 
 EXTRA_TEST_RECORD_DEPENDENCIES = ["Customer", "Supplier", "Item", "Price List", "Item Price"]
 
@@ -91,3 +92,43 @@ class TestGetItemDetail(IntegrationTestCase):
 		dn.save()
 		self.assertEqual(dn.items[0].batch_no, "BATCH01")
 		self.assertEqual(dn.items[0].rate, 50)
+
+	def test_get_item_details_for_items(self):
+		def get_ctx(item_code, warehouse):
+			return frappe._dict(
+				{
+					"item_code": item_code,
+					"warehouse": warehouse,
+					"company": "_Test Company",
+					"conversion_rate": 1.0,
+					"plc_conversion_rate": 1.0,
+					"doctype": "Purchase Order",
+					"name": None,
+					"supplier": "_Test Supplier",
+					"price_list": "_Test Buying Price List",
+					"is_subcontracted": 0,
+					"ignore_pricing_rule": 1,
+					"qty": 1,
+				}
+			)
+
+		rows = [
+			("_Test Item", "_Test Warehouse - _TC"),
+			("_Test Item 2", "_Test Warehouse - _TC"),
+			("_Test Item", "_Test Warehouse 1 - _TC"),
+		]
+
+		expected = [get_item_details(get_ctx(*row)) for row in rows]
+		details = get_item_details_for_items([get_ctx(*row) for row in rows])
+
+		def get_summary(out):
+			return (
+				out.item_code,
+				out.warehouse,
+				flt(out.price_list_rate),
+				flt(out.actual_qty),
+				flt(out.projected_qty),
+			)
+
+		self.assertEqual([get_summary(d) for d in details], [get_summary(d) for d in expected])
+		self.assertEqual(details[0].price_list_rate, 100)
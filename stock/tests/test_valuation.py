@@ -124,6 +124,35 @@ class TestFIFOValuation(IntegrationTestCase):
 		self.queue.add_stock(5, 17)
 		self.queue.add_stock(8, 11)
 
+	def test_remove_interleaved_bins_with_rate(self):
+		self.queue.add_stock(1, 10)
+		self.queue.add_stock(2, 20)
+		self.queue.add_stock(1, 10)
+		self.queue.add_stock(3, 20)
+
+		consumed = self.queue.remove_stock(4, 20)
+		self.assertEqual(consumed, [[2, 20], [2, 20]])
+		self.assertEqual(self.queue, [[1, 10], [1, 10], [1, 20]])
+
+		# no more bins with the rate, consume as per FIFO
+		consumed = self.queue.remove_stock(2, 20)
+		self.assertEqual(consumed, [[1, 20], [1, 10]])
+		self.assertEqual(self.queue, [[1, 10]])
+
+	def test_state_is_updated_in_place(self):
+		state = [[1, 10], [2, 20], [3, 30]]
+		self.queue = FIFOValuation(state)
+		self.queue.remove_stock(4)
+
+		self.assertIs(self.queue.state, state)
+		self.assertEqual(state, [[2, 30]])
+
+	def test_serialization(self):
+		self.queue.add_stock(1, 10)
+		self.queue.add_stock(2.5, 20)
+		self.assertEqual(self.queue.serialize(), "[[1,10],[2.5,20]]")
+		self.assertEqual(json.loads(self.queue.serialize()), self.queue.state)
+
 	@given(stock_queue_generator)
 	def test_fifo_qty_hypothesis(self, stock_queue):
 		self.queue = FIFOValuation([])
@@ -1,4 +1,6 @@
+import json
 from abc import ABC, abstractmethod, abstractproperty
+from collections import deque
 from collections.abc import Callable
 from typing import NewType
 
@@ -40,6 +42,10 @@ class BinWiseValuation(ABC):
 
 		return round_off_if_near_zero(total_qty), round_off_if_near_zero(total_value)
 
+	def serialize(self) -> str:
+		"""Get current state as compact JSON, as stored in `stock_queue` of Stock Ledger Entry."""
+		return dump_stock_queue(self.state)
+
 	def __repr__(self):
 		return str(self.state)
 
@@ -112,42 +118,47 @@ class FIFOValuation(BinWiseValuation):
 		        qty: quantity to remove
 		        rate: outgoing rate
 		        rate_generator: function to be called if queue is not found and rate is required.
+
+		Consumed bins are only marked as removed while consuming and the queue is
+		compacted once at the end, so consuming k bins costs O(n + k) instead of O(n * k).
 		"""
 		if not rate_generator:
 			rate_generator = lambda: 0.0  # noqa
 
+		queue = self.queue
 		consumed_bins = []
+		removed = set()
+		head = 0
+
+		# positions of bins to be consumed before FIFO order, i.e. bins with the outgoing rate
+		matching_bins = deque()
+		if outgoing_rate > 0 or is_return_purchase_entry:
+			matching_bins.extend(self.get_bins_with_rate(outgoing_rate))
+
 		while qty:
-			if not len(self.queue):
+			while head < len(queue) and head in removed:
+				head += 1
+
+			if head == len(queue):
 				# rely on rate generator.
-				self.queue.append([0, rate_generator()])
-
-			index = None
-			if outgoing_rate > 0 or is_return_purchase_entry:
-				# Find the entry where rate matched with outgoing rate
-				for idx, fifo_bin in enumerate(self.queue):
-					if fifo_bin[RATE] == outgoing_rate:
-						index = idx
-						break
-
-				# If no entry found with outgoing rate, consume as per FIFO
-				if index is None:  # nosemgrep
-					index = 0
-			else:
-				index = 0
+				queue.append([0, rate_generator()])
 
-			# select first bin or the bin with same rate
-			fifo_bin = self.queue[index]
+			# select bin with same rate or the first bin
+			index = matching_bins.popleft() if matching_bins else head
+
+			fifo_bin = queue[index]
 			if qty >= fifo_bin[QTY]:
 				# consume current bin
 				qty = round_off_if_near_zero(qty - fifo_bin[QTY])
-				to_consume = self.queue.pop(index)
-				consumed_bins.append(list(to_consume))
+				removed.add(index)
+				consumed_bins.append(list(fifo_bin))
 
-				if not self.queue and qty:
+				if len(removed) == len(queue) and qty:
 					# stock finished, qty still remains to be withdrawn
 					# negative stock, keep in as a negative bin
-					self.queue.append([-qty, outgoing_rate or fifo_bin[RATE]])
+					queue.clear()
+					removed.clear()
+					queue.append([-qty, outgoing_rate or fifo_bin[RATE]])
 					consumed_bins.append([qty, outgoing_rate or fifo_bin[RATE]])
 					break
 			else:
@@ -156,8 +167,25 @@ class FIFOValuation(BinWiseValuation):
 				consumed_bins.append([qty, fifo_bin[RATE]])
 				qty = 0
 
+		self.compact(removed)
+
 		return consumed_bins
 
+	def get_bins_with_rate(self, rate: float) -> list[int]:
+		"""Get positions of bins having the given rate, in queue order."""
+		return [idx for idx, fifo_bin in enumerate(self.queue) if fifo_bin[RATE] == rate]
+
+	def compact(self, removed: set[int]) -> None:
+		"""Drop bins at removed positions from the queue, in place."""
+		if not removed:
+			return
+
+		if max(removed) == len(removed) - 1:
+			# only bins from the front were consumed
+			del self.queue[: len(removed)]
+		else:
+			self.queue[:] = [fifo_bin for idx, fifo_bin in enumerate(self.queue) if idx not in removed]
+
 
 class LIFOValuation(BinWiseValuation):
 	"""Valuation method where a *stack* of all the incoming stock is maintained.
@@ -257,6 +285,11 @@ class LIFOValuation(BinWiseValuation):
 		return consumed_bins
 
 
+def dump_stock_queue(stock_queue: list[StockBin] | None) -> str:
+	"""Serialize stock queue bins as compact JSON."""
+	return json.dumps(stock_queue or [], separators=(",", ":"))
+
+
 def round_off_if_near_zero(number: float, precision: int = 7) -> float:
 	"""Rounds off the number to zero only if number is close to zero for decimal
 	specified in precision. Precision defaults to 7.
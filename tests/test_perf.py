@@ -1,5 +1,13 @@
+from contextlib import ExitStack
+from unittest.mock import patch
+
 import frappe
 from frappe.tests import IntegrationTestCase
+from frappe.utils import flt, nowdate
+
+from nexa.accounts.general_ledger import process_gl_map
+from nexa.controllers import taxes_and_totals
+from nexa.controllers.taxes_and_totals import calculate_taxes_and_totals
 
 INDEXED_FIELDS = {
 	"Bin": ["item_code"],
@@ -21,3 +29,161 @@ class TestPerformance(IntegrationTestCase):
 						WHERE Column_name = "{field}" AND Seq_in_index = 1"""
 					)
 				)
+
+	def test_process_gl_map_scales_linearly(self):
+		"""Merging a GL map should read each row a fixed number of times, not once per merged row"""
+
+		class GLEntry(frappe._dict):
+			reads = 0
+
+			def get(self, key, default=None):
+				GLEntry.reads += 1
+				return super().get(key, default)
+
+			def __getattr__(self, key):
+				GLEntry.reads += 1
+				return super().get(key)
+
+		def get_gl_map(rows):
+			# every account head repeats 10 times, so a tenth of the rows remain after merging
+			return [
+				GLEntry(
+					company="_Test Company",
+					posting_date=nowdate(),
+					voucher_type="Journal Entry",
+					voucher_no="_Test Perf JV",
+					account="_Test Bank - _TC",
+					cost_center="_Test Cost Center - _TC",
+					voucher_detail_no=str(idx % (rows // 10)),
+					debit=1,
+					credit=0,
+				)
+				for idx in range(rows)
+			]
+
+		reads = {}
+		for rows in (1000, 10_000):
+			gl_map = get_gl_map(rows)
+			GLEntry.reads = 0
+			processed_gl_map = process_gl_map(gl_map, from_repost=True)
+			reads[rows] = GLEntry.reads
+
+			self.assertEqual(len(processed_gl_map), rows // 10)
+			self.assertTrue(all(d.debit == 10 and d.credit == 0 for d in processed_gl_map))
+
+		# a scan of the merged rows for every row reads ~100x as much for 10x the rows
+		self.assertLess(reads[10_000], reads[1000] * 11)
+
+	def test_taxes_of_large_invoice_built_once(self):
+		"""Item tax maps should be built per distinct template and reused by recalculations"""
+		from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+
+		si = create_sales_invoice(do_not_save=True)
+		si.items = []
+		for idx in range(1000):
+			si.append(
+				"items",
+				{
+					"item_code": "_Test Item",
+					"qty": 1,
+					"rate": 100 + idx % 10,
+					"income_account": "Sales - _TC",
+					"cost_center": "_Test Cost Center - _TC",
+					"item_tax_template": "_Test Account Excise Duty @ 10 - _TC" if idx % 2 else None,
+				},
+			)
+		si.append(
+			"taxes",
+			{
+				"charge_type": "On Net Total",
+				"account_head": "_Test Account VAT - _TC",
+				"cost_center": "_Test Cost Center - _TC",
+				"description": "VAT",
+				"rate": 5,
+			},
+		)
+
+		with patch.object(
+			taxes_and_totals, "get_item_tax_map", wraps=taxes_and_totals.get_item_tax_map
+		) as get_item_tax_map:
+			for _idx in range(3):
+				calculate_taxes_and_totals(si)
+
+		self.assertEqual(get_item_tax_map.call_count, 2)
+		self.assertEqual(si.net_total, 104500)
+
+		# changing a tax rate builds the maps again
+		si.taxes[0].rate = 10
+		calculate_taxes_and_totals(si)
+		self.assertEqual(si.total_taxes_and_charges, 10450)
+
+	def test_tax_lookups_of_large_invoice_once_per_tax(self):
+		"""Precisions and item tax rates should be looked up once per tax row, not once per item"""
+		from nexa.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+
+		taxes = [
+			("On Net Total", "_Test Account VAT - _TC", 12, None),
+			("On Net Total", "_Test Account Excise Duty - _TC", 5, None),
+			("On Previous Row Amount", "_Test Account Education Cess - _TC", 2, 2),
+			("On Previous Row Total", "_Test Account S&H Education Cess - _TC", 1, 3),
+			("On Item Quantity", "_Test Account Customs Duty - _TC", 0.5, None),
+			("Actual", "_Test Account Shipping Charges - _TC", 100, None),
+		]
+
+		def get_invoice(rows):
+			si = create_sales_invoice(do_not_save=True)
+			si.items = []
+			for idx in range(rows):
+				si.append(
+					"items",
+					{
+						"item_code": "_Test Item",
+						"qty": 1 + idx % 3,
+						"rate": 100 + idx % 10,
+						"income_account": "Sales - _TC",
+						"cost_center": "_Test Cost Center - _TC",
+						"item_tax_template": "_Test Account Excise Duty @ 10 - _TC" if idx % 2 else None,
+					},
+				)
+
+			for charge_type, account_head, rate, row_id in taxes:
+				si.append(
+					"taxes",
+					{
+						"charge_type": charge_type,
+						"account_head": account_head,
+						"cost_center": "_Test Cost Center - _TC",
+						"description": account_head,
+						"rate": 0 if charge_type == "Actual" else rate,
+						"tax_amount": rate if charge_type == "Actual" else 0,
+						"row_id": row_id,
+					},
+				)
+
+			return si
+
+		def get_lookups(rows):
+			si = get_invoice(rows)
+			with ExitStack() as stack:
+				precision_lookups = [
+					stack.enter_context(patch.object(tax, "precision", wraps=tax.precision))
+					for tax in si.taxes
+				]
+				rate_lookups = stack.enter_context(patch.object(si, "precision", wraps=si.precision))
+				calc = calculate_taxes_and_totals(si)
+
+			self.assertEqual(si.taxes[-1].tax_amount, 100)
+			self.assertAlmostEqual(si.taxes[0].tax_amount, flt(si.net_total * 0.12, 2), delta=0.01)
+
+			return (
+				[lookup.call_count for lookup in precision_lookups],
+				len([call for call in rate_lookups.call_args_list if call.args[0] == "rate"]),
+				calc._item_tax_rates,
+			)
+
+		precision_lookups, rate_lookups, item_tax_rates = get_lookups(10)
+
+		# one item tax rate, rounded once
+		self.assertEqual(item_tax_rates, {("taxes", 10): 10})
+		self.assertEqual(rate_lookups, 1)
+		self.assertEqual(get_lookups(1000), (precision_lookups, rate_lookups, item_tax_rates))
@@ -1,12 +1,20 @@
 # Copyright (c) 2022, Frappe Technologies Pvt. Ltd. and Contributors
 # MIT License. See license.txt
 import unittest
+from unittest.mock import patch
 
 import frappe
 from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, add_to_date, now, nowdate
 
+from nexa.accounts.doctype.pos_invoice.pos_invoice import (
+	get_stock_availability,
+	get_stock_availability_by_item,
+)
 from nexa.accounts.doctype.pos_profile.test_pos_profile import make_pos_profile
-from nexa.selling.page.point_of_sale.point_of_sale import get_items
+from nexa.selling.doctype.product_bundle.test_product_bundle import make_product_bundle
+from nexa.selling.page.point_of_sale import point_of_sale
+from nexa.selling.page.point_of_sale.point_of_sale import get_item_catalogue, get_items
 from nexa.stock.doctype.item.test_item import make_item
 from nexa.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 
@@ -53,3 +61,106 @@ class TestPointOfSale(IntegrationTestCase):
 
 		self.assertEqual(len(filtered_items), 1)
 		self.assertEqual(filtered_items[0]["item_code"], item2.item_code)
+
+	def test_item_catalogue_sync(self):
+		pos_profile = make_pos_profile(name="Test POS Profile for Catalogue")
+		item = make_item("Test Catalogue Stock Item", {"is_stock_item": 1})
+		make_stock_entry(item_code=item.name, qty=10, to_warehouse="_Test Warehouse - _TC", rate=500)
+		item_price = frappe.get_doc(
+			{
+				"doctype": "Item Price",
+				"item_code": item.name,
+				"price_list": pos_profile.selling_price_list,
+				"price_list_rate": 100,
+			}
+		).insert()
+
+		# the full catalogue is built once and then served from the cache
+		key = f"pos_item_catalogue::{pos_profile.name}::{pos_profile.selling_price_list}::{nowdate()}"
+		frappe.cache.delete_value(key)
+		self.addCleanup(frappe.cache.delete_value, key)
+
+		catalogue = get_item_catalogue(pos_profile.name)
+		self.assertIn(item.name, [d.item_code for d in catalogue["items"]])
+		self.assertIn(item_price.name, [d.name for d in catalogue["prices"]])
+		self.assertEqual(catalogue["stock"][item.name], 10)
+
+		with patch.object(point_of_sale, "build_item_catalogue") as build_item_catalogue:
+			self.assertEqual(get_item_catalogue(pos_profile.name)["version"], catalogue["version"])
+			build_item_catalogue.assert_not_called()
+
+		# deltas overlap the last sync, so rows are matched by name
+		version = catalogue["version"]
+		item_price.price_list_rate = 120
+		item_price.save()
+		changes = get_item_catalogue(pos_profile.name, since=version)
+		self.assertEqual({d.name: d.price_list_rate for d in changes["prices"]}[item_price.name], 120)
+
+		item_price.delete()
+		item.disabled = 1
+		item.save()
+		changes = get_item_catalogue(pos_profile.name, since=version)
+		self.assertIn(item_price.name, changes["removed_prices"])
+		self.assertIn(item.name, changes["removed_items"])
+		self.assertNotIn(item.name, [d.item_code for d in changes["items"]])
+
+	def test_item_catalogue_prices(self):
+		pos_profile = make_pos_profile(name="Test POS Profile for Catalogue Prices")
+		item = make_item("Test Catalogue Price Item", {"is_stock_item": 1})
+
+		def make_item_price(price_list, valid_from, valid_upto=None):
+			return frappe.get_doc(
+				{
+					"doctype": "Item Price",
+					"item_code": item.name,
+					"price_list": price_list,
+					"price_list_rate": 100,
+					"valid_from": valid_from,
+					"valid_upto": valid_upto,
+				}
+			).insert()
+
+		valid_price = make_item_price(pos_profile.selling_price_list, add_days(nowdate(), -10))
+		expired_price = make_item_price(
+			pos_profile.selling_price_list, add_days(nowdate(), -20), add_days(nowdate(), -11)
+		)
+		upcoming_price = make_item_price(pos_profile.selling_price_list, add_days(nowdate(), 1))
+		other_price = make_item_price("_Test Price List 2", add_days(nowdate(), -10))
+
+		key = f"pos_item_catalogue::{pos_profile.name}::{pos_profile.selling_price_list}::{nowdate()}"
+		frappe.cache.delete_value(key)
+		self.addCleanup(frappe.cache.delete_value, key)
+
+		prices = [d.name for d in get_item_catalogue(pos_profile.name)["prices"]]
+		self.assertIn(valid_price.name, prices)
+		for item_price in (expired_price, upcoming_price, other_price):
+			self.assertNotIn(item_price.name, prices)
+
+		# a price which ran out since the last sync is removed, prices of other lists are left alone
+		expired_price.db_set(
+			{"valid_upto": add_days(nowdate(), -1), "modified": add_to_date(now(), days=-5)},
+			update_modified=False,
+		)
+		other_price.delete()
+		changes = get_item_catalogue(pos_profile.name, since=add_to_date(now(), days=-2))
+		self.assertIn(expired_price.name, changes["removed_prices"])
+		self.assertNotIn(other_price.name, changes["removed_prices"])
+		self.assertNotIn(upcoming_price.name, [d.name for d in changes["prices"]])
+
+		frappe.set_user("Guest")
+		self.addCleanup(frappe.set_user, "Administrator")
+		self.assertRaises(frappe.PermissionError, get_item_catalogue, pos_profile.name)
+
+	def test_stock_availability_by_item(self):
+		stock_item = make_item("Test Availability Stock Item", {"is_stock_item": 1}).name
+		service_item = make_item("Test Availability Service Item", {"is_stock_item": 0}).name
+		bundle_item = make_item("Test Availability Bundle", {"is_stock_item": 0}).name
+		make_product_bundle(bundle_item, [stock_item], qty=2)
+		make_stock_entry(item_code=stock_item, qty=10, to_warehouse="_Test Warehouse - _TC", rate=500)
+
+		item_codes = [stock_item, service_item, bundle_item]
+		availability = get_stock_availability_by_item(item_codes, "_Test Warehouse - _TC")
+		for item_code in item_codes:
+			self.assertEqual(
+				availability[item_code], get_stock_availability(item_code, "_Test Warehouse - _TC")
+			)